@@ -1,3 +1,4 @@
+from config import macrocycle_allowed_weeks as macrocycle_weeks
 from logging_config import LogMainSubAgent
 from datetime import timedelta
 
@@ -5,7 +6,6 @@ from langgraph.graph import StateGraph, START, END
 
 from app import db
 from app.models import User_Mesocycles, User_Macrocycles
-from app.solver_agents.phases import Main as phase_main
 from app.utils.common_table_queries import current_macrocycle, current_mesocycle
 
 from app.main_agent.user_macrocycles import MacrocycleAgentNode
@@ -16,14 +16,12 @@ from app.main_agent.base_sub_agents.with_parents import confirm_parent, confirm_
 from app.impact_goal_models import MacrocycleGoal
 from app.goal_prompts import macrocycle_system_prompt
 from app.edit_agents import create_mesocycle_edit_agent
-from app.main_agent.utils import construct_phases_list
+from app.main_agent.utils import construct_phases_list, retrieve_phase_plan
 
 from app.schedule_printers import MesocycleSchedulePrinter
 
 # ----------------------------------------- User Mesocycles -----------------------------------------
 
-macrocycle_weeks = 26
-
 class AgentState(MainAgentState):
     focus_name: str
     parent_name: str
@@ -112,15 +110,10 @@ class SubAgent(MacrocycleAgentNode, BaseAgent):
         LogMainSubAgent.agent_steps(f"\t---------Perform Mesocycle Scheduling---------")
         goal_id = state["goal_id"]
         macrocycle_allowed_weeks = state["macrocycle_allowed_weeks"]
-        parameters={
-            "macrocycle_allowed_weeks": macrocycle_allowed_weeks,
-            "goal_type": goal_id}
         constraints={}
 
-        # Retrieve all possible phases that can be selected and convert them into a list form.
-        parameters["possible_phases"] = construct_phases_list(int(goal_id))
-
-        result = phase_main(parameters, constraints)
+        # The phase plan only depends on the goal and the library tables, so it is retrieved from the stored plans.
+        result = retrieve_phase_plan(goal_id, macrocycle_allowed_weeks, constraints)
         LogMainSubAgent.agent_output(result["formatted"])
 
         agent_output = result["output"]
@@ -1,9 +1,10 @@
-from config import vertical_loading
+from config import vertical_loading, ortools_solver_hints
 from datetime import timedelta
 
 from app.models import Weekday_Library, User_Weekday_Availability, User_Workout_Days
 
 from app.main_agent.utils import construct_available_exercises_list, construct_phase_component_list, construct_available_general_exercises_list
+from app.main_agent.utils import construct_workout_component_hints
 from app.main_agent.utils import verify_pc_information
 
 # ----------------------------------------- Workout Days -----------------------------------------
@@ -20,7 +21,7 @@ def verify_and_update_phase_component_information(parameters, pcs, exercises, to
     return None
 
 # Retrieves the parameters used by the solver.
-def retrieve_parameters(user_id, phase_id, microcycle_weekdays, weekday_availability, number_of_available_weekdays, total_availability):
+def retrieve_parameters(user_id, phase_id, microcycle_id, microcycle_weekdays, weekday_availability, number_of_available_weekdays, total_availability):
     parameters = {"valid": True, "status": None}
 
     parameters["microcycle_weekdays"] = microcycle_weekdays
@@ -31,6 +32,8 @@ def retrieve_parameters(user_id, phase_id, microcycle_weekdays, weekday_availabi
 
     verify_and_update_phase_component_information(parameters, parameters["phase_components"], parameters["possible_exercises"][1:], total_availability, number_of_available_weekdays)
 
+    # The workout components of the most recent comparable microcycle, used to warm start the solver.
+    parameters["solution_hints"] = construct_workout_component_hints(user_id, phase_id, microcycle_id) if ortools_solver_hints else []
     return parameters
 
 def retrieve_availability_for_week(user_id):
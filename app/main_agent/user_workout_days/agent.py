@@ -1,3 +1,4 @@
+from config import batch_generate_workout_exercises
 from logging_config import LogMainSubAgent
 
 from langgraph.graph import StateGraph, START, END
@@ -125,12 +126,13 @@ class SubAgent(BaseAgent):
         LogMainSubAgent.agent_steps(f"\t---------Perform Workout Day Scheduling---------")
         user_id = state["user_id"]
         phase_id = state["phase_id"]
+        microcycle_id = state["microcycle_id"]
         microcycle_weekdays = state["microcycle_weekdays"]
         weekday_availability = state["weekday_availability"]
         number_of_available_weekdays = state["number_of_available_weekdays"]
         total_availability = state["total_availability"]
 
-        parameters=retrieve_parameters(user_id, phase_id, microcycle_weekdays, weekday_availability, number_of_available_weekdays, total_availability)
+        parameters=retrieve_parameters(user_id, phase_id, microcycle_id, microcycle_weekdays, weekday_availability, number_of_available_weekdays, total_availability)
         constraints={}
 
         result = phase_component_main(parameters, constraints)
@@ -166,6 +168,13 @@ class SubAgent(BaseAgent):
 
         db.session.add_all(user_workdays)
         db.session.commit()
+
+        # Generate the exercises of every new workout day while the shared exercise list is built once.
+        # Today's workout day is skipped, as the workout exercise agent schedules it next.
+        if batch_generate_workout_exercises:
+            # Imported here as the workout exercise agent depends on this agent.
+            from app.main_agent.user_workout_exercises.microcycle_batch import generate_microcycle_workout_exercises
+            generate_microcycle_workout_exercises(state["user_id"], microcycle_id)
         return {}
 
     # Create main agent.
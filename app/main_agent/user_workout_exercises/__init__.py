@@ -1 +1,2 @@
-from .agent import create_main_agent_graph as create_workout_agent
\ No newline at end of file
+from .agent import create_main_agent_graph as create_workout_agent
+from .microcycle_batch import generate_microcycle_workout_exercises
@@ -1,9 +1,11 @@
+from config import ortools_solver_hints
 from flask import abort
 
-from app.models import User_Weekday_Availability
+from app.models import User_Weekday_Availability, User_Workout_Exercises
 
 from app.main_agent.utils import retrieve_total_time_needed
 from app.main_agent.utils import construct_user_workout_components_list, construct_available_exercises_list, construct_available_general_exercises_list
+from app.main_agent.utils import construct_workout_exercise_hints
 from app.main_agent.utils import verify_pc_information
 
 # ----------------------------------------- Workout Exercises -----------------------------------------
@@ -22,13 +24,12 @@ def retrieve_availability_for_day(user_id, weekday_id):
 # Updates the maximum allowed exercises to be the number of allowed exercises for a phase component if the number available is lower than the maximum.
 def verify_and_update_phase_component_information(parameters, pcs, exercises):
     # Retrieve parameters. Returned information includes the phase components, exercises, and exercises for phase components.
-    pcs, exercises = verify_pc_information(parameters, pcs, exercises, parameters["availability"], "duration_min", "exercises_per_bodypart_workout_min", check_globally=True)
+    pcs, _ = verify_pc_information(parameters, pcs, exercises, parameters["availability"], "duration_min", "exercises_per_bodypart_workout_min", check_globally=True)
     
     pcs_new = [pc for pc in pcs if pc.get("allowed_exercises")]
 
-    # Replace the ends of both lists with the corrected versions. 
+    # Replace the end of the list with the corrected versions. The exercises themselves are left unchanged.
     parameters["phase_components"][1:] = pcs_new
-    parameters["possible_exercises"][1:] = exercises
     return None
 
 # Retrieves the total projected duration for the workout. 
@@ -49,7 +50,9 @@ def retrieve_projected_duration(user_workout_components, pcs):
 #   The projected duration of the workout.
 #   The phase component information relevant for the workout.
 #   The exercises that can be assigned in the workout.
-def retrieve_parameters(user_id, user_workout_day, availability):
+#   The exercises of the most recent comparable workout, used to warm start the solver.
+# An exercise table that was already constructed for the user may be given, which is shared as verification doesn't alter it.
+def retrieve_parameters(user_id, user_workout_day, availability, possible_exercises=None):
     parameters = {"valid": True, "status": None}
 
     # Retrieve user components
@@ -60,10 +63,30 @@ def retrieve_parameters(user_id, user_workout_day, availability):
     parameters["one_rep_max_improvement_percentage"] = 25
     parameters["availability"] = availability
     parameters["phase_components"] = construct_user_workout_components_list(user_workout_components)
-    parameters["possible_exercises"] = construct_available_exercises_list(user_id)
+    parameters["possible_exercises"] = possible_exercises if possible_exercises is not None else construct_available_exercises_list(user_id)
     parameters["possible_general_exercises"] = construct_available_general_exercises_list(parameters["possible_exercises"])
 
     verify_and_update_phase_component_information(parameters, parameters["phase_components"][1:], parameters["possible_exercises"][1:])
 
     parameters["projected_duration"] = retrieve_projected_duration(parameters["phase_components"][1:], parameters["phase_components"][1:])
-    return parameters
\ No newline at end of file
+    parameters["solution_hints"] = construct_workout_exercise_hints(user_id, user_workout_day) if ortools_solver_hints else []
+    return parameters
+
+# Construct the exercise entries of a workout from the output of the solver.
+def workout_exercise_entry_construction(workout_day_id, exercises_output):
+    return [
+        User_Workout_Exercises(
+            workout_day_id = workout_day_id,
+            phase_component_id = exercise["phase_component_id"],
+            exercise_id = exercise["exercise_id"],
+            bodypart_id = exercise["bodypart_id"],
+            order = i,
+            reps = exercise["reps"],
+            sets = exercise["sets"],
+            intensity = exercise["intensity"],
+            rest = exercise["rest"],
+            weight = exercise["weight"],
+            true_exercise_flag = exercise["true_exercise_flag"]
+        )
+        for i, exercise in enumerate(exercises_output, start=1)
+    ]
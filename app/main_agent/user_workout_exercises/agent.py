@@ -20,7 +20,7 @@ from app.impact_goal_models import PhaseComponentGoal
 from app.goal_prompts import phase_component_system_prompt
 from app.edit_agents import create_workout_edit_agent
 
-from .actions import retrieve_availability_for_day, retrieve_parameters
+from .actions import retrieve_availability_for_day, retrieve_parameters, workout_exercise_entry_construction
 from app.schedule_printers import WorkoutScheduleSchedulePrinter
 from app.schedule_printers import WorkoutScheduleListPrinter
 
@@ -119,25 +119,7 @@ class SubAgent(BaseAgent):
         workout_day_id = state["phase_component_id"]
         exercises_output = state["agent_output"]
 
-        user_workout_exercises = []
-        for i, exercise in enumerate(exercises_output, start=1):
-            # Create a new exercise entry.
-            new_exercise = User_Workout_Exercises(
-                workout_day_id = workout_day_id,
-                phase_component_id = exercise["phase_component_id"],
-                exercise_id = exercise["exercise_id"],
-                bodypart_id = exercise["bodypart_id"],
-                order = i,
-                reps = exercise["reps"],
-                sets = exercise["sets"],
-                intensity = exercise["intensity"],
-                rest = exercise["rest"],
-                weight = exercise["weight"],
-                true_exercise_flag = exercise["true_exercise_flag"]
-            )
-
-            user_workout_exercises.append(new_exercise)
-
+        user_workout_exercises = workout_exercise_entry_construction(workout_day_id, exercises_output)
         db.session.add_all(user_workout_exercises)
         db.session.commit()
         return {}
@@ -0,0 +1,106 @@
+from config import batch_workout_exercise_workers
+from logging_config import LogMainSubAgent
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from datetime import date
+
+from app import db
+from app.models import User_Workout_Exercises, User_Microcycles
+
+from app.solver_agents.exercises import exercises_main
+from app.main_agent.utils import construct_available_exercises_list
+
+from .actions import retrieve_availability_for_day, retrieve_parameters, workout_exercise_entry_construction
+
+# ----------------------------------------- Microcycle Workout Exercises -----------------------------------------
+
+# Retrieve the parameters and constraints for every workout day of the microcycle that has phase components.
+# Today's workout day is left to the workout exercise agent, which schedules it right after the workout days are made.
+# The exercise list is constructed once for the user and shared by every day.
+def retrieve_microcycle_parameters(user_id, user_microcycle):
+    possible_exercises = None
+    day_parameters = {}
+    today = date.today()
+    for user_workout_day in user_microcycle.workout_days:
+        if not user_workout_day.workout_components or user_workout_day.date == today:
+            continue
+
+        availability = retrieve_availability_for_day(user_id, user_workout_day.weekday_id)
+        if availability is None:
+            LogMainSubAgent.verbose(f"No availability for workout day {user_workout_day.id}. Skipping.")
+            continue
+
+        if possible_exercises is None:
+            possible_exercises = construct_available_exercises_list(user_id)
+
+        # A day whose parameters can't be verified is left out, to be scheduled by the workout exercise agent when it is requested.
+        try:
+            parameters = retrieve_parameters(user_id, user_workout_day, availability, possible_exercises)
+        except Exception as e:
+            LogMainSubAgent.verbose(f"Could not retrieve the parameters for workout day {user_workout_day.id}: {e}. It will be generated when requested.")
+            continue
+        constraints = {"vertical_loading": user_workout_day.loading_system_id == 1}
+        day_parameters[user_workout_day.id] = (parameters, constraints)
+    return day_parameters
+
+# Solve a single workout day within the application context, as the solver may access the database.
+def _solve_workout_day(app, parameters, constraints):
+    with app.app_context():
+        return exercises_main(parameters, constraints)
+
+# Solve every workout day of the microcycle. The days are independent of each other, so they are solved in parallel.
+# Each day runs in a copy of the current context so that its solver progress still reaches the client.
+# A day that fails is left out, to be scheduled by the workout exercise agent when it is requested.
+def solve_microcycle_workout_days(day_parameters):
+    app = current_app._get_current_object()
+    day_outputs = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(batch_workout_exercise_workers, len(day_parameters)))) as ex:
+        futures = {
+            ex.submit(copy_context().run, _solve_workout_day, app, parameters, constraints): workout_day_id
+            for workout_day_id, (parameters, constraints) in day_parameters.items()
+        }
+
+        for fut in as_completed(futures):
+            workout_day_id = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                LogMainSubAgent.verbose(f"Could not generate the exercises for workout day {workout_day_id}: {e}. It will be generated when requested.")
+                continue
+            LogMainSubAgent.agent_output(result["formatted"])
+            day_outputs[workout_day_id] = result["output"]
+    return day_outputs
+
+# Generate the exercises for every workout day of a microcycle in one pass.
+# The old exercises are replaced and the new ones are written in a single transaction.
+def generate_microcycle_workout_exercises(user_id, microcycle_id):
+    LogMainSubAgent.agent_steps(f"\t---------Perform Workout Exercise Scheduling for Microcycle---------")
+    user_microcycle = db.session.get(User_Microcycles, microcycle_id)
+    if not user_microcycle:
+        return {}
+
+    day_parameters = retrieve_microcycle_parameters(user_id, user_microcycle)
+    if not day_parameters:
+        LogMainSubAgent.verbose(f"No workout days with phase components in microcycle {microcycle_id}.")
+        return {}
+
+    day_outputs = solve_microcycle_workout_days(day_parameters)
+
+    user_workout_exercises = []
+    for workout_day_id, day_output in day_outputs.items():
+        user_workout_exercises.extend(workout_exercise_entry_construction(workout_day_id, day_output))
+
+    try:
+        (
+            db.session.query(User_Workout_Exercises)
+            .filter(User_Workout_Exercises.workout_day_id.in_(list(day_outputs)))
+            .delete(synchronize_session=False))
+        db.session.add_all(user_workout_exercises)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    LogMainSubAgent.verbose(f"Generated {len(user_workout_exercises)} exercises for {len(day_outputs)} workout days of microcycle {microcycle_id}.")
+    return day_outputs
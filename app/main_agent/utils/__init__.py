@@ -1,2 +1,3 @@
 from .construct_lists_from_sql import *
-from .agent_pre_processing import *
\ No newline at end of file
+from .agent_pre_processing import *
+from .phase_plan_store import retrieve_phase_plan, precompute_phase_plans, clear_phase_plans
\ No newline at end of file
@@ -1,9 +1,11 @@
-import heapq
+import numpy as np
+from app.utils.exercise_table import as_exercise_table
 from .utils import check_for_required, remove_impossible_not_required_phase_components
 from config import change_min_max_exercises_for_those_available
 from logging_config import LogSolverPreProcessing
 
 def correct_available_exercises_with_possible_weights(pcs, exercises_for_pcs, exercises):
+    exercises = as_exercise_table(exercises)
     unsatisfiable = []
     pcs_to_remove = []
     for i, (pc, exs_for_pc) in enumerate(zip(pcs, exercises_for_pcs)):
@@ -11,27 +13,11 @@ def correct_available_exercises_with_possible_weights(pcs, exercises_for_pcs, ex
         if not exs_for_pc:
             continue
 
-        # Retrieve range of intensities possible.
-        pc_intensity = list(range(pc["intensity_min"] or 1, pc["intensity_max"] + 1))
+        # Exercises that aren't weighted are always available, while weighted exercises need a weight the user has at one of the intensities possible.
+        has_valid_weights = exercises.has_valid_weights(pc["intensity_min"], pc["intensity_max"])
 
         # Retrieve the new list of available exercises.
-        available_exercises = []
-        for ex_i in exs_for_pc:
-            ex = exercises[ex_i-1]
-            # If the exercise is weighted, determine if the user has the valid weights for it.
-            if ex["is_weighted"]:
-                available_weights = set(ex["weighted_equipment_measurements"])
-
-                # Retrieve the set of possible weights by multiplying the range of intensities with the current 1RM.
-                possible_weights = set([(intensity * ex["one_rep_max"] // 100) for intensity in pc_intensity])
-                possible_weights_that_are_available = available_weights & possible_weights
-                if possible_weights_that_are_available:
-                    available_exercises.append(ex_i)
-
-            # If the exercise isn't weighted, it doesn't need to be checked for weight.
-            else:
-                available_exercises.append(ex_i)
-        exercises_for_pcs[i] = available_exercises
+        exercises_for_pcs[i] = [ex_i for ex_i in exs_for_pc if has_valid_weights[ex_i-1]]
         if not exercises_for_pcs[i]:
             message = f"{pc["pc_name_for_bodypart"]} doesn't have the weights for a satisfactory intensity as well as no non-weighted exercises."
             is_required = pc["required_within_microcycle"] == "always"
@@ -45,18 +31,16 @@ def correct_available_exercises_with_possible_weights(pcs, exercises_for_pcs, ex
 
 # Find the correct minimum and maximum range for the minimum duration.
 def correct_minimum_duration_for_phase_component(pcs, exercises, exercises_for_pcs):
+    durations = as_exercise_table(exercises).column("duration")
     for pc, exercises_for_pc in zip(pcs, exercises_for_pcs):
-        pc_exercises_duration = [exercises[i]["duration"]# if not exercises[i]["is_weighted"] else 0
-                                 for i in exercises_for_pc
-                                 #if not exercises[i]["is_weighted"]
-                                 ]
-        if pc_exercises_duration == []:
+        pc_exercises_duration = np.sort(durations[np.asarray(exercises_for_pc, dtype=np.int64)])
+        if len(pc_exercises_duration) == 0:
             min_exercise_duration_min = 0
             min_exercise_duration_max = 0
         else:
-            min_exercise_duration_min = heapq.nsmallest((pc["exercises_per_bodypart_workout_min"] or 1), pc_exercises_duration)[-1]# + 1
-            min_exercise_duration_max = heapq.nsmallest((pc["exercises_per_bodypart_workout_max"] or 1), pc_exercises_duration)[-1]# + 1
-            min_exercise_duration = heapq.nsmallest((pc["exercises_per_bodypart_workout_max"] or 1), pc_exercises_duration)
+            # The duration of the slowest of the quickest exercises needed, or of the slowest exercise if there are fewer.
+            min_exercise_duration_min = int(pc_exercises_duration[min(pc["exercises_per_bodypart_workout_min"] or 1, len(pc_exercises_duration)) - 1])
+            min_exercise_duration_max = int(pc_exercises_duration[min(pc["exercises_per_bodypart_workout_max"] or 1, len(pc_exercises_duration)) - 1])
 
         pc["duration_min_desired"] = max(min_exercise_duration_min, pc["duration_min"])
         pc["duration_min_max"] = max(min_exercise_duration_max, pc["duration_min_max"])
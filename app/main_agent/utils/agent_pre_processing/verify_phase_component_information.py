@@ -1,5 +1,7 @@
 from config import change_min_max_exercises_for_those_available
 from logging_config import LogSolverPreProcessing
+import numpy as np
+from app.utils.exercise_table import as_exercise_table
 from app.utils.get_all_exercises_for_pc import get_exercises_for_all_pcs
 from .check_exercise_quantity import Main as check_exercise_quantity
 from .check_for_enough_time import Main as check_for_enough_time
@@ -12,12 +14,14 @@ def print_logging_message(message):
 
 # Attach allowed exercises to phase components.
 def attach_exercises_to_pcs(pcs, exercises, exercises_for_pcs, true_exercise_indicators_for_pcs):
+    performances = as_exercise_table(exercises).column("performance")
+
     # Attach allowed exercises to phase component.
     for pc, exercises_for_pc, true_exercise_indicators_for_pc in zip(pcs, exercises_for_pcs, true_exercise_indicators_for_pcs):
         pc["allowed_exercises"] = exercises_for_pc
         pc["true_exercise_indicators"] = true_exercise_indicators_for_pc
         if exercises_for_pc:
-            pc["performance"]=min(exercises[exercise_for_pc-1]["performance"] for exercise_for_pc in exercises_for_pc)
+            pc["performance"]=int(performances[np.asarray(exercises_for_pc, dtype=np.int64)-1].min())
         else:
             pc["performance"]=0
     return pcs
@@ -30,12 +34,11 @@ def attach_general_exercises_to_pcs(pcs, general_exercises_for_pcs):
     return pcs
 
 def get_general_exercises_for_all_pcs(exercises, exercises_for_pcs):
+    general_ids = as_exercise_table(exercises).column("general_id")
+
     # Loop through the phase components
     general_exercises_for_pcs = [
-        list(set(
-            exercises[exercise_for_pc-1]["general_id"]
-            for exercise_for_pc in exercises_for_pc
-        ))
+        np.unique(general_ids[np.asarray(exercises_for_pc, dtype=np.int64)-1]).tolist()
         for exercises_for_pc in exercises_for_pcs
     ]
     return general_exercises_for_pcs
@@ -45,6 +48,8 @@ def get_general_exercises_for_all_pcs(exercises, exercises_for_pcs):
 # Checks if the minimum amount of exercises allowed could fit into the workout with the current duration. 
 # Checks if there are enough exercises to meet the minimum amount of exercises for a phase component. 
 def Main(parameters, pcs, exercises, total_availability, duration_key, count_key, check_globally=False, default_count_if_none=1):
+    exercises = as_exercise_table(exercises)
+
     print_logging_message("FIND EXERCISES FOR ALL PHASE COMPONENTS")
     exercises_for_pcs, true_exercise_indicators_for_pcs = get_exercises_for_all_pcs(exercises, pcs)
 
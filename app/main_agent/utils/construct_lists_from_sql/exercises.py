@@ -1,5 +1,7 @@
 from tqdm import tqdm
-from app.utils.common_table_queries import user_possible_exercises_with_user_exercise_info
+from app.utils.common_table_queries import user_capable_exercises
+from app.utils.exercise_catalog import exercise_catalog
+from app.utils.exercise_table import ExerciseTable
 
 dummy_exercise = {
     "id": 0,
@@ -36,57 +38,46 @@ dummy_exercise = {
     "working_duration": 0,
 }
 
-# Construct all of the component phase combinations for the exercise.
-def construct_component_phase_ids(component_phases):
-    component_ids = []
-    subcomponent_ids = []
-    pc_ids = []
+def exercise_dict(exercise, user_exercise, capability):
+    # The valid measurements of each kind of equipment, as stored with the user's capabilities.
+    supportive_equipment_measurements = capability.measurements("supportive")
+    assistive_equipment_measurements = capability.measurements("assistive")
+    weighted_equipment = capability.measurements("weighted")
+    marking_equipment_measurements = capability.measurements("marking")
+    other_equipment_measurements = capability.measurements("other")
 
-    for component_phase in component_phases:
-        component_id = component_phase.component_id
-        subcomponent_id = component_phase.subcomponent_id
-
-        component_ids.append(component_id)
-        subcomponent_ids.append(subcomponent_id)
-        pc_ids.append([component_id, subcomponent_id])
-    return component_ids, subcomponent_ids, pc_ids
-
-def exercise_dict(exercise, user_exercise):
     # Construct list of allowed weighted measurements.
     weighted_equipment_measurements = [0]
-    for key in user_exercise.has_weighted_equipment[1]:
-        weighted_equipment_measurements.extend(user_exercise.has_weighted_equipment[1][key])
-
-    # Construct the list of ids.
-    component_ids, subcomponent_ids, pc_ids = construct_component_phase_ids(exercise.component_phases)
+    for key in weighted_equipment:
+        weighted_equipment_measurements.extend(weighted_equipment[key])
 
     """Format the exercise data."""
     return {
         "id": exercise.id,
         "name": exercise.name.lower(),
-        "general_id": exercise.general_exercise_id,
-        "general_name": exercise.general_exercises.name.lower(),
+        "general_id": exercise.general_id,
+        "general_name": exercise.general_name.lower(),
         "base_strain": exercise.base_strain,
         "technical_difficulty": exercise.technical_difficulty,
-        "component_ids": component_ids,
-        "subcomponent_ids": subcomponent_ids,
-        "pc_ids": pc_ids,
-        "body_region_ids": exercise.all_body_region_ids,
-        "bodypart_ids": exercise.all_bodypart_ids,
-        "muscle_group_ids": exercise.all_muscle_group_ids,
-        "muscle_ids": exercise.all_muscle_ids,
-        "supportive_equipment_ids": exercise.all_supportive_equipment,
-        "supportive_equipment_measurements": user_exercise.has_supportive_equipment[1],
-        "assistive_equipment_ids": exercise.all_assistive_equipment,
-        "assistive_equipment_measurements": user_exercise.has_assistive_equipment[1],
-        "weighted_equipment_ids": exercise.all_weighted_equipment,
+        "component_ids": list(exercise.component_ids),
+        "subcomponent_ids": list(exercise.subcomponent_ids),
+        "pc_ids": [list(pc_id) for pc_id in exercise.pc_ids],
+        "body_region_ids": list(exercise.body_region_ids),
+        "bodypart_ids": list(exercise.bodypart_ids),
+        "muscle_group_ids": list(exercise.muscle_group_ids),
+        "muscle_ids": list(exercise.muscle_ids),
+        "supportive_equipment_ids": [dict(equipment) for equipment in exercise.supportive_equipment],
+        "supportive_equipment_measurements": supportive_equipment_measurements,
+        "assistive_equipment_ids": [dict(equipment) for equipment in exercise.assistive_equipment],
+        "assistive_equipment_measurements": assistive_equipment_measurements,
+        "weighted_equipment_ids": [dict(equipment) for equipment in exercise.weighted_equipment],
         "weighted_equipment_measurements": weighted_equipment_measurements,
         "is_weighted": exercise.is_weighted,
-        "marking_equipment_ids": exercise.all_marking_equipment,
-        "marking_equipment_measurements": user_exercise.has_marking_equipment[1],
-        "other_equipment_ids": exercise.all_other_equipment,
-        "other_equipment_measurements": user_exercise.has_other_equipment[1],
-        "one_rep_max": user_exercise.one_rep_max_decayed,
+        "marking_equipment_ids": [dict(equipment) for equipment in exercise.marking_equipment],
+        "marking_equipment_measurements": marking_equipment_measurements,
+        "other_equipment_ids": [dict(equipment) for equipment in exercise.other_equipment],
+        "other_equipment_measurements": other_equipment_measurements,
+        "one_rep_max": user_exercise.one_rep_max_decayed_for(exercise.is_weighted),
         "one_rep_load": user_exercise.one_rep_load,
         "volume": user_exercise.volume,
         "density": int(user_exercise.density * 100),                                    # Scaled up to avoid floating point errors from model.
@@ -97,15 +88,18 @@ def exercise_dict(exercise, user_exercise):
     }
 
 # Retrieve the phase types and their corresponding constraints for a goal.
-def construct_available_exercises_list(exercises_with_component_phases):
+# The library information of each exercise comes from the catalog shared by every request, rather than from the database.
+# The exercises are returned as a table, with the numeric fields and memberships of every exercise held in arrays.
+def construct_available_exercises_list(user_exercises_with_capabilities):
+    catalog = exercise_catalog()
     possible_exercises_list = [dummy_exercise]
-    for exercise, user_exercise in tqdm(exercises_with_component_phases, total=len(exercises_with_component_phases), desc="Creating exercise list from entries"):
-        possible_exercises_list.append(exercise_dict(exercise, user_exercise))
-    return possible_exercises_list
+    for user_exercise, capability in tqdm(user_exercises_with_capabilities, total=len(user_exercises_with_capabilities), desc="Creating exercise list from entries"):
+        possible_exercises_list.append(exercise_dict(catalog[user_exercise.exercise_id], user_exercise, capability))
+    return ExerciseTable.from_dicts(possible_exercises_list)
 
 def Main(user_id):
     # Query List Retrieval
-    exercises_with_component_phases = user_possible_exercises_with_user_exercise_info(user_id)
+    exercises_with_component_phases = user_capable_exercises(user_id)
 
     # List of Dictionary Construction
     return construct_available_exercises_list(exercises_with_component_phases)
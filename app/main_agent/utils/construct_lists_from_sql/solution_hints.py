@@ -0,0 +1,71 @@
+from app.models import (
+    User_Macrocycles,
+    User_Mesocycles,
+    User_Microcycles,
+    User_Workout_Days,
+    User_Workout_Exercises)
+
+# Retrieve the most recent workout day of the user, other than the current one, that shares a phase component with the current one and has exercises.
+def retrieve_previous_comparable_workout_day(user_id, user_workout_day):
+    phase_component_ids = [workout_component.phase_component_id for workout_component in user_workout_day.workout_components]
+    previous_workout_day = (
+        User_Workout_Days.query
+        .join(User_Microcycles)
+        .join(User_Mesocycles)
+        .join(User_Macrocycles)
+        .filter(
+            User_Macrocycles.user_id == user_id,
+            User_Workout_Days.id != user_workout_day.id,
+            User_Workout_Days.date <= user_workout_day.date,
+            User_Workout_Days.exercises.any(User_Workout_Exercises.phase_component_id.in_(phase_component_ids)))
+        .order_by(User_Workout_Days.date.desc(), User_Workout_Days.id.desc())
+        .first())
+    return previous_workout_day
+
+# Retrieve the most recent microcycle of the user, other than the current one, for the same phase that has workout components.
+def retrieve_previous_comparable_microcycle(user_id, phase_id, microcycle_id):
+    previous_microcycle = (
+        User_Microcycles.query
+        .join(User_Mesocycles)
+        .join(User_Macrocycles)
+        .filter(
+            User_Macrocycles.user_id == user_id,
+            User_Mesocycles.phase_id == phase_id,
+            User_Microcycles.id != microcycle_id,
+            User_Microcycles.workout_days.any(User_Workout_Days.workout_components.any()))
+        .order_by(User_Microcycles.start_date.desc(), User_Microcycles.id.desc())
+        .first())
+    return previous_microcycle
+
+# Convert the exercises of the previous comparable workout day into hints for the exercise solver.
+def construct_workout_exercise_hints(user_id, user_workout_day):
+    previous_workout_day = retrieve_previous_comparable_workout_day(user_id, user_workout_day)
+    if not previous_workout_day:
+        return []
+
+    previous_exercises = sorted(previous_workout_day.exercises, key=lambda exercise: exercise.order)
+    return [{
+        "phase_component_id": exercise.phase_component_id,
+        "bodypart_id": exercise.bodypart_id,
+        "exercise_id": exercise.exercise_id,
+        "reps": exercise.reps,
+        "sets": exercise.sets,
+        "rest": exercise.rest // 5,                             # Adjusted so that rest is a multiple of 5.
+        "intensity": exercise.intensity,
+    } for exercise in previous_exercises]
+
+# Convert the workout components of the previous comparable microcycle into hints for the phase component solver.
+# Hints are grouped by weekday so that routine weeks line up even if the microcycle starts on a different day.
+def construct_workout_component_hints(user_id, phase_id, microcycle_id):
+    previous_microcycle = retrieve_previous_comparable_microcycle(user_id, phase_id, microcycle_id)
+    if not previous_microcycle:
+        return []
+
+    return [{
+        "weekday_id": workout_day.weekday_id,
+        "components": [{
+            "phase_component_id": workout_component.phase_component_id,
+            "bodypart_id": workout_component.bodypart_id,
+            "duration": workout_component.duration,
+        } for workout_component in workout_day.workout_components]
+    } for workout_day in previous_microcycle.workout_days]
@@ -0,0 +1,61 @@
+from logging_config import LogMainSubAgent
+from copy import deepcopy
+from threading import Lock
+
+from app.models import Goal_Library
+from app.solver_agents.phases import Main as phase_main
+from .construct_lists_from_sql import construct_phases_list
+
+# Phase plans only depend on the goal, the weeks allowed, the constraints, and the library tables, so each is solved once.
+# Keyed by (goal_id, macrocycle_allowed_weeks, active constraint set).
+# Each key has its own lock, so a plan being solved only holds up the lookups of the same plan.
+_phase_plans = {}
+_phase_plan_locks = {}
+_phase_plans_lock = Lock()
+
+def _phase_plan_key(goal_id, macrocycle_allowed_weeks, constraints):
+    return (int(goal_id), macrocycle_allowed_weeks, frozenset(constraints.items()))
+
+def _solve_phase_plan(goal_id, macrocycle_allowed_weeks, constraints):
+    parameters = {
+        "macrocycle_allowed_weeks": macrocycle_allowed_weeks,
+        "goal_type": goal_id,
+        "possible_phases": construct_phases_list(int(goal_id))}
+    return phase_main(parameters, dict(constraints))
+
+# Whether the result of the phase solver has a schedule, as results without one are solved again on the next request.
+def _has_schedule(result):
+    return bool(result["solution"] and result["solution"].get("schedule"))
+
+# Retrieve the phase plan for the goal, solving and storing it if it hasn't been before.
+# A copy is returned so that the schedule items may be altered without changing the stored plan.
+def retrieve_phase_plan(goal_id, macrocycle_allowed_weeks, constraints={}):
+    key = _phase_plan_key(goal_id, macrocycle_allowed_weeks, constraints)
+    with _phase_plans_lock:
+        key_lock = _phase_plan_locks.setdefault(key, Lock())
+
+    with key_lock:
+        result = _phase_plans.get(key)
+        if result is None:
+            LogMainSubAgent.verbose(f"No stored phase plan for goal {goal_id} over {macrocycle_allowed_weeks} weeks. Solving.")
+            result = _solve_phase_plan(goal_id, macrocycle_allowed_weeks, constraints)
+            if _has_schedule(result):
+                with _phase_plans_lock:
+                    _phase_plans[key] = result
+            else:
+                LogMainSubAgent.verbose(f"No phase plan was found for goal {goal_id} over {macrocycle_allowed_weeks} weeks, so none is stored.")
+        return deepcopy(result)
+
+# Solve and store the phase plan for every goal in the library.
+def precompute_phase_plans(macrocycle_allowed_weeks, constraints={}):
+    goal_ids = [goal.id for goal in Goal_Library.query.all()]
+    for goal_id in goal_ids:
+        retrieve_phase_plan(goal_id, macrocycle_allowed_weeks, constraints)
+    LogMainSubAgent.verbose(f"Stored phase plans for {len(goal_ids)} goals over {macrocycle_allowed_weeks} weeks.")
+    return None
+
+# Remove every stored phase plan, as they are no longer valid once the library tables are reloaded.
+def clear_phase_plans():
+    with _phase_plans_lock:
+        _phase_plans.clear()
+    return None
@@ -34,8 +34,12 @@ from .phase_component_bodyparts import Phase_Component_Bodyparts
 from .component_library import Component_Library
 from .subcomponent_library import Subcomponent_Library
 from .phase_library import Phase_Library
+from .library_revision import Library_Revision
+from .solver_result_cache import Solver_Result_Cache
+from .solver_runs import Solver_Runs
 from .user_equipment import User_Equipment
 from .user_exercises import User_Exercises
+from .user_exercise_capabilities import User_Exercise_Capabilities
 from .user_macrocycles import User_Macrocycles
 from .user_mesocycles import User_Mesocycles
 from .user_microcycles import User_Microcycles
@@ -75,8 +79,12 @@ __all__ = [
     "Component_Library", 
     "Subcomponent_Library", 
     "Phase_Library", 
+    "Library_Revision", 
+    "Solver_Result_Cache", 
+    "Solver_Runs", 
     "User_Equipment", 
     "User_Exercises", 
+    "User_Exercise_Capabilities", 
     "User_Macrocycles", 
     "User_Mesocycles", 
     "User_Microcycles", 
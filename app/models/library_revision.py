@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+from app.models.mixins import TableNameMixin
+
+# The revision of the exercise library, shared by every process of the application.
+class Library_Revision(db.Model, TableNameMixin):
+    __table_args__ = {'comment': "The current revision of the exercise library, replaced whenever any of it is added, changed or removed."}
+    # Fields
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+        comment='The single row of the table.')
+    revision = db.Column(
+        db.String(32),
+        nullable=False,
+        comment='A random value, replaced in the same transaction as each change to the library.')
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.now,
+        comment='When the library last changed.')
+
+    def to_dict(self):
+        return {
+            "revision": self.revision,
+            "updated_at": self.updated_at
+        }
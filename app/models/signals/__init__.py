@@ -1,2 +1,3 @@
 #from .user_exercise_signals import connect_user_to_exercises, connect_exercise_to_users
-from .user_exercise_signals import add_user_exercises, add_exercise_for_users
\ No newline at end of file
+from .user_exercise_signals import add_user_exercises, add_exercise_for_users
+from .library_signals import library_version
\ No newline at end of file
@@ -0,0 +1,61 @@
+from app.models import (
+    Library_Revision, 
+    Equipment_Library, 
+    Exercise_Library, 
+    General_Exercise_Library, 
+    Exercise_Component_Phases, 
+    Exercise_Body_Regions, 
+    Exercise_Bodyparts, 
+    Exercise_Muscle_Groups, 
+    Exercise_Muscles, 
+    Muscle_Categories, 
+    Exercise_Supportive_Equipment, 
+    Exercise_Assistive_Equipment, 
+    Exercise_Weighted_Equipment, 
+    Exercise_Marking_Equipment, 
+    Exercise_Other_Equipment)
+from app import db
+from datetime import datetime
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from uuid import uuid4
+
+# The version of the exercise library, replaced whenever any of it is added, changed or removed.
+# It is stored in the database, so that a change made by one process is seen by every other.
+# Anything built from the library is kept only while the version it was built from is current.
+def library_version():
+    return db.session.execute(select(Library_Revision.revision).where(Library_Revision.id == 1)).scalar()
+
+# Replace the version within the transaction of the connection given, so that it only changes if the change to the library is committed.
+def bump_library_version(connection):
+    revision = {"revision": uuid4().hex, "updated_at": datetime.now()}
+    result = connection.execute(update(Library_Revision).where(Library_Revision.id == 1).values(**revision))
+    if result.rowcount == 0:
+        connection.execute(insert(Library_Revision).values(id=1, **revision))
+    return None
+
+# The tables of the exercise library, including the equipment each exercise requires.
+library_tables = (
+    Equipment_Library, 
+    Exercise_Library, 
+    General_Exercise_Library, 
+    Exercise_Component_Phases, 
+    Exercise_Body_Regions, 
+    Exercise_Bodyparts, 
+    Exercise_Muscle_Groups, 
+    Exercise_Muscles, 
+    Muscle_Categories, 
+    Exercise_Supportive_Equipment, 
+    Exercise_Assistive_Equipment, 
+    Exercise_Weighted_Equipment, 
+    Exercise_Marking_Equipment, 
+    Exercise_Other_Equipment)
+
+# When the library changes, whatever was built from it must be rebuilt.
+# The version is replaced once for each flush that changes the library, rather than once for each row.
+@event.listens_for(Session, "after_flush")
+def bump_library_version_after_flush(session, flush_context):
+    changed = [*session.new, *session.deleted, *(instance for instance in session.dirty if session.is_modified(instance))]
+    if any(isinstance(instance, library_tables) for instance in changed):
+        bump_library_version(session.connection())
+    return None
@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+from app.models.mixins import TableNameMixin
+
+# The stored results of the solvers.
+class Solver_Result_Cache(db.Model, TableNameMixin):
+    __table_args__ = {'comment': "The results of the solvers, stored by a hash of the parameters and constraints that produced them."}
+    # Fields
+    key = db.Column(
+        db.String(64), 
+        primary_key=True, 
+        comment='The hash of the solver name, parameters, and constraints.')
+    solver_name = db.Column(
+        db.String(50), 
+        nullable=False, 
+        comment='The name of the solver that produced the result.')
+    result = db.Column(
+        db.JSON, 
+        nullable=False, 
+        comment='The formatted output, output, and solution of the solver.')
+    created_at = db.Column(
+        db.DateTime, 
+        nullable=False, 
+        default=datetime.now, 
+        comment='When the result was stored.')
+
+    def to_dict(self):
+        return {
+            "key": self.key, 
+            "solver_name": self.solver_name, 
+            "created_at": self.created_at
+        }
@@ -0,0 +1,97 @@
+from app import db
+from datetime import datetime
+from app.models.base import BaseModel
+from app.models.mixins import TableNameMixin
+
+# The statistics of each solve performed by the solvers.
+class Solver_Runs(BaseModel, TableNameMixin):
+    __table_args__ = {'comment': "The statistics of every model solved, used to find the models that take the longest."}
+    # Fields
+    agent_name = db.Column(
+        db.String(50),
+        nullable=False,
+        comment='The name of the solver agent that built the model.')
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete='SET NULL'),
+        nullable=True,
+        comment='The user the model was solved for, if solved during a request.')
+    variables = db.Column(
+        db.Integer,
+        nullable=False,
+        comment='The number of variables in the model.')
+    constraints = db.Column(
+        db.Integer,
+        nullable=False,
+        comment='The number of constraints in the model.')
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        comment='The status the solver finished with.')
+    wall_time = db.Column(
+        db.Float,
+        nullable=False,
+        comment='The wall time of the solve in seconds.')
+    user_time = db.Column(
+        db.Float,
+        nullable=False,
+        comment='The user time of the solve in seconds.')
+    objective = db.Column(
+        db.Float,
+        nullable=True,
+        comment='The objective value of the solution found, if any.')
+    best_bound = db.Column(
+        db.Float,
+        nullable=True,
+        comment='The best bound on the objective found, if any.')
+    conflicts = db.Column(
+        db.BigInteger,
+        nullable=False,
+        comment='The number of conflicts during the search.')
+    branches = db.Column(
+        db.BigInteger,
+        nullable=False,
+        comment='The number of branches during the search.')
+    relaxation_attempt = db.Column(
+        db.Integer,
+        nullable=True,
+        comment='The relaxation attempt the solve belonged to, starting at 1.')
+    model_index = db.Column(
+        db.Integer,
+        nullable=True,
+        comment='Which of the models built was solved. 0 is the main model, higher indices are fallback models.')
+    winning_model = db.Column(
+        db.Boolean,
+        nullable=False,
+        default=True,
+        comment='Whether the solution of this solve was used, as opposed to losing a race between models.')
+    model_tags = db.Column(
+        db.JSON,
+        nullable=True,
+        comment='The variables, constraints and build time added by each constraint family and helper, if the model was tagged.')
+    created_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.now,
+        comment='When the solve finished.')
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "agent_name": self.agent_name,
+            "user_id": self.user_id,
+            "variables": self.variables,
+            "constraints": self.constraints,
+            "status": self.status,
+            "wall_time": self.wall_time,
+            "user_time": self.user_time,
+            "objective": self.objective,
+            "best_bound": self.best_bound,
+            "conflicts": self.conflicts,
+            "branches": self.branches,
+            "relaxation_attempt": self.relaxation_attempt,
+            "model_index": self.model_index,
+            "winning_model": self.winning_model,
+            "model_tags": self.model_tags,
+            "created_at": self.created_at
+        }
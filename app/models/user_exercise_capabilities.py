@@ -0,0 +1,61 @@
+from app import db
+from app.models.mixins import TableNameMixin
+
+# Whether a user has the equipment for each exercise, and the measurements of their equipment that the exercise may use.
+class User_Exercise_Capabilities(db.Model, TableNameMixin):
+    __table_args__ = {'comment': "Whether a user has the equipment to perform each exercise, kept up to date as their equipment and the exercise library change."}
+    # Fields
+    user_id = db.Column(
+        db.Integer, 
+        db.ForeignKey("users.id", ondelete='CASCADE'), 
+        primary_key=True)
+    exercise_id = db.Column(
+        db.Integer, 
+        db.ForeignKey("exercise_library.id", ondelete='CASCADE'), 
+        primary_key=True)
+    is_feasible = db.Column(
+        db.Boolean, 
+        nullable=False, 
+        comment='Whether the user has all of the equipment the exercise requires.')
+    supportive_measurements = db.Column(
+        db.JSON, 
+        nullable=False, 
+        default=dict, 
+        comment='The valid measurements of each piece of supportive equipment, by equipment id.')
+    assistive_measurements = db.Column(
+        db.JSON, 
+        nullable=False, 
+        default=dict, 
+        comment='The valid measurements of each piece of assistive equipment, by equipment id.')
+    weighted_measurements = db.Column(
+        db.JSON, 
+        nullable=False, 
+        default=dict, 
+        comment='The valid measurements of each piece of weighted equipment, by equipment id.')
+    marking_measurements = db.Column(
+        db.JSON, 
+        nullable=False, 
+        default=dict, 
+        comment='The valid measurements of each piece of marking equipment, by equipment id.')
+    other_measurements = db.Column(
+        db.JSON, 
+        nullable=False, 
+        default=dict, 
+        comment='The valid measurements of each piece of other equipment, by equipment id.')
+
+    # The valid measurements of a kind of equipment, keyed by equipment id as they are in the rest of the exercise information.
+    def measurements(self, kind):
+        measurements = getattr(self, f"{kind}_measurements") or {}
+        return {int(equipment_id): values for equipment_id, values in measurements.items()}
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id, 
+            "exercise_id": self.exercise_id, 
+            "is_feasible": self.is_feasible, 
+            "supportive_measurements": self.supportive_measurements, 
+            "assistive_measurements": self.assistive_measurements, 
+            "weighted_measurements": self.weighted_measurements, 
+            "marking_measurements": self.marking_measurements, 
+            "other_measurements": self.other_measurements
+        }
@@ -66,7 +66,11 @@ class User_Exercises(db.Model, TableNameMixin):
 
     @hybrid_property
     def one_rep_max_decayed(self):
-        if not self.exercises.is_weighted: 
+        return self.one_rep_max_decayed_for(self.exercises.is_weighted)
+
+    # The decayed one rep max, for when whether the exercise is weighted is already known.
+    def one_rep_max_decayed_for(self, is_weighted):
+        if not is_weighted: 
             return 0
         decayed_one_rep_max = decayed_value(
             original_value = self.one_rep_max, 
@@ -99,9 +103,7 @@ class User_Exercises(db.Model, TableNameMixin):
             return True, {}
 
         # Group user equipment by equipment_id and count measurements
-        user_equipment = _user_map or self._user_equipment_map()
-        for eq in self.users.equipment:
-            user_equipment[eq.equipment_id].append(eq.measurement)
+        user_equipment = _user_map if _user_map is not None else self._user_equipment_map()
 
         # Group required equipment by relationship
         equipment_by_relationship = defaultdict(list)
@@ -24,6 +24,7 @@ class User_Workout_Days(BaseModel, TableNameMixin, OrderedMixin):
     workout_components = db.relationship(
         "User_Workout_Components", 
         back_populates="workout_days", 
+        order_by="User_Workout_Components.id", 
         cascade="all, delete-orphan")
 
     exercises = db.relationship(
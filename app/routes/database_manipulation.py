@@ -1,3 +1,4 @@
+from config import macrocycle_allowed_weeks, precompute_phase_plans_on_init
 from logging_config import LogDBInit
 from flask import request, jsonify, current_app, Blueprint, abort
 
@@ -6,6 +7,9 @@ from app.models import table_object
 
 from app.utils.table_schema_cache import get_database_schema
 from app.routes.auth import register
+from app.main_agent.utils.phase_plan_store import precompute_phase_plans, clear_phase_plans
+from app.solver_agents.solver_cache import solver_cache
+from app.utils.user_exercise_capabilities import refresh_all_user_exercise_capabilities
 
 bp = Blueprint('database_manipulation', __name__)
 
@@ -44,7 +48,10 @@ def drop_db():
     """Drops the database."""
     LogDBInit.introductions(f"Dropping old database.")
     db.drop_all()
+    clear_phase_plans()
+    solver_cache.clear(include_persistent=False)
 
+    # The library revision is dropped with the library, so the library written next is given a new revision.
     return jsonify({"status": "success", "message": "Database DROPPED!"}), 200
 
 # Database creation
@@ -58,6 +65,13 @@ def create_db():
 
     import_data_main("OPT Phase Breakdown.xlsx")
 
+    # The stored phase plans and solver results were solved from the previous library tables.
+    clear_phase_plans()
+    solver_cache.clear()
+    if precompute_phase_plans_on_init:
+        LogDBInit.introductions(f"Solving phase plans for each goal.")
+        precompute_phase_plans(macrocycle_allowed_weeks)
+
     if ('email' in request.form 
         and 'password' in request.form 
         and 'password_confirm' in request.form
@@ -77,6 +91,10 @@ def create_db():
             db.session.commit()
         LogDBInit.introductions(f"User added.")
 
+    # The exercises each user is capable of were found from the previous library tables.
+    LogDBInit.introductions(f"Finding the exercises each user has the equipment for.")
+    refresh_all_user_exercise_capabilities()
+
     current_app.table_schema = get_database_schema(db)
 
     return jsonify({"status": "success", "message": "Database CREATED!"}), 200
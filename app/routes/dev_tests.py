@@ -19,6 +19,8 @@ from app.main_agent.user_workout_completion import create_workout_completion_age
 from app.main_agent.user_weekdays_availability import create_availability_agent
 
 from app.utils.item_to_string import recursively_change_dict_timedeltas
+from app.models import Solver_Runs
+from app.solver_agents.solver_telemetry import summarize_solver_runs
 
 bp = Blueprint('dev_tests', __name__)
 
@@ -216,6 +218,15 @@ def populate_user_exercises():
         result.append(populate_user_exercise(user_exercise))
     return jsonify({"status": "success", "exercises": result}), 200
 
+# Statistics of the recorded solves for each solver agent, optionally for a single agent.
+@bp.route('/solver_stats', methods=['GET'])
+def solver_stats():
+    query = Solver_Runs.query
+    agent_name = request.args.get('agent')
+    if agent_name:
+        query = query.filter_by(agent_name=agent_name)
+    return jsonify(summarize_solver_runs(query.all())), 200
+
 
 # Testing for the SQL to add and check training equipment.
 @bp.route('/test_equipment_context', methods=['GET'])
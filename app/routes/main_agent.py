@@ -1,5 +1,7 @@
-from flask import request, jsonify, Blueprint, current_app, abort
+from flask import request, jsonify, Blueprint, current_app, abort, Response, stream_with_context
 from flask_login import current_user, login_required
+from queue import Empty
+import json
 
 bp = Blueprint('main_agent', __name__)
 
@@ -10,6 +12,7 @@ from app.models import User_Macrocycles, User_Weekday_Availability
 
 from app.main_agent.graph import create_main_agent_graph
 from app.main_agent.actions import enter_main_agent, resume_main_agent
+from app.solver_agents.solver_progress import solver_progress, publishing_progress
 
 # ----------------------------------------- Main Agent -----------------------------------------
 test_cases = [
@@ -32,6 +35,10 @@ def retrieve_user_input_from_json_input(data):
         user_input = data.get("user_input", "")
     return user_input
 
+# The topic that the solvers running for the user publish their improving solutions to.
+def solver_progress_topic(user_id):
+    return f"user-{user_id}"
+
 # Deletes all current schedule items and availabilities for the current user.
 def run_delete_schedules(user_id):
     db.session.query(User_Macrocycles).filter_by(user_id=user_id).delete()
@@ -52,7 +59,8 @@ def test_enter_main_agent(delete_all_user_schedules=False):
         run_delete_schedules(user_id)
 
     # Results of the inital agent entry.
-    results = enter_main_agent(user_id)
+    with publishing_progress(solver_progress_topic(user_id)):
+        results = enter_main_agent(user_id)
     return jsonify({"status": "success", "states": results}), 200
 
 # Enter the main agent with a user input and no pre-existing data.
@@ -72,9 +80,36 @@ def test_resume_main_agent():
     user_input = retrieve_user_input_from_json_input(data)
 
     # Results of the user input.
-    results = resume_main_agent(user_id, user_input)
+    with publishing_progress(solver_progress_topic(user_id)):
+        results = resume_main_agent(user_id, user_input)
     return jsonify({"status": "success", "states": results}), 200
 
+# Streams the improving solutions of the solvers running for the user as server-sent events.
+# A usable schedule is sent as soon as one is found, while the solver keeps improving it.
+@bp.route('/resume/progress', methods=['GET'])
+@login_required
+def stream_solver_progress():
+    topic = solver_progress_topic(current_user.id)
+    updates = solver_progress.subscribe(topic)
+
+    def stream():
+        try:
+            while True:
+                try:
+                    update = updates.get(timeout=15)
+                except Empty:
+                    # Keep the connection open while no solver is running.
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: solution\ndata: {json.dumps(update, default=str)}\n\n"
+        finally:
+            solver_progress.unsubscribe(topic, updates)
+
+    return Response(
+        stream_with_context(stream()), 
+        mimetype="text/event-stream", 
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Exit the Main Agent.
 @bp.route('/exit', methods=['POST', 'PATCH'])
 @login_required
@@ -96,14 +131,16 @@ def test_main_agent(delete_all_user_schedules=False):
         run_delete_schedules(user_id)
 
     # Results of the inital agent entry.
-    results = enter_main_agent(user_id)
+    with publishing_progress(solver_progress_topic(user_id)):
+        results = enter_main_agent(user_id)
 
     # Input is a json.
     data = request.get_json()
     user_input = retrieve_user_input_from_json_input(data)
 
     # Results of the user input.
-    results = resume_main_agent(user_id, user_input)
+    with publishing_progress(solver_progress_topic(user_id)):
+        results = resume_main_agent(user_id, user_input)
     return jsonify({"status": "success", "states": results}), 200
 
 # Enter the main agent and test it with a user input and no pre-existing data.
@@ -3,6 +3,7 @@ from flask_login import current_user, login_required
 
 from app import db
 from app.models import User_Equipment
+from app.utils.user_exercise_capabilities import refresh_user_exercise_capabilities_for_equipment
 
 bp = Blueprint('user_equipment', __name__)
 
@@ -43,8 +44,26 @@ def add_user_equipment(equipment_id):
     user_equipment = User_Equipment(user_id=current_user.id, equipment_id=equipment_id, measurement=data["measurement"])
     db.session.add(user_equipment)
     db.session.commit()
+
+    # Only the exercises requiring this equipment may have become possible.
+    refresh_user_exercise_capabilities_for_equipment(current_user.id, [user_equipment.equipment_id])
     return jsonify({"status": "success", "user_equipment": user_equipment.to_dict()}), 200
 
+# Remove current user's equipment
+@bp.route('/<user_equipment_id>', methods=['DELETE'])
+@login_required
+def delete_user_equipment(user_equipment_id):
+    user_equipment = db.session.get(User_Equipment, user_equipment_id)
+    if not user_equipment or user_equipment.user_id != current_user.id:
+        abort(404, description=f"No active equipment of {user_equipment_id} found for current user.")
+    result = user_equipment.to_dict()
+    db.session.delete(user_equipment)
+    db.session.commit()
+
+    # Only the exercises requiring this equipment may have become impossible.
+    refresh_user_exercise_capabilities_for_equipment(current_user.id, [result["equipment_id"]])
+    return jsonify({"status": "success", "user_equipment": result}), 200
+
 # Retrieve current user's equipment of a specific type
 @bp.route('/equipment/<equipment_id>', methods=['GET'])
 @login_required
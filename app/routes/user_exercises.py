@@ -100,5 +100,5 @@ def exercise_dict(exercise, user_exercise):
 def get_user_possible_exercise_list_with_info():
     user_exercises = user_possible_exercises_with_user_exercise_info(current_user.id)
     result = [exercise_dict(exercise, user_exercise) 
-              for exercise, user_exercise in user_exercises]
+              for exercise, user_exercise, _ in user_exercises]
     return jsonify({"status": "success", "user_exercises": result}), 200
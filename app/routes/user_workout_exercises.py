@@ -129,13 +129,12 @@ def retrieve_availability_for_day(user_workout_day):
 # Updates the maximum allowed exercises to be the number of allowed exercises for a phase component if the number available is lower than the maximum.
 def verify_and_update_pc_information(parameters, pcs, exercises):
     # Retrieve parameters. Returned information includes the phase components, exercises, and exercises for phase components.
-    pcs, exercises = verify_pc_information(parameters, pcs, exercises, parameters["availability"], "duration_min", "exercises_per_bodypart_workout_min", check_globally=True)
+    pcs, _ = verify_pc_information(parameters, pcs, exercises, parameters["availability"], "duration_min", "exercises_per_bodypart_workout_min", check_globally=True)
     
     pcs_new = [pc for pc in pcs if pc.get("allowed_exercises")]
 
-    # Replace the ends of both lists with the corrected versions. 
+    # Replace the end of the list with the corrected versions. The exercises themselves are left unchanged.
     parameters["phase_components"][1:] = pcs_new
-    parameters["possible_exercises"][1:] = exercises
     return None
 
 # Retrieves the total projected duration for the workout. 
@@ -203,6 +202,7 @@ def exercise_agent_preprocessing_test():
     if not user_workout_day:
         abort(404, description="No active workout day found.")
     parameters = retrieve_pc_parameters(user_workout_day)
+    parameters["possible_exercises"] = parameters["possible_exercises"].to_dicts()
     return jsonify({"status": "success", "parameters": parameters}), 200
 
 
@@ -1,51 +1,13 @@
+from config import explain_relaxations_with_llm
+from logging_config import LogSolver
+import ast
 from langchain_openai import ChatOpenAI
+from .constraint_index import ConstraintIndex
 
-def find_constraints_on_variable(model_proto, agent_var):
-    var_index = agent_var.Index()
-    constraints_on_var = []
-
-    for constraint_proto in model_proto.constraints:
-        if ((constraint_proto.HasField("linear") and var_index in constraint_proto.linear.agent_vars) or 
-            (constraint_proto.HasField("bool_or") and var_index in constraint_proto.bool_or.literals) or 
-            (constraint_proto.HasField("interval") and (var_index == constraint_proto.interval.start or 
-                                                        var_index == constraint_proto.interval.size or 
-                                                        var_index == constraint_proto.interval.end)) or 
-            (constraint_proto.HasField("bool_and") and var_index in constraint_proto.bool_and.literals) or 
-            (constraint_proto.HasField("at_most_one") and var_index in constraint_proto.at_most_one.literals) or 
-            # (constraint_proto.HasField("at_least_one") and var_index in constraint_proto.at_least_one.literals) or 
-            (constraint_proto.HasField("exactly_one") and var_index in constraint_proto.exactly_one.literals) or 
-            # (constraint_proto.HasField("int_max") and (var_index == constraint_proto.int_max.target or var_index in constraint_proto.int_max.agent_vars)) or 
-            # (constraint_proto.HasField("int_min") and (var_index == constraint_proto.int_min.target or var_index in constraint_proto.int_min.agent_vars)) or 
-            (constraint_proto.HasField("int_div") and (var_index in constraint_proto.int_div.target.agent_vars or 
-                                                       any(var_index in exprs.agent_vars for exprs in constraint_proto.int_div.exprs))) or 
-            (constraint_proto.HasField("int_mod") and (var_index == constraint_proto.int_mod.target or 
-                                                       var_index == constraint_proto.int_mod.agent_var or 
-                                                       var_index == constraint_proto.int_mod.modulus)) or 
-            (constraint_proto.HasField("int_prod") and (var_index in constraint_proto.int_prod.target.agent_vars or 
-                                                       any(var_index in exprs.agent_vars for exprs in constraint_proto.int_prod.exprs))) or 
-            (constraint_proto.HasField("circuit") and (var_index in constraint_proto.circuit.tails or 
-                                                       var_index in constraint_proto.circuit.heads or 
-                                                       (constraint_proto.circuit.literals and var_index in constraint_proto.circuit.literals))) or 
-            (constraint_proto.HasField("routes") and (var_index in constraint_proto.routes.tails or 
-                                                      var_index in constraint_proto.routes.heads or 
-                                                      var_index in constraint_proto.routes.demands or 
-                                                      var_index == constraint_proto.routes.cost)) or 
-            # (constraint_proto.HasField("diffn") and any(var_index in shape.agent_vars for box in constraint_proto.diffn.boxes for shape in [box.x_size, box.y_size, box.z_size] if shape.agent_vars)) or 
-            (constraint_proto.HasField("cumulative") and (
-                (var_index in constraint_proto.cumulative.capacities) or 
-                any(var_index in interval.agent_vars 
-                    for interval in constraint_proto.cumulative.intervals 
-                    for var_index in [interval.start, interval.size, interval.end]))) or 
-            (constraint_proto.HasField("table") and var_index in constraint_proto.table.agent_vars) or 
-            (constraint_proto.HasField("automaton") and (var_index in constraint_proto.automaton.agent_vars or 
-                                                         var_index in constraint_proto.automaton.transition_vars)) or 
-            (constraint_proto.HasField("inverse") and (var_index in constraint_proto.inverse.f_direct or 
-                                                       var_index in constraint_proto.inverse.f_inverse)) or 
-            (constraint_proto.HasField("element") and (var_index == constraint_proto.element.target or 
-                                                       var_index == constraint_proto.element.index or 
-                                                       var_index in constraint_proto.element.agent_vars))):
-            constraints_on_var.append(constraint_proto)
-    return constraints_on_var
+# The constraints on the variable. Build a ConstraintIndex once when querying many variables of the same model.
+def find_constraints_on_variable(model_proto, agent_var, constraint_index=None):
+    constraint_index = constraint_index or ConstraintIndex(model_proto)
+    return constraint_index.constraint_protos_on(agent_var)
 
 
 def retrieve_relaxation_history(relaxation_attempts):
@@ -113,4 +75,58 @@ Return your response as a dictionary:
         "expected_impact": suggestion['expected_impact']
     }
     
-    return state
\ No newline at end of file
+    return state
+
+def explain_relaxation(state, history, constraints_to_relax, available_constraints) -> dict:
+    """Use LLM to explain a relaxation that was already determined by the solver."""
+    explanation = {
+        "reasoning": "The solver found these constraints to be the minimal set conflicting with the rest of the problem.",
+        "expected_impact": None
+    }
+    if explain_relaxations_with_llm:
+        model = ChatOpenAI(temperature=0)
+
+        prompt = f"""The following constraints of an optimization problem were found by the solver to be the minimal set that must be relaxed for a schedule to exist.
+
+Constraints to relax: {constraints_to_relax}
+
+Current active constraints: {state['constraints']}
+
+Previously attempted relaxations:
+{chr(10).join(history) if history else "No previous attempts"}
+
+Available constraints: {available_constraints}
+
+Return your response as a dictionary:
+{{
+    'reasoning': 'explanation',   # Why these constraints conflict with the rest of the problem
+    'expected_impact': 'impact'   # Expected effect on training quality
+}}
+"""
+
+        # The relaxation is already decided, so a reply that can't be read only loses the explanation.
+        try:
+            response = model.invoke(prompt)
+            llm_explanation = ast.literal_eval(response.content)
+            explanation.update({key: llm_explanation[key] for key in explanation if key in llm_explanation})
+        except Exception as e:
+            LogSolver.verbose(f"Could not read the explanation of the relaxation: {e}")
+
+    # Store the solver's analysis
+    state["logs"] += "\nSolver Analysis:\n"
+    state["logs"] += f"Relaxations: {constraints_to_relax}\n"
+    state["logs"] += f"Reasoning: {explanation['reasoning']}\n"
+    state["logs"] += f"Expected Impact: {explanation['expected_impact']}\n"
+
+    # Apply relaxations on top of those already made
+    for constraint in constraints_to_relax:
+        state["constraints"][constraint] = False
+
+    # Update current attempt info
+    state["current_attempt"] = {
+        "constraints": state["current_attempt"]["constraints"] | set(constraints_to_relax),
+        "reasoning": explanation['reasoning'],
+        "expected_impact": explanation['expected_impact']
+    }
+
+    return state
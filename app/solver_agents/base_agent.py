@@ -1,9 +1,19 @@
-from config import SchedulerLoggingConfig
+from config import SchedulerLoggingConfig, AdaptiveTimeBudgetConfig, ortools_solver_time_in_seconds, ortools_solver_portfolio_time_in_seconds, ortools_solver_portfolio_improvement_time_in_seconds
 from logging_config import LogSolver
 from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextvars import copy_context
+from threading import Event
+from ortools.sat.python import cp_model
 from typing_extensions import TypedDict, TypeVar
 from langgraph.graph import StateGraph, START, END
-from .agent_helpers import retrieve_relaxation_history, analyze_infeasibility
+from .solver_farm import search_workers
+from .time_budget import solver_time_budget
+from .solver_progress import SolutionProgressCallback, progress_publisher
+from .solver_telemetry import record_solver_run
+from .flight_recorder import record_flight
+from .model_tags import TaggedCpModel
+from .agent_helpers import retrieve_relaxation_history, analyze_infeasibility, explain_relaxation
 
 from datetime import datetime
 from typing import Set, Optional
@@ -31,6 +41,7 @@ class BaseAgentState(TypedDict):
     logs: str
     relaxation_attempts: list
     current_attempt: dict
+    constraint_switches: any
 
 # Create a generic type variable that must be a subclass of BaseAgentState
 TState = TypeVar('TState', bound=BaseAgentState)
@@ -42,6 +53,9 @@ class BaseAgent:
     # Each child class should override this with their specific constraints
     available_constraints = ""
 
+    # Whether the objective weights a secondary goal under a primary one, in which case the solver is given no gap limit.
+    lexicographic_objective = False
+
     def __init__(self):
         self.initial_state = {
             "parameters": {},
@@ -52,7 +66,8 @@ class BaseAgent:
             "output": "",
             "logs": "",
             "relaxation_attempts": [],
-            "current_attempt": {"constraints": set(), "reasoning": None, "expected_impact": None}
+            "current_attempt": {"constraints": set(), "reasoning": None, "expected_impact": None},
+            "constraint_switches": None
         }
 
     def _format_duration(self, seconds: int) -> str:
@@ -84,24 +99,158 @@ class BaseAgent:
     def analyze_infeasibility_node(self, state: TState, config=None) -> dict:
         LogSolver.agent_steps(f"{self.schedule_title}: Analyzing Feasibility")
 
-        """Use LLM to analyze solver logs and suggest constraints to relax."""
+        """Find the constraints to relax with solver assumptions, falling back to the LLM if the search is inconclusive."""
         # Prepare history of what's been tried
         history = retrieve_relaxation_history(state["relaxation_attempts"])
-        state = analyze_infeasibility(state, history, self.available_constraints)
+
+        constraints_to_relax = None
+        constraint_switches = state.get("constraint_switches")
+        if constraint_switches:
+            constraints_to_relax = constraint_switches.find_minimal_relaxation(list(state["constraints"]))
+
+        if constraints_to_relax:
+            state = explain_relaxation(state, history, constraints_to_relax, self.available_constraints)
+        else:
+            state = analyze_infeasibility(state, history, self.available_constraints)
+
+        # Flip the switches of the model already built if the relaxation allows for it.
+        if constraint_switches and constraint_switches.can_apply(state["constraints"]):
+            # The model isn't built again, so the families switched off are logged here in place of the build log.
+            for name, active in state["constraints"].items():
+                if name in constraint_switches.families and constraint_switches.constraints.get(name, True) and not active:
+                    state["logs"] += f"- {name} relaxed.\n"
+            constraint_switches.apply(state["constraints"])
 
         return {
             "constraints": state["constraints"],
-            "current_attempt": state["current_attempt"]
+            "current_attempt": state["current_attempt"],
+            "logs": state["logs"]
         }
 
-    def _solve_and_time_solver(self, solver, model):
+    # The index of the model within the built model, 0 being the main model and higher indices the fallback models.
+    def _model_index(self, model, state):
+        return next((i for i, item in enumerate(state["opt_model"]) if item is model), 0)
+
+    # Publish an improving solution found by the solver, formatted the same way as the final schedule.
+    def _publish_solution(self, callback, model, state, publisher):
+        solution = self.extract_solution(callback, state, cp_model.FEASIBLE, self._model_index(model, state))
+        agent_output_args = self.get_model_formatting_parameters(state["parameters"])
+        final_output, formatted = self.format_agent_output(solution, "", solution["schedule"], *agent_output_args)
+        publisher({
+            "agent": self.schedule_title,
+            "objective": callback.ObjectiveValue(),
+            "bound": callback.BestObjectiveBound(),
+            "elapsed": callback.WallTime(),
+            "formatted": formatted,
+            "output": final_output
+        })
+        return None
+
+    # Solve the model, timing it and recording the solve for later time budgets, the solver runs table and the flight recorder.
+    # If the state is given and someone is listening, each improving solution is published while the search continues.
+    # The statistics of the solve are appended to the solver runs given, if any, and the event given is set once a first solution is found.
+    # The stop event is set by whoever stops the search early, so that the solve isn't planned from as if it had converged.
+    def _solve_and_time_solver(self, solver, model, state=None, publish_progress=True, solver_runs=None, first_solution_event=None, stop_event=None):
+        on_solution = None
+        publisher = progress_publisher() if state is not None and publish_progress else None
+        if publisher is not None:
+            on_solution = lambda callback: self._publish_solution(callback, model, state, publisher)
+        progress_callback = SolutionProgressCallback(on_solution, first_solution_event=first_solution_event)
+
+        # Show which constraint families and helpers the model was built from.
+        if isinstance(model, TaggedCpModel):
+            LogSolver.verbose(f"{type(self).__name__}: {model.tag_report()}")
+
         start_time = perf_counter()
-        status = solver.Solve(model)
+        status = solver.Solve(model, progress_callback)
         end_time = perf_counter()
         solver_duration = end_time - start_time
         LogSolver.agent_time(f"Time taken to solve the model: {int(solver_duration // 60)} minutes {round((solver_duration % 60), 3)} seconds")
+
+        # Remember how long the model took so later budgets can be planned from it.
+        stopped_early = stop_event is not None and stop_event.is_set()
+        solver_time_budget.record(type(self).__name__, model, solver, status, progress_callback.first_solution_time, stopped_early=stopped_early)
+        solver_run = record_solver_run(
+            type(self).__name__, model, solver, status, 
+            relaxation_attempt=len(state["relaxation_attempts"]) + 1 if state is not None else None, 
+            model_index=self._model_index(model, state) if state is not None else None)
+        if solver_runs is not None:
+            solver_runs.append(solver_run)
+        record_flight(type(self).__name__, model, solver, status)
         return status
 
+    # Set the time and gap allowed for the model, planned from previous solves of this agent.
+    # The planned time is capped at the longest budget allowed, which callers with a longer deadline of their own may raise.
+    def _apply_time_budget(self, solver, model, default_time=ortools_solver_time_in_seconds, max_time=AdaptiveTimeBudgetConfig.max_time_in_seconds):
+        max_time, relative_gap_limit = solver_time_budget.plan(type(self).__name__, model, default_time, allow_gap=not self.lexicographic_objective, max_time=max_time)
+        solver.parameters.max_time_in_seconds = max_time
+        solver.parameters.relative_gap_limit = relative_gap_limit
+        return max_time
+
+    # Races the models against each other under one shared deadline, each on its own solver.
+    # The race ends as soon as a model is solved to optimality (or within the gap limit).
+    # Once any model has a solution, the others are only given a short while to improve on it.
+    # The models are expected to share their variables (e.g. one is a clone of the other), so any winning solver can read the values.
+    # Their constraints and objectives may differ, so neither their infeasibility nor their objective values are compared.
+    # Returns the status, the solver, and the index of the model that won.
+    def _solve_portfolio(self, models, max_time=ortools_solver_portfolio_time_in_seconds, num_search_workers=24, state=None, publish_progress=True):
+        solvers = []
+        for _ in models:
+            solver = cp_model.CpSolver()
+            solver.parameters.num_search_workers = max(1, search_workers(num_search_workers) // len(models))
+            solvers.append(solver)
+
+        # Each model is planned on its own, within the deadline of the race rather than the usual cap of a single solve.
+        max_time = max(self._apply_time_budget(solver, model, max_time, max_time=max_time) for solver, model in zip(solvers, models))
+        LogSolver.verbose(f"Solving {len(models)} models in parallel for at most {self._time_string(max_time)}.")
+
+        statuses = [cp_model.UNKNOWN] * len(models)
+        solver_runs = [[] for _ in models]
+        first_solution = Event()
+        stopped = Event()
+        stop_time = None
+        with ThreadPoolExecutor(max_workers=len(models)) as executor:
+            futures = {
+                executor.submit(copy_context().run, self._solve_and_time_solver, solver, model, state, publish_progress, solver_runs[i], first_solution, stopped): i
+                for i, (solver, model) in enumerate(zip(solvers, models))}
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures[future]
+                    statuses[i] = future.result()
+
+                    # An optimal solution ends the race. The models differ in their constraints, so infeasibility of one does not.
+                    if statuses[i] == cp_model.OPTIMAL:
+                        stop_time = perf_counter()
+
+                # The first solution of any model starts the countdown to the end of the race.
+                if stop_time is None and first_solution.is_set():
+                    stop_time = perf_counter() + ortools_solver_portfolio_improvement_time_in_seconds
+                    LogSolver.verbose(f"A first solution was found, so the race ends within {self._time_string(ortools_solver_portfolio_improvement_time_in_seconds)}.")
+                if stop_time is not None and perf_counter() >= stop_time:
+                    stopped.set()
+                    for solver in solvers:
+                        solver.StopSearch()
+
+        # Prefer a proven optimum, then the first model in the list with a solution, then a proof of infeasibility.
+        # The objectives of the models are on different scales, so the feasible models are taken in the order given.
+        winner = next((i for i, status in enumerate(statuses) if status == cp_model.OPTIMAL), None)
+        if winner is None:
+            winner = next((i for i, status in enumerate(statuses) if status == cp_model.FEASIBLE), None)
+        if winner is None:
+            winner = next((i for i, status in enumerate(statuses) if status == cp_model.INFEASIBLE), None)
+        if winner is not None:
+            LogSolver.verbose(f"Model {winner + 1} of {len(models)} finished the race with status {solvers[winner].StatusName(statuses[winner])}.")
+        winner = winner or 0
+
+        # Only the solve whose solution is used counts as the winning model in the solver runs.
+        for i, model_runs in enumerate(solver_runs):
+            for solver_run in model_runs:
+                solver_run["winning_model"] = i == winner
+        return statuses[winner], solvers[winner], winner
+
     # Retrieve formatted string for time.
     def _time_string(self, time_in_seconds):
         time_minutes = int(time_in_seconds // 60)
@@ -112,7 +261,7 @@ class BaseAgent:
             time_minutes_string += " "
         return f"{time_minutes_string}{time_seconds_string}"
 
-    def _new_max_time_solve_and_time_solver(self, solver, model, new_max_time=None, message_end=None):
+    def _new_max_time_solve_and_time_solver(self, solver, model, new_max_time=None, message_end=None, state=None, publish_progress=True):
         new_searcher_message = f"Solver took longer than {self._time_string(solver.parameters.max_time_in_seconds)}."
         if new_max_time:
             new_searcher_message += f" Extending max time allowed to {self._time_string(new_max_time)}."
@@ -120,7 +269,7 @@ class BaseAgent:
         if message_end:
             new_searcher_message += (" " + message_end)
         LogSolver.verbose(new_searcher_message)
-        return self._solve_and_time_solver(solver, model)
+        return self._solve_and_time_solver(solver, model, state, publish_progress)
 
     def format_relaxation_attempts(self, relaxation_attempts, formatted, *args):
         """Format the relaxation attempts history."""
@@ -201,7 +350,15 @@ class BaseAgent:
             }
         )
 
-        builder.add_edge("analyze", "build")
+        # Relaxations that only flip switches are solved without rebuilding the model.
+        builder.add_conditional_edges(
+            "analyze",
+            self.relaxation_router,
+            {
+                "solve": "solve",
+                "build": "build"
+            }
+        )
         builder.add_edge("format", END)
 
         return builder.compile(checkpointer=False)
@@ -211,6 +368,12 @@ class BaseAgent:
             return "analyze"
         return "format"
 
+    def relaxation_router(self, state: TState, config=None):
+        constraint_switches = state.get("constraint_switches")
+        if constraint_switches and constraint_switches.can_apply(state["constraints"]):
+            return constraint_switches.solve_node
+        return "build"
+
     def run(self, parameter_input=None):
         # This will be overridden by child classes to provide their specific state class
         raise NotImplementedError("Child classes must implement run()")
\ No newline at end of file
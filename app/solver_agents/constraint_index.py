@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+# The variable of a reference, as negated literals refer to their variable as -index - 1.
+def variable_of_reference(reference):
+    return reference if reference >= 0 else -reference - 1
+
+def _expression_variables(expression):
+    return expression.vars
+
+def _expressions_variables(expressions):
+    return [variable for expression in expressions for variable in expression.vars]
+
+# The variables referenced by the interval constraints given by their index.
+def _interval_variables(model_proto, interval_indices):
+    variables = []
+    for interval_index in interval_indices:
+        interval_constraint = model_proto.constraints[interval_index]
+        variables.extend(interval_constraint.enforcement_literal)
+        interval = interval_constraint.interval
+        variables.extend(_expressions_variables((interval.start, interval.end, interval.size)))
+    return variables
+
+# The references made by each kind of constraint, given the constraint and the model it belongs to.
+# The maximum and minimum of expressions are both lin_max (the minimum negates the expressions), at least one is bool_or and diffn is no_overlap_2d.
+_constraint_references = {
+    "bool_or": lambda c, m: c.bool_or.literals,
+    "bool_and": lambda c, m: c.bool_and.literals,
+    "at_most_one": lambda c, m: c.at_most_one.literals,
+    "exactly_one": lambda c, m: c.exactly_one.literals,
+    "bool_xor": lambda c, m: c.bool_xor.literals,
+    "int_div": lambda c, m: [*_expression_variables(c.int_div.target), *_expressions_variables(c.int_div.exprs)],
+    "int_mod": lambda c, m: [*_expression_variables(c.int_mod.target), *_expressions_variables(c.int_mod.exprs)],
+    "int_prod": lambda c, m: [*_expression_variables(c.int_prod.target), *_expressions_variables(c.int_prod.exprs)],
+    "lin_max": lambda c, m: [*_expression_variables(c.lin_max.target), *_expressions_variables(c.lin_max.exprs)],
+    "linear": lambda c, m: c.linear.vars,
+    "all_diff": lambda c, m: _expressions_variables(c.all_diff.exprs),
+    "element": lambda c, m: [c.element.index, c.element.target, *c.element.vars],
+    "circuit": lambda c, m: c.circuit.literals,
+    "routes": lambda c, m: c.routes.literals,
+    "table": lambda c, m: c.table.vars,
+    "automaton": lambda c, m: c.automaton.vars,
+    "inverse": lambda c, m: [*c.inverse.f_direct, *c.inverse.f_inverse],
+    "reservoir": lambda c, m: [
+        *_expressions_variables(c.reservoir.time_exprs),
+        *_expressions_variables(c.reservoir.level_changes),
+        *c.reservoir.active_literals],
+    "interval": lambda c, m: _expressions_variables((c.interval.start, c.interval.end, c.interval.size)),
+    "no_overlap": lambda c, m: _interval_variables(m, c.no_overlap.intervals),
+    "no_overlap_2d": lambda c, m: _interval_variables(m, [*c.no_overlap_2d.x_intervals, *c.no_overlap_2d.y_intervals]),
+    "cumulative": lambda c, m: [
+        *_expression_variables(c.cumulative.capacity),
+        *_expressions_variables(c.cumulative.demands),
+        *_interval_variables(m, c.cumulative.intervals)],
+    "dummy_constraint": lambda c, m: c.dummy_constraint.vars,
+}
+
+# The variables a constraint refers to, including its enforcement literals.
+def constraint_variables(model_proto, constraint_proto):
+    kind = constraint_proto.WhichOneof("constraint")
+    references = [*constraint_proto.enforcement_literal]
+    if kind is not None:
+        references.extend(_constraint_references[kind](constraint_proto, model_proto))
+    return sorted({variable_of_reference(reference) for reference in references})
+
+class ConstraintIndex:
+    """The constraints on each variable of a model and the variables of each constraint, built in a single pass over the model."""
+    def __init__(self, model):
+        self.model_proto = model.Proto() if hasattr(model, "Proto") else model
+        self.variables_by_constraint = []
+        self.constraints_by_variable = defaultdict(list)
+        for constraint_index, constraint_proto in enumerate(self.model_proto.constraints):
+            variables = constraint_variables(self.model_proto, constraint_proto)
+            self.variables_by_constraint.append(variables)
+            for variable in variables:
+                self.constraints_by_variable[variable].append(constraint_index)
+
+    # Variables may be given as model variables, literals or their index.
+    def _variable_index(self, variable):
+        if hasattr(variable, "Index"):
+            variable = variable.Index()
+        return variable_of_reference(variable)
+
+    def variable_name(self, variable):
+        return self.model_proto.variables[self._variable_index(variable)].name
+
+    # The indices of the constraints on the variable.
+    def constraints_on(self, variable):
+        return self.constraints_by_variable.get(self._variable_index(variable), [])
+
+    # The indices of the constraints on any of the variables.
+    def constraints_on_any(self, variables):
+        return sorted({constraint_index for variable in variables for constraint_index in self.constraints_on(variable)})
+
+    # The constraint protos on the variable.
+    def constraint_protos_on(self, variable):
+        return [self.model_proto.constraints[constraint_index] for constraint_index in self.constraints_on(variable)]
+
+    # The indices of the variables of the constraint.
+    def variables_of(self, constraint_index):
+        return self.variables_by_constraint[constraint_index]
+
+    # The variables sharing a constraint with the variable.
+    def neighbours(self, variable):
+        variable_index = self._variable_index(variable)
+        return sorted({
+            neighbour
+            for constraint_index in self.constraints_on(variable_index)
+            for neighbour in self.variables_by_constraint[constraint_index]
+            if neighbour != variable_index})
+
+    # The variables constrained by each of the groups of constraints, where the groups meet.
+    def shared_variables(self, constraint_groups, excluded=()):
+        excluded = {self._variable_index(variable) for variable in excluded}
+        shared = None
+        for constraint_indices in constraint_groups:
+            group_variables = {
+                variable
+                for constraint_index in constraint_indices
+                for variable in self.variables_by_constraint[constraint_index]}
+            shared = group_variables if shared is None else shared & group_variables
+        return sorted((shared or set()) - excluded)
@@ -0,0 +1,183 @@
+from config import ortools_solver_time_in_seconds
+from logging_config import LogSolver
+import logging
+from contextlib import contextmanager
+from ortools.sat.python import cp_model
+from .solver_farm import search_workers
+from .model_tags import TaggedCpModel
+from .constraint_index import ConstraintIndex
+
+# The kinds of constraints that CP-SAT allows to be enforced by a literal that isn't fixed.
+enforceable_constraint_kinds = {"linear", "bool_or", "bool_and", "table", "interval"}
+
+class ConstraintSwitches:
+    """Enforcement literals guarding each constraint family of a model, allowing the families to be switched or passed to the solver as assumptions."""
+    def __init__(self, model, solve_node="solve"):
+        self.model = model
+        self.models = [model]
+        self.literals = {}
+        self.families = set()
+        self.constraints = {}
+
+        # Families the model was built around (such as domains narrowed by them), which cannot be switched without a rebuild.
+        self.rebuild_families = set()
+
+        # Built from the model on the first relaxation that needs it, as the model is complete by then.
+        self.constraint_index = None
+
+        # The node that solves the model, returned to after a relaxation that only flips switches.
+        self.solve_node = solve_node
+
+    # Every constraint added to the model within the block is only enforced if the literal for the family is true.
+    # Only constraints that CP-SAT can enforce with a literal may be added, as the literal is freed when searching for a relaxation.
+    @contextmanager
+    def guard(self, name):
+        self.families.add(name)
+        start = len(self.model.Proto().constraints)
+        if isinstance(self.model, TaggedCpModel):
+            with self.model.tagged(family=name):
+                yield
+        else:
+            yield
+        end = len(self.model.Proto().constraints)
+
+        # Families that add no constraints (e.g. objectives) cannot cause infeasibility, so they are not given a literal.
+        if start == end:
+            return
+        if name not in self.literals:
+            self.literals[name] = self.model.NewBoolVar(f"constraint_family_{name}_is_enforced")
+            self.set_switch(self.model, name, True)
+        literal_index = self.literals[name].Index()
+
+        model_proto = self.model.Proto()
+        for i in range(start, end):
+            kind = model_proto.constraints[i].WhichOneof("constraint")
+            if kind not in enforceable_constraint_kinds:
+                raise ValueError(f"The '{name}' constraint family adds a {kind} constraint, which cannot be enforced by a literal. Add it outside of the guard.")
+            model_proto.constraints[i].enforcement_literal.append(literal_index)
+
+    # Fix the value of the literal for a family within the model (or a clone of it).
+    def set_switch(self, model, name, value):
+        domain = model.Proto().variables[self.literals[name].Index()].domain
+        domain[0] = domain[1] = int(value)
+
+    # Free the literal for a family within the model (or a clone of it), allowing the solver to choose whether it is enforced.
+    def free_switch(self, model, name):
+        domain = model.Proto().variables[self.literals[name].Index()].domain
+        domain[0], domain[1] = 0, 1
+
+    # Clone the model, keeping the switches of the clone in line with those of the model.
+    def clone_model(self):
+        model_clone = self.model.clone()
+        self.models.append(model_clone)
+        return model_clone
+
+    # Mark a family the model was built around, so that changing it rebuilds the model rather than flipping its switch.
+    def build_depends_on(self, name):
+        self.rebuild_families.add(name)
+
+    # Whether the constraints only differ from the current switches by families that were built into the model.
+    def can_apply(self, constraints):
+        return all(
+            name in self.families and name not in self.rebuild_families
+            for name, active in constraints.items()
+            if self.constraints.get(name) != active)
+
+    # Set the switches of every family in each model to whether the family is active.
+    def apply(self, constraints):
+        for name in self.literals:
+            for model in self.models:
+                self.set_switch(model, name, constraints[name])
+        self.constraints = dict(constraints)
+
+    # The families that are currently switched on and may be switched off within the model.
+    def _enabled_families(self):
+        return [name for name in self.literals if self.constraints.get(name, True) and name not in self.rebuild_families]
+
+    def _solve_with_assumptions(self, model, names, max_time):
+        model.ClearAssumptions()
+        model.AddAssumptions([self.literals[name] for name in names])
+
+        solver = cp_model.CpSolver()
+        solver.parameters.num_search_workers = search_workers(8)
+        solver.parameters.max_time_in_seconds = max_time
+        status = solver.Solve(model)
+
+        core = []
+        if status == cp_model.INFEASIBLE:
+            core_indices = set(solver.SufficientAssumptionsForInfeasibility())
+            core = [name for name in names if self.literals[name].Index() in core_indices]
+        return status, core
+
+    # Remove each family from the core that is not needed for the core to remain infeasible.
+    def _shrink_core(self, model, core, max_time):
+        for name in list(core):
+            if len(core) == 1:
+                break
+            trial_core = [core_name for core_name in core if core_name != name]
+            status, _ = self._solve_with_assumptions(model, trial_core, max_time)
+            if status == cp_model.INFEASIBLE:
+                core = trial_core
+        return core
+
+    # Re-enable any relaxed family, starting with those declared first, that the model remains feasible without relaxing.
+    def _restore_unneeded_relaxations(self, model, relaxed, constraint_order, max_time):
+        for name in sorted(relaxed, key=constraint_order.index):
+            trial_relaxed = [relaxed_name for relaxed_name in relaxed if relaxed_name != name]
+            active_names = [active_name for active_name in self._enabled_families() if active_name not in trial_relaxed]
+            status, _ = self._solve_with_assumptions(model, active_names, max_time)
+            if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                relaxed = trial_relaxed
+        return relaxed
+
+    # The variables that every family of the core constrains, where the families conflict.
+    def _conflicting_variables(self, core, limit=10):
+        if self.constraint_index is None:
+            self.constraint_index = ConstraintIndex(self.model)
+        family_constraints = [self.constraint_index.constraints_on(self.literals[name]) for name in core]
+        shared = self.constraint_index.shared_variables(family_constraints, excluded=self.literals.values())
+        return [self.constraint_index.variable_name(variable) for variable in shared[:limit]], len(shared)
+
+    def _log_conflicting_variables(self, core):
+        if len(core) < 2:
+            return None
+        names, count = self._conflicting_variables(core)
+        if names:
+            LogSolver.verbose(f"Variables constrained by all of {core} ({count}): {', '.join(names)}{', ...' if count > len(names) else ''}")
+        return None
+
+    # Finds a minimal set of constraint families that must be relaxed for the model to become feasible.
+    # Families are relaxed one minimal infeasible core at a time, choosing the family declared last in the constraint order.
+    # Returns None if the search was inconclusive within the time allowed.
+    def find_minimal_relaxation(self, constraint_order, max_time=ortools_solver_time_in_seconds):
+        model = self.model.clone()
+        model.ClearObjective()
+
+        # Families that are already switched off remain so.
+        for name in self._enabled_families():
+            self.free_switch(model, name)
+
+        relaxed = []
+        while True:
+            active_names = [name for name in self._enabled_families() if name not in relaxed]
+            status, core = self._solve_with_assumptions(model, active_names, max_time)
+
+            if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                relaxed = self._restore_unneeded_relaxations(model, relaxed, constraint_order, max_time)
+                LogSolver.verbose(f"Relaxing {relaxed} makes the model feasible.")
+                return relaxed
+
+            # The model should never be invalid, as only enforceable constraints are guarded.
+            if status == cp_model.MODEL_INVALID:
+                LogSolver.verbose(f"The model used to find the constraints to relax is invalid: {model.Validate()}", level=logging.ERROR)
+                return None
+
+            # Either the solver ran out of time or the model is infeasible regardless of the constraint families.
+            if status != cp_model.INFEASIBLE or not core:
+                LogSolver.verbose(f"Unable to determine the constraints to relax (solver status {cp_model.CpSolver().StatusName(status)}).")
+                return None
+
+            core = self._shrink_core(model, core, max_time)
+            LogSolver.verbose(f"Minimal conflicting constraints found: {core}")
+            self._log_conflicting_variables(core)
+            relaxed.append(max(core, key=constraint_order.index))
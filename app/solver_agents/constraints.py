@@ -1,5 +1,8 @@
+from ortools.sat.python import cp_model
+from app.solver_agents.model_tags import model_helper
 
 # Integer variable representing the metric for the phase component chosen at exercise i.
+@model_helper
 def intvar_list_from_phase_components(model, ids, phase_components, name_of_metric, min_key, max_key):
     return [
         model.NewIntVar(phase_components[pc_index][min_key], 
@@ -8,6 +11,7 @@ def intvar_list_from_phase_components(model, ids, phase_components, name_of_metr
         for i, pc_index in enumerate(ids)]
 
 # Integer variable representing the metric chosen at element i.
+@model_helper
 def intvar_list_from_elements(model, number_of_elements, name_of_metric, min_value, max_value):
     return [
         model.NewIntVar(min_value, 
@@ -15,8 +19,27 @@ def intvar_list_from_elements(model, number_of_elements, name_of_metric, min_val
                         f'{name_of_metric}_{i}') 
         for i in range(number_of_elements)]
 
+# Integer variable representing the metric chosen at element i, within the bounds of element i.
+@model_helper
+def intvar_list_from_bounds(model, element_bounds, name_of_metric):
+    return [
+        model.NewIntVar(bounds["min"], 
+                        bounds["max"], 
+                        f'{name_of_metric}_{i}') 
+        for i, bounds in enumerate(element_bounds)]
+
+# Integer variable representing the item chosen at element i, restricted to the values allowed for element i.
+@model_helper
+def intvar_list_from_values(model, element_values, name_of_metric):
+    return [
+        model.NewIntVarFromDomain(cp_model.Domain.FromValues(values), f'{name_of_metric}_{i}')
+        for i, values in enumerate(element_values)]
+
 # Links each entry and item with the "used" variables, determining if item j is the item at entry i.
-def link_entry_and_item(model, items, entry_vars, number_of_entries, used_vars):
+@model_helper
+def link_entry_and_item(model, items, entry_vars, number_of_entries, used_vars, compact=False):
+    if compact:
+        return _link_entry_and_item_compact(model, items, entry_vars, number_of_entries, used_vars)
     for i in range(number_of_entries):
         for j in range(len(items)):
             # Ensures that if an item is chosen (used_vars[i][j] is True), then:
@@ -28,6 +51,7 @@ def link_entry_and_item(model, items, entry_vars, number_of_entries, used_vars):
 # Sets the constraints for an optional integer variable
 # Set the value to be 0 when inactive. 
 # Give the variable a min and a max when active.
+@model_helper
 def constrain_active_entry(model, entry, activator, min_if_active=0, max_if_active=1, value_if_inactive=0):
     # Enforce entry = 0 if the activator is off.
     model.Add(entry == value_if_inactive).OnlyEnforceIf(activator.Not())
@@ -39,6 +63,7 @@ def constrain_active_entry(model, entry, activator, min_if_active=0, max_if_acti
     return None
 
 # Method for the creation of what is essentially an optional variable. 
+@model_helper
 def create_optional_intvar(model, name_of_entry_var, activator, min_if_active=0, max_if_active=1, value_if_inactive=0):
     var_entry = model.NewIntVar(value_if_inactive, max_if_active, name_of_entry_var)
     model = constrain_active_entry(
@@ -48,6 +73,7 @@ def create_optional_intvar(model, name_of_entry_var, activator, min_if_active=0,
     return var_entry
 
 # Method for creating a list of model variables.
+@model_helper
 def declare_model_vars(model, name, active_vars, max_entries, min_if_active, max_if_active):
     return [
         create_optional_intvar(
@@ -58,6 +84,7 @@ def declare_model_vars(model, name, active_vars, max_entries, min_if_active, max
         for i in range(max_entries)]
 
 # Create an intvar for an optional spread variable to try for later minimization.
+@model_helper
 def create_spread_intvar(model, entry_vars, entry_var_name, active_entry_vars, max_value_allowed):
     min_entry_var = model.NewIntVar(0, max_value_allowed, f"min_{entry_var_name}")
     max_entry_var = model.NewIntVar(0, max_value_allowed, f"max_{entry_var_name}")
@@ -76,6 +103,7 @@ def create_spread_intvar(model, entry_vars, entry_var_name, active_entry_vars, m
 
 # Define and create a list of variables to determine if an entry is active.
 # As well, this will constrain the possible items that an inactive entry can have to be an invalid one.
+@model_helper
 def constrain_active_entries_vars(model, entry_vars, number_of_entries, duration_vars, active_entry_vars):
     # Ensure that deactivation is done from the back to the front.
     for i in range(number_of_entries - 1):
@@ -96,6 +124,7 @@ def constrain_active_entries_vars(model, entry_vars, number_of_entries, duration
 
 # Sets the variable to be equal to a value. 
 # Only applied when the given condition(s) is true, if applicable.
+@model_helper
 def entry_equals(model, agent_var, item_value, condition=None):
     """Generic function to add equals constraints with optional condition."""
     if item_value is not None:
@@ -104,7 +133,10 @@ def entry_equals(model, agent_var, item_value, condition=None):
             constraint.OnlyEnforceIf(condition)
 
 # Constraint: The duration of a item may only be the value allowed.
-def entries_equal(model, items, key, number_of_entries, used_vars, duration_vars):
+@model_helper
+def entries_equal(model, items, key, number_of_entries, used_vars, duration_vars, compact=False):
+    if compact:
+        return _entries_equal_compact(model, items, key, number_of_entries, used_vars, duration_vars)
     for i in range(number_of_entries):
         for j, item in enumerate(items):
             item_value = item.get(key)
@@ -117,6 +149,7 @@ def entries_equal(model, items, key, number_of_entries, used_vars, duration_vars
 
 # Sets the variable to be within the range allowed. 
 # Only applied when the given condition(s) is true, if applicable.
+@model_helper
 def entry_within_min_max(model, agent_var, min_val=None, max_val=None, condition=None):
     """Generic function to add min/max constraints with optional condition."""
     if min_val is not None:
@@ -129,7 +162,10 @@ def entry_within_min_max(model, agent_var, min_val=None, max_val=None, condition
             constraint.OnlyEnforceIf(condition)
 
 # Constraint: The duration of a item may only be a value between the minimum and maximum values allowed.
-def entries_within_min_max(model, items, minimum_key, maximum_key, number_of_entries, used_vars, duration_vars):
+@model_helper
+def entries_within_min_max(model, items, minimum_key, maximum_key, number_of_entries, used_vars, duration_vars, compact=False):
+    if compact:
+        return _entries_within_min_max_compact(model, items, minimum_key, maximum_key, number_of_entries, used_vars, duration_vars)
     for i in range(number_of_entries):
         for j, item in enumerate(items):
             minimum_value = item.get(minimum_key)
@@ -142,6 +178,46 @@ def entries_within_min_max(model, items, minimum_key, maximum_key, number_of_ent
             )
     return None
 
+# Compact formulation ======================================
+# Rather than one reified constraint for every entry and item, each entry receives a single constraint for each property.
+# These rely on exactly one of the "used" variables of an entry being true, which the compact link guarantees.
+
+# Links each entry and item with the "used" variables, where the entry is the index of the only item used.
+def _link_entry_and_item_compact(model, items, entry_vars, number_of_entries, used_vars):
+    for i in range(number_of_entries):
+        model.AddExactlyOne(used_vars[i])
+        model.Add(entry_vars[i] == sum(j * used_vars[i][j] for j in range(len(items))))
+    return None
+
+# The value of the item used at entry i, expressed as a sum over the "used" variables.
+# Items without a value are returned separately, as the constraint must not be enforced when one of them is used.
+def _value_of_used_item(items, key, used_vars_i):
+    value_of_item = 0
+    items_without_value = []
+    for item, used_var in zip(items, used_vars_i):
+        item_value = item.get(key)
+        if item_value is None:
+            items_without_value.append(used_var.Not())
+        else:
+            value_of_item += item_value * used_var
+    return value_of_item, items_without_value
+
+# Constraint: The duration of a item may only be the value allowed, with one constraint per entry.
+def _entries_equal_compact(model, items, key, number_of_entries, used_vars, duration_vars):
+    for i in range(number_of_entries):
+        item_value, items_without_value = _value_of_used_item(items, key, used_vars[i])
+        model.Add(duration_vars[i] == item_value).OnlyEnforceIf(items_without_value)
+    return None
+
+# Constraint: The duration of a item may only be a value between the minimum and maximum values allowed, with two constraints per entry.
+def _entries_within_min_max_compact(model, items, minimum_key, maximum_key, number_of_entries, used_vars, duration_vars):
+    for i in range(number_of_entries):
+        minimum_value, items_without_minimum = _value_of_used_item(items, minimum_key, used_vars[i])
+        maximum_value, items_without_maximum = _value_of_used_item(items, maximum_key, used_vars[i])
+        model.Add(duration_vars[i] >= minimum_value).OnlyEnforceIf(items_without_minimum)
+        model.Add(duration_vars[i] <= maximum_value).OnlyEnforceIf(items_without_maximum)
+    return None
+
 # Forces all items in the list to be equal without a condition.
 def _ensure_all_vars_equal_no_activator(model, agent_vars):
     for agent_var, var_next in zip(agent_vars, agent_vars[1:]):
@@ -155,6 +231,7 @@ def _ensure_all_vars_equal_with_activator(model, agent_vars, active_vars):
     return None
 
 # Forces all items in the list to be equal. 
+@model_helper
 def ensure_all_vars_equal(model, agent_vars, active_vars=None):
     if len(agent_vars) > 1:
         if active_vars == None:
@@ -164,6 +241,7 @@ def ensure_all_vars_equal(model, agent_vars, active_vars=None):
     return None
 
 # Constraint: # Force number of occurrences of a phase component within in a microcycle to be within number allowed.
+@model_helper
 def frequency_within_min_max(model, phase_components, active_phase_components, minimum_key, maximum_key):
     # Boolean variables indicating whether the phase component has been used at least once in the microcycle
     used_phase_components = [
@@ -194,6 +272,7 @@ def frequency_within_min_max(model, phase_components, active_phase_components, m
     return None
 
 # Constraint: The number of exercises may only be a number of exercises between the minimum and maximum exercises per bodypart allowed.
+@model_helper
 def exercises_per_bodypart_within_min_max(model, required_items, items, minimum_key, maximum_key, used_vars):
     for item_index in required_items:
         exercises_of_phase = [row[item_index] for row in used_vars]
@@ -210,6 +289,7 @@ def exercises_per_bodypart_within_min_max(model, required_items, items, minimum_
     return None
 
 # Adds constraint ensuring that, at least once within an 'n' frame window, the desired item must be at an entry.
+@model_helper
 def no_n_items_without_desired_item(model, allowed_n, desired_item_index, entry_vars, number_of_entries, active_entry_vars=None):
     # The following is a sliding window of allowed_n items that ensures that at least one will be stabilization endurance.
     for i in range(number_of_entries - (allowed_n - 1)):  # Ensure we have a window of allowed_n
@@ -236,6 +316,7 @@ def no_n_items_without_desired_item(model, allowed_n, desired_item_index, entry_
     return None
 
 # For each entry, add a constraint stating that it can't be the same item as the next entry.
+@model_helper
 def no_consecutive_identical_items(model, entry_vars, active_entry_vars=None):
     """Prevents consecutive identical items in active entries."""
     for i in range(len(entry_vars) - 1):
@@ -245,6 +326,7 @@ def no_consecutive_identical_items(model, entry_vars, active_entry_vars=None):
     return None
 
 # Constraint: Every bodypart division must be done consecutively for a phase component.
+@model_helper
 def consecutive_bodyparts_for_component(model, phase_components, active_phase_components):
     # Retrieve the list of all unique phase component ids.
     unique_components = list(set(phase_component["id"] for phase_component in phase_components))
@@ -263,6 +345,7 @@ def consecutive_bodyparts_for_component(model, phase_components, active_phase_co
     return None
 
 # Ensures that only required entrys will be used at any entry in the entry_set.
+@model_helper
 def only_use_required_items(model, required_items, entry_vars, active_entry_vars=None, conditions=None):
     # Ensures that only required items will be used at any entry in the macrocycle.
     for i, entry in enumerate(entry_vars):
@@ -277,6 +360,7 @@ def only_use_required_items(model, required_items, entry_vars, active_entry_vars
     return None
 
 # Ensures that each required entry occurs at least once in the entry_set.
+@model_helper
 def use_all_required_items(model, required_items, used_vars, soft_constraint=False):
     soft_conditions=[]
     for item_index in required_items:
@@ -294,6 +378,7 @@ def use_all_required_items(model, required_items, used_vars, soft_constraint=Fal
     return soft_conditions
 
 # Ensures that an item only occurs once in the entry_set.
+@model_helper
 def no_repeated_items(model, required_items, used_vars):
     for item_index in required_items:
         conditions = [row[item_index] for row in used_vars]
@@ -301,6 +386,7 @@ def no_repeated_items(model, required_items, used_vars):
     return None
 
 # Constraint: Force all phase components required in every workout to be included at least once.
+@model_helper
 def use_workout_required_components(model, required_items, used_vars, active_entry_vars):
     # Each required phase component
     for item_index in required_items:
@@ -311,6 +397,7 @@ def use_workout_required_components(model, required_items, used_vars, active_ent
     return None
 
 # Constraint: The duration of a day may only be a number of hours between the allowed time.
+@model_helper
 def day_duration_within_availability(model, duration_vars, availability):
     # Each day
     for duration_vars_for_day, availability_for_day in zip(duration_vars, availability):
@@ -318,6 +405,7 @@ def day_duration_within_availability(model, duration_vars, availability):
         model.Add(sum(duration_vars_for_day) <= availability_for_day)
     return None
 
+@model_helper
 def symmetry_breaking_constraints(model, entry_vars, active_vars):
     """Add symmetry breaking constraints to reduce search space."""
     # Force active exercises to be ordered
@@ -331,6 +419,7 @@ def symmetry_breaking_constraints(model, entry_vars, active_vars):
         ])
     return None
 
+@model_helper
 def add_tight_bounds(model, entry_vars, used_vars, items, name="", minimum_key=None, maximum_key=None):
     """Add tight bounds to variables to help the solver."""
     # Track used phase components
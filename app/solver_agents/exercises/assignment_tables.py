@@ -0,0 +1,64 @@
+from functools import lru_cache
+from app.solver_agents.model_tags import model_helper
+
+# The bounds of a variable within the model.
+def var_bounds(model, var):
+    domain = model.Proto().variables[var.Index()].domain
+    return domain[0], domain[-1]
+
+# Every combination of two values within their bounds, along with their product.
+@lru_cache(maxsize=None)
+def product_table(first_bounds, second_bounds):
+    return tuple(
+        (first, second, first * second)
+        for first in range(first_bounds[0], first_bounds[1] + 1)
+        for second in range(second_bounds[0], second_bounds[1] + 1))
+
+# Every combination of reps, sets and rest allowed for a phase component, along with the duration it results in.
+# Combinations are only kept if the duration is within the bounds allowed for the phase component.
+# Working durations do not include rest, so they are enumerated with a rest of 0.
+# duration = (seconds_per_exercise * rep_count + rest_time) * set_count
+@lru_cache(maxsize=None)
+def phase_component_duration_table(phase_component_id, seconds_per_exercise, reps_bounds, sets_bounds, rest_bounds, duration_bounds, working=False):
+    if working:
+        rest_bounds = (0, 0)
+    min_duration, max_duration = duration_bounds
+    table = []
+    for reps in range(reps_bounds[0], reps_bounds[1] + 1):
+        for sets in range(sets_bounds[0], sets_bounds[1] + 1):
+            for rest in range(rest_bounds[0], rest_bounds[1] + 1):
+                duration = (seconds_per_exercise * reps + (5 * rest)) * sets
+                if min_duration <= duration <= max_duration:
+                    table.append((reps, sets, rest, duration) if not working else (reps, sets, duration))
+    return tuple(table)
+
+# Constrain the product of two variables to the allowed combinations of their values rather than a multiplication.
+@model_helper
+def add_product_table(model, product_var, first, second):
+    model.AddAllowedAssignments(
+        [first, second, product_var],
+        product_table(var_bounds(model, first), var_bounds(model, second)))
+    return product_var
+
+# Create a variable for the product of two variables, constrained with a table.
+@model_helper
+def create_product_var(model, first, second, name):
+    min_first, max_first = var_bounds(model, first)
+    min_second, max_second = var_bounds(model, second)
+    products = [min_first * min_second, min_first * max_second, max_first * min_second, max_first * max_second]
+    product_var = model.NewIntVar(min(products), max(products), name)
+    return add_product_table(model, product_var, first, second)
+
+# Constrain the duration of a phase component to the durations allowed for its reps, sets and rest.
+@model_helper
+def add_phase_component_duration_table(model, duration_var, phase_component_constraints, reps, sets, rest=None, working=False):
+    table = phase_component_duration_table(
+        phase_component_constraints["phase_component_id"],
+        phase_component_constraints["seconds_per_exercise"],
+        (phase_component_constraints["reps_min"], phase_component_constraints["reps_max"]),
+        (phase_component_constraints["sets_min"], phase_component_constraints["sets_max"]),
+        (phase_component_constraints["rest_min"], phase_component_constraints["rest_max"]),
+        var_bounds(model, duration_var),
+        working)
+    model.AddAllowedAssignments([reps, sets, rest, duration_var] if not working else [reps, sets, duration_var], table)
+    return duration_var
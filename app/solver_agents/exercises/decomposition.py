@@ -0,0 +1,218 @@
+from config import ExerciseDecompositionConfig
+from logging_config import LogSolver
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from ortools.sat.python import cp_model
+
+from app.solver_agents.solver_farm import search_workers
+
+# The phase components of each bodypart, by their index within the phase components.
+# Bodyparts only interact through the total duration, duplicate general exercises and the vertical loading of sets.
+def bodypart_blocks(phase_components):
+    blocks = {}
+    for i, phase_component in enumerate(phase_components[1:], start=1):
+        blocks.setdefault(phase_component["bodypart_id"], []).append(i)
+    return blocks
+
+# Whether the first step should be solved one bodypart at a time.
+def use_decomposition(phase_components):
+    return ExerciseDecompositionConfig.enabled and len(bodypart_blocks(phase_components)) >= ExerciseDecompositionConfig.min_blocks
+
+# The parameters of the first step restricted to the phase components of a block.
+def block_parameters(parameters, block, availability):
+    phase_components = parameters["phase_components"]
+    return {
+        **parameters,
+        "phase_components": [phase_components[0]] + [phase_components[i] for i in block],
+        "availability": availability
+    }
+
+# Read the solution of a block as a candidate for the master model, with the phase components indexed as in the full problem.
+def _block_candidate(solver, agent_vars, block):
+    entries = []
+    sets = set()
+    duration = working_duration = 0
+    for i, active_exercise_var in enumerate(agent_vars["active_exercises"]):
+        if not solver.Value(active_exercise_var):
+            continue
+        phase_component_index = block[solver.Value(agent_vars["phase_components"][i]) - 1]
+        entries.append((phase_component_index, solver.Value(agent_vars["general_exercises"][i])))
+        duration += solver.Value(agent_vars["duration"][i])
+        working_duration += solver.Value(agent_vars["working_duration"][i])
+        if solver.Value(agent_vars["non_warmup"][i]):
+            sets.add(solver.Value(agent_vars["sets"][i]))
+    return {
+        "entries": entries,
+        "general_exercises": {general_exercise for _, general_exercise in entries},
+        "duration": duration,
+        "working_duration": working_duration,
+        "sets": sets,
+        "objective": round(solver.ObjectiveValue())
+    }
+
+# The numbers of sets allowed for every non warm-up phase component, as the range of sets they share.
+def shared_sets_range(phase_components):
+    non_warmups = [phase_component for phase_component in phase_components[1:] if not phase_component["is_warmup"]]
+    return (
+        max((phase_component["sets_min"] for phase_component in non_warmups), default=0),
+        min((phase_component["sets_max"] for phase_component in non_warmups), default=0))
+
+# Solve the first step for a single block, avoiding the general exercises given and keeping the sets of non warm-ups within the range given.
+# Returns the candidate found, or None if the block has no solution.
+def solve_block(agent, parameters, constraints, block, availability, max_time, num_search_workers, excluded_general_exercises=(), sets_range=None):
+    model, _, agent_vars, _, _ = agent.build_first_step_models(block_parameters(parameters, block, availability), constraints)
+    for general_exercise_var in agent_vars["general_exercises"]:
+        for general_exercise in excluded_general_exercises:
+            model.Add(general_exercise_var != general_exercise)
+    if sets_range is not None:
+        for sets_var, non_warmup_var, active_exercise_var in zip(agent_vars["sets"], agent_vars["non_warmup"], agent_vars["active_exercises"]):
+            model.AddLinearConstraint(sets_var, *sets_range).OnlyEnforceIf(non_warmup_var, active_exercise_var)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = num_search_workers
+    solver.parameters.max_time_in_seconds = max_time
+    status = agent._solve_and_time_solver(solver, model, publish_progress=False)
+    if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+        return None
+    return _block_candidate(solver, agent_vars, block)
+
+# Solve every block on its own, in parallel, each with a share of the search workers.
+def solve_blocks_in_parallel(agent, parameters, constraints, blocks, max_time):
+    num_search_workers = max(1, search_workers(24) // len(blocks))
+    with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+        futures = {
+            bodypart_id: executor.submit(
+                copy_context().run, solve_block, agent, parameters, constraints,
+                block, parameters["availability"], max_time, num_search_workers)
+            for bodypart_id, block in blocks.items()}
+        return {bodypart_id: future.result() for bodypart_id, future in futures.items()}
+
+# Choose one candidate for each block such that the coupling constraints hold, minimizing the sum of their objectives.
+# Each block is only required to choose a candidate under an assumption, so an infeasible choice names the blocks in conflict.
+# Returns the candidate chosen for each block, and the conflicting blocks if there is no such choice.
+def reconcile_blocks(candidates, availability, constraints, max_time=ExerciseDecompositionConfig.master_time_in_seconds):
+    model = cp_model.CpModel()
+    block_literals = {}
+    choice_vars = {}
+    for bodypart_id, block_candidates in candidates.items():
+        block_literals[bodypart_id] = model.NewBoolVar(f"bodypart_{bodypart_id}_is_assigned")
+        choice_vars[bodypart_id] = [
+            model.NewBoolVar(f"bodypart_{bodypart_id}_uses_candidate_{j}")
+            for j in range(len(block_candidates))]
+        model.Add(sum(choice_vars[bodypart_id]) == 1).OnlyEnforceIf(block_literals[bodypart_id])
+        model.Add(sum(choice_vars[bodypart_id]) <= 1)
+
+    chosen = [
+        (candidate, choice_var)
+        for bodypart_id, block_candidates in candidates.items()
+        for candidate, choice_var in zip(block_candidates, choice_vars[bodypart_id])]
+
+    # The workout must fit within the time available.
+    model.Add(sum(candidate["duration"] * choice_var for candidate, choice_var in chosen) <= availability)
+
+    # No general exercise may be used by two blocks.
+    if constraints["no_duplicate_general_exercises"]:
+        general_exercises = set().union(*(candidate["general_exercises"] for candidate, _ in chosen))
+        for general_exercise in general_exercises:
+            model.AddAtMostOne(choice_var for candidate, choice_var in chosen if general_exercise in candidate["general_exercises"])
+
+    # Every non warm-up exercise must use the same number of sets.
+    if constraints["vertical_loading"]:
+        max_sets = max((max(candidate["sets"], default=0) for candidate, _ in chosen), default=0)
+        common_sets = model.NewIntVar(0, max_sets, "common_sets")
+        for candidate, choice_var in chosen:
+            if len(candidate["sets"]) > 1:
+                model.Add(choice_var == 0)
+            for sets in candidate["sets"]:
+                model.Add(common_sets == sets).OnlyEnforceIf(choice_var)
+
+    model.Minimize(sum(candidate["objective"] * choice_var for candidate, choice_var in chosen))
+    model.AddAssumptions(list(block_literals.values()))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = search_workers(8)
+    solver.parameters.max_time_in_seconds = max_time
+    status = solver.Solve(model)
+
+    if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+        selection = {
+            bodypart_id: next(candidate for candidate, choice_var in zip(candidates[bodypart_id], choice_vars[bodypart_id]) if solver.Value(choice_var))
+            for bodypart_id in candidates}
+        return selection, []
+
+    conflicting = []
+    if status == cp_model.INFEASIBLE:
+        core = set(solver.SufficientAssumptionsForInfeasibility())
+        conflicting = [bodypart_id for bodypart_id, literal in block_literals.items() if literal.Index() in core]
+    return None, conflicting
+
+# Re-solve the conflicting blocks one at a time around the choice made for the other blocks.
+# When the sets of the other blocks cannot be shared by every block, every block is re-solved within the sets they can all share.
+# Returns False if a block has no solution around the others.
+def resolve_conflicting_blocks(agent, parameters, constraints, blocks, candidates, conflicting, max_time):
+    settled = {bodypart_id: candidates[bodypart_id] for bodypart_id in candidates if bodypart_id not in conflicting}
+    fixed = {}
+    if settled:
+        fixed, _ = reconcile_blocks(settled, parameters["availability"], constraints)
+        fixed = fixed or {}
+
+    sets_range = None
+    if constraints["vertical_loading"]:
+        sets_range = shared_sets_range(parameters["phase_components"])
+        if sets_range[0] > sets_range[1]:
+            return False
+        fixed_sets = set().union(*(candidate["sets"] for candidate in fixed.values()))
+        if len(fixed_sets) == 1 and sets_range[0] <= min(fixed_sets) <= sets_range[1]:
+            sets_range = (min(fixed_sets), min(fixed_sets))
+        elif fixed_sets:
+            conflicting = list(candidates)
+            fixed = {}
+
+    for bodypart_id in conflicting:
+        excluded_general_exercises = set()
+        if constraints["no_duplicate_general_exercises"]:
+            excluded_general_exercises = set().union(*(candidate["general_exercises"] for candidate in fixed.values()))
+        availability = parameters["availability"] - sum(candidate["duration"] for candidate in fixed.values())
+        if availability <= 0:
+            return False
+
+        LogSolver.verbose(f"Re-solving bodypart {bodypart_id} around {len(fixed)} settled bodyparts with {availability} seconds available.")
+        candidate = solve_block(
+            agent, parameters, constraints, blocks[bodypart_id], availability, max_time,
+            search_workers(24), excluded_general_exercises, sets_range)
+        if candidate is None:
+            return False
+        candidates[bodypart_id].append(candidate)
+        fixed[bodypart_id] = candidate
+
+        # The blocks solved after this one use the same number of sets.
+        if sets_range is not None and candidate["sets"]:
+            sets_range = (min(candidate["sets"]), min(candidate["sets"]))
+    return True
+
+# Solve the first step one bodypart at a time, reconciling the bodyparts with a master model.
+# Returns the schedule of the first step, or None if the full model should be solved instead.
+def solve_decomposed(agent, parameters, constraints):
+    blocks = bodypart_blocks(parameters["phase_components"])
+    max_time = ExerciseDecompositionConfig.block_time_in_seconds
+    LogSolver.verbose(f"Solving the first step as {len(blocks)} bodyparts in parallel.")
+
+    candidates = {}
+    for bodypart_id, candidate in solve_blocks_in_parallel(agent, parameters, constraints, blocks, max_time).items():
+        if candidate is None:
+            LogSolver.verbose(f"Bodypart {bodypart_id} has no solution on its own.")
+            return None
+        candidates[bodypart_id] = [candidate]
+
+    for round_index in range(ExerciseDecompositionConfig.max_rounds + 1):
+        selection, conflicting = reconcile_blocks(candidates, parameters["availability"], constraints)
+        if selection is not None:
+            LogSolver.verbose(f"The bodyparts were reconciled after {round_index} rounds of re-solving.")
+            return selection
+        if not conflicting or round_index == ExerciseDecompositionConfig.max_rounds:
+            break
+        LogSolver.verbose(f"Bodyparts {conflicting} conflict with each other.")
+        if not resolve_conflicting_blocks(agent, parameters, constraints, blocks, candidates, conflicting, max_time):
+            break
+    LogSolver.verbose("The bodyparts could not be reconciled.")
+    return None
@@ -1,8 +1,12 @@
+from app.solver_agents.exercises.assignment_tables import add_phase_component_duration_table, create_product_var
+from app.solver_agents.model_tags import model_helper
+
 
 # Due to inability to make an expression as a constraint in a single line, a few steps must be taken prior.
 # This method performs the in between steps and returns the final duration variable.
 # total_set_duration = (seconds_per_exercise * rep_count + rest_time) * set_count
-def create_duration_var(model, i, max_duration=0, seconds_per_exercise=0, reps=0, sets=0, rest=0, name=""):
+@model_helper
+def create_duration_var(model, i, max_duration=0, seconds_per_exercise=0, reps=0, sets=0, rest=0, name="", use_tables=False):
     if name != "":
         name += "_"
 
@@ -10,6 +14,19 @@ def create_duration_var(model, i, max_duration=0, seconds_per_exercise=0, reps=0
     # duration = (seconds_per_exercise * rep_count + rest_time) * set_count
     duration_var_entry = model.NewIntVar(0, max_duration, f'{name}duration_{i}')
 
+    # The products of the sets with the reps and rest are taken from tables, leaving a single multiplication.
+    # duration = seconds_per_exercise * (rep_count * set_count) + 5 * (rest_time * set_count)
+    if use_tables:
+        reps_and_sets = create_product_var(model, reps, sets, f'{name}rep_and_set_count_{i}')
+        seconds_per_exercise_and_reps = model.NewIntVar(0, max_duration, f'{name}seconds_per_exercise_and_rep_count_{i}')
+        model.AddMultiplicationEquality(seconds_per_exercise_and_reps, [seconds_per_exercise, reps_and_sets])
+        if isinstance(rest, int):
+            model.Add(duration_var_entry == seconds_per_exercise_and_reps + (5 * rest * sets))
+        else:
+            rest_and_sets = create_product_var(model, rest, sets, f'{name}rest_and_set_count_{i}')
+            model.Add(duration_var_entry == seconds_per_exercise_and_reps + (5 * rest_and_sets))
+        return duration_var_entry
+
     # Temporary variable for seconds per exercise and the rep count. (seconds_per_exercise * rep_count)
     seconds_per_exercise_and_reps = model.NewIntVar(0, max_duration, f'{name}seconds_per_exercise_and_rep_count_{i}')
     model.AddMultiplicationEquality(seconds_per_exercise_and_reps, [seconds_per_exercise, reps])
@@ -28,7 +45,8 @@ def create_duration_var(model, i, max_duration=0, seconds_per_exercise=0, reps=0
 # This method performs the in between steps and returns the final duration variable.
 # This method is for durations where the phase component is already known, so min and max elements can be more specific.
 # total_set_duration = (seconds_per_exercise * rep_count + rest_time) * set_count
-def constrain_duration_var(model, i, phase_component_constraints, seconds_per_exercise=0, reps=0, sets=0, rest=0, name="", working=False):
+@model_helper
+def constrain_duration_var(model, i, phase_component_constraints, seconds_per_exercise=0, reps=0, sets=0, rest=0, name="", working=False, use_tables=False):
     if name != "":
         name += "_"
     
@@ -43,6 +61,10 @@ def constrain_duration_var(model, i, phase_component_constraints, seconds_per_ex
     # duration = (seconds_per_exercise * rep_count + rest_time) * set_count
     duration_var_entry = model.NewIntVar(min_duration, max_duration, f'{name}duration_{i}')
 
+    # As the phase component is known, the duration is taken from the combinations allowed for it.
+    if use_tables:
+        return add_phase_component_duration_table(model, duration_var_entry, phase_component_constraints, reps, sets, rest, working)
+
     # Temporary variable for seconds per exercise and the rep count. (seconds_per_exercise * rep_count)
     min_seconds_per_exercise_and_reps = min_max_seconds_per_exercise * min_reps
     max_seconds_per_exercise_and_reps = min_max_seconds_per_exercise * max_reps
@@ -104,7 +126,8 @@ def _is_intensity_base_strain(model, exercise_bounds, i, name="", scaled=1, inte
 # This method performs the in between steps and returns the final duration variable.
 # total_set_duration = (seconds_per_exercise * (1 + (0.1 * basestrain) + (0.1 * intensity)) * rep_count + rest_time) * set_count
 # total_set_duration = (seconds_per_exercise * (10 + basestrain + intensity) * rep_count + 10 * rest_time) * set_count
-def create_exercise_effort_var(model, i, phase_component_constraints, exercise_bounds, seconds_per_exercise=0, reps=0, sets=0, rest=0, intensity=None, base_strain=None, name="", working=False, scaled=1):
+@model_helper
+def create_exercise_effort_var(model, i, phase_component_constraints, exercise_bounds, seconds_per_exercise=0, reps=0, sets=0, rest=0, intensity=None, base_strain=None, name="", working=False, scaled=1, use_tables=False):
     if name != "":
         name += "_"
 
@@ -127,6 +150,20 @@ def create_exercise_effort_var(model, i, phase_component_constraints, exercise_b
     # duration = (seconds_per_exercise * rep_count + rest_time) * set_count
     effort_var_entry = model.NewIntVar(min_effort_scaled, max_effort_scaled, f'{name}effort_{i}')
 
+    # The intensity and base strain are too wide to enumerate, so only the products of the sets with the reps and rest are taken from tables.
+    # As the seconds per exercise is fixed for the phase component, a single multiplication remains.
+    # effort = seconds_per_exercise * scaled_intensity_strain * (rep_count * set_count) + 5 * scaled * (rest_time * set_count)
+    if use_tables:
+        reps_and_sets = create_product_var(model, reps, sets, f'{name}rep_and_set_count_{i}')
+        strained_reps_and_sets = model.NewIntVar(min_intensity_strain * min_reps * min_sets, max_intensity_strain * max_reps * max_sets, f'{name}strained_rep_and_set_count_{i}')
+        model.AddMultiplicationEquality(strained_reps_and_sets, [scaled_intensity_strain, reps_and_sets])
+        if working:
+            model.Add(effort_var_entry == min_max_seconds_per_exercise * strained_reps_and_sets)
+        else:
+            rest_and_sets = create_product_var(model, rest, sets, f'{name}rest_and_set_count_{i}')
+            model.Add(effort_var_entry == (min_max_seconds_per_exercise * strained_reps_and_sets) + (5 * scaled * rest_and_sets))
+        return effort_var_entry
+
     # Temporary variable for seconds per exercise and the rep count. (seconds_per_exercise * rep_count)
     min_seconds_per_exercise_and_reps = min_max_seconds_per_exercise * min_reps * min_intensity_strain
     max_seconds_per_exercise_and_reps = min_max_seconds_per_exercise * max_reps * max_intensity_strain
@@ -146,6 +183,7 @@ def create_exercise_effort_var(model, i, phase_component_constraints, exercise_b
     return effort_var_entry
 
 # Indicate that an exercise chosen is weighted if the exercise is a weighted exercise.
+@model_helper
 def constrain_weighted_exercises_var(model, used_exercise_vars, weighted_exercise_vars, weighted_exercise_indices):
     for used_exercise_var, weighted_exercise_var in zip(used_exercise_vars, weighted_exercise_vars):
         weighted_exercise_used = [used_exercise_var[i] for i in weighted_exercise_indices]
@@ -157,6 +195,7 @@ def constrain_weighted_exercises_var(model, used_exercise_vars, weighted_exercis
     return None
 
 # Only allow intensity if a weighted exercise is selected. Otherwise, intensity is 0.
+@model_helper
 def constrain_intensity_vars(model, intensity_vars, phase_component_ids, phase_components, weighted_exercise_vars):
     # For each exercise position
     for intensity_var, pc_index, has_weighted_exercise in zip(intensity_vars, phase_component_ids, weighted_exercise_vars):
@@ -168,6 +207,7 @@ def constrain_intensity_vars(model, intensity_vars, phase_component_ids, phase_c
         model.Add(intensity_var == 0).OnlyEnforceIf(has_weighted_exercise.Not())
     return None
 
+@model_helper
 def constrain_scaled_training_weight_vars(model, intensity_vars, exercises, scaled_training_weight_vars, used_exercise_vars):
     # Link the exercise variables and the training weight variables by ensuring the training weight is equal to the one rep max * intensity for the exercise chose at exercise i.
     for intensity_var, training_weight_var, used_exercise_var in zip(intensity_vars, scaled_training_weight_vars, used_exercise_vars):
@@ -175,6 +215,7 @@ def constrain_scaled_training_weight_vars(model, intensity_vars, exercises, scal
             model.Add(training_weight_var == (exercise["one_rep_max"] * intensity_var)).OnlyEnforceIf(exercise_for_exercise_var)
     return None
 
+@model_helper
 def constrain_training_weight_vars(model, exercises, training_weight_vars, used_exercise_vars, weighted_exercise_vars):
     # Link the exercise variables and the training weight variables by ensuring the training weight is equal to the one rep max * intensity for the exercise chose at exercise i.
     for training_weight_var, used_exercise_var, has_weighted_exercise in zip(training_weight_vars, used_exercise_vars, weighted_exercise_vars):
@@ -187,6 +228,7 @@ def constrain_training_weight_vars(model, exercises, training_weight_vars, used_
     return None
 
 # For constraining volumes for the phase component assignment.
+@model_helper
 def constrain_volume_vars_no_weights_involved(model, volume_vars, reps_vars, sets_vars):
     # Link the exercise variables and the volume variables by ensuring the volume is equal to the reps * sets * training weight for the exercise chose at exercise i.
     for reps_var, sets_var, volume_var in zip(reps_vars, sets_vars, volume_vars):
@@ -194,6 +236,7 @@ def constrain_volume_vars_no_weights_involved(model, volume_vars, reps_vars, set
     return None
 
 # For constraining volumes for the exercise assignment.
+@model_helper
 def constrain_volume_vars_weights_involved(model, volume_vars, reps_vars, sets_vars, max_volume, training_weight_vars, weighted_exercise_vars):
     # Link the exercise variables and the volume variables by ensuring the volume is equal to the reps * sets * training weight for the exercise chose at exercise i.
     for i, (reps_var, sets_var, training_weight_var, volume_var, has_weighted_exercise) in enumerate(zip(reps_vars, sets_vars, training_weight_vars, volume_vars, weighted_exercise_vars)):
@@ -208,6 +251,7 @@ def constrain_volume_vars_weights_involved(model, volume_vars, reps_vars, sets_v
     return None
 
 # Makes the volume variable equal to the value it would be given the other metrics.
+@model_helper
 def constrain_volume_vars(model, volume_vars, reps_vars, sets_vars, max_volume, training_weight_vars=None, weighted_exercise_vars=None):
     if (training_weight_vars != None) and (weighted_exercise_vars != None):
         constrain_volume_vars_weights_involved(model, volume_vars, reps_vars, sets_vars, max_volume, training_weight_vars, weighted_exercise_vars)
@@ -215,6 +259,7 @@ def constrain_volume_vars(model, volume_vars, reps_vars, sets_vars, max_volume,
         constrain_volume_vars_no_weights_involved(model, volume_vars, reps_vars, sets_vars)
     return None
 
+@model_helper
 def constrain_density_vars(model, density_vars, duration_vars, working_duration_vars, max_duration):
     # Link the exercise variables and the density variables by ensuring the density is equal to the duration / working duration for the exercise chose at exercise i.
     for i, (duration_var, working_duration_var, density_var) in enumerate(zip(duration_vars, working_duration_vars, density_vars)):
@@ -237,12 +282,14 @@ def constrain_density_vars(model, density_vars, duration_vars, working_duration_
         model.Add(density_var == 0).OnlyEnforceIf(base_duration_is_0)
     return None
 
+@model_helper
 def constrain_performance_vars(model, performance_vars, volume_vars, density_vars):
     for volume_var, density_var, performance_var in zip(volume_vars, density_vars, performance_vars):
         model.AddMultiplicationEquality(performance_var, [volume_var, density_var])
     return None
 
 # Indicate that the phase component chosen is not a warmup if the exercise is a non warmup phase component.
+@model_helper
 def constrain_non_warmup_vars(model, used_pc_vars, non_warmup_vars, non_warmup_exercise_indices):
     for used_pc_var, non_warmup_var in zip(used_pc_vars, non_warmup_vars):
         non_warmup_pc_used = [used_pc_var[i] for i in non_warmup_exercise_indices]
@@ -253,6 +300,7 @@ def constrain_non_warmup_vars(model, used_pc_vars, non_warmup_vars, non_warmup_e
         model.AddBoolAnd(warmup_pc_used).OnlyEnforceIf(non_warmup_var.Not())
     return None
 
+@model_helper
 def resistances_of_same_bodypart_have_equal_sets(model, phase_components, used_pcs_vars, sets_vars):
     # Create dictionary of the resistances per bodypart.
     resistance_phase_components = {}
@@ -284,6 +332,7 @@ def resistances_of_same_bodypart_have_equal_sets(model, phase_components, used_p
     return None
 
 # Find if performance has increased for an exercise. If no increase is found, by how much.
+@model_helper
 def retrieve_indication_of_increase(model, items, max_performance, var_index, performance_var, used_item):
     # Booleans to check if the performance increased for whichever item was selected.
     performance_increase_for_pc_met = [model.NewBoolVar(f'item_{i}_performance_increase_for_{var_index}')
@@ -311,5 +360,7 @@ def retrieve_indication_of_increase(model, items, max_performance, var_index, pe
         model.Add(performance_difference == (100 + item["performance"] - performance_var)).OnlyEnforceIf(item_selected, performance_increase_met_for_item.Not())
 
     # The final performance penalty for a variable is the negative performance increase over 100.
-    model.AddDivisionEquality(performance_penalty, performance_difference, 100)
+    # The division is written as linear bounds so that the penalty can be guarded by a constraint family.
+    model.Add(100 * performance_penalty <= performance_difference)
+    model.Add(performance_difference <= 100 * performance_penalty + 99)
     return performance_penalty
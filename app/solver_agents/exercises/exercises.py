@@ -1,4 +1,4 @@
-from config import ortools_solver_time_in_seconds, SchedulerLoggingConfig
+from config import ortools_solver_portfolio, ortools_solver_assignment_tables, SchedulerLoggingConfig
 from logging_config import LogSolver
 from langgraph.graph import StateGraph, START, END
 from ortools.sat.python import cp_model
@@ -8,6 +8,8 @@ import math
 from app.solver_agents.constraints import (
     intvar_list_from_phase_components, 
     intvar_list_from_elements, 
+    intvar_list_from_bounds, 
+    intvar_list_from_values, 
     link_entry_and_item, 
     no_repeated_items, 
     only_use_required_items, 
@@ -26,9 +28,17 @@ from app.solver_agents.exercises.exercise_model_specific_constraints import (
     constrain_performance_vars, 
     retrieve_indication_of_increase)
 
+from app.solver_agents.solution_hints import hint_exercise_slots
+from app.solver_agents.constraint_switches import ConstraintSwitches
+from app.solver_agents.model_tags import new_model
+from app.solver_agents.solver_cache import cached_solver
+from app.solver_agents.solver_farm import search_workers
+
 from .exercises_phase_components import RelaxationAttempt, State, ExercisePhaseComponentAgent
 from app.utils.longest_string import longest_string_size_for_key
-from .get_pc_exercise_bounds import get_bounds
+from .get_pc_exercise_bounds import get_bounds, get_slot_bounds
+from .decomposition import use_decomposition, solve_decomposed
+from .assignment_tables import var_bounds
 
 _ = load_dotenv()
 
@@ -50,15 +60,16 @@ def declare_duration_vars(model, max_entries, phase_component_ids, phase_compone
             sets=sets_vars[i], 
             rest=rest_vars[i] if rest_vars is not None else 0,
             name=name,
-            working=False if rest_vars is not None else True)
+            working=False if rest_vars is not None else True,
+            use_tables=ortools_solver_assignment_tables)
         for i in range(max_entries)]
 
-def declare_effort_vars(model, max_entries, ex_bounds, phase_component_ids, phase_components, seconds_per_exercise_vars, reps_vars, sets_vars, intensity_vars, base_strain_vars, rest_vars=None, name=""):
+def declare_effort_vars(model, max_entries, slot_bounds, phase_component_ids, phase_components, seconds_per_exercise_vars, reps_vars, sets_vars, intensity_vars, base_strain_vars, rest_vars=None, name=""):
     return [
         create_exercise_effort_var(
             model=model, i=i, 
             phase_component_constraints=phase_components[phase_component_ids[i]], 
-            exercise_bounds=ex_bounds, 
+            exercise_bounds=slot_bounds[i], 
             seconds_per_exercise=seconds_per_exercise_vars[i], 
             reps=reps_vars[i], 
             sets=sets_vars[i], 
@@ -66,9 +77,18 @@ def declare_effort_vars(model, max_entries, ex_bounds, phase_component_ids, phas
             intensity=intensity_vars[i],
             base_strain=base_strain_vars[i],
             name=name,
-            working=False if rest_vars is not None else True)
+            working=False if rest_vars is not None else True,
+            use_tables=ortools_solver_assignment_tables)
         for i in range(max_entries)]
 
+# The bounds of the sum of the effort variables, narrowed from the bounds given by those of the variables summed.
+def total_effort_bounds(model, effort_vars, min_total, max_total):
+    min_sum = sum(var_bounds(model, effort_var)[0] for effort_var in effort_vars)
+    max_sum = sum(var_bounds(model, effort_var)[1] for effort_var in effort_vars)
+    if max(min_total, min_sum) > min(max_total, max_sum):
+        return min_total, max_total
+    return max(min_total, min_sum), min(max_total, max_sum)
+
 def encourage_increase_for_subcomponent(model, exercises, phase_component_ids, used_exercise_vars, performance_vars, max_performance):
     return [
         retrieve_indication_of_increase(model, exercises, max_performance, pc_index, performance_var, used_exercise_var)
@@ -78,8 +98,42 @@ def encourage_increase_for_subcomponent(model, exercises, phase_component_ids, u
 class ExerciseAgent(ExercisePhaseComponentAgent):
     schedule_title = "Exercise Subagent"
 
+    # The first step is solved one bodypart at a time when decomposing, so the full model is only built if that fails.
+    def build_opt_model_node(self, state: State, config=None) -> dict:
+        if use_decomposition(state["parameters"]["phase_components"]):
+            LogSolver.agent_steps(f"{self.schedule_title}: Decomposing the First Step by bodypart")
+            return {"opt_model": None, "constraint_switches": None}
+        return super().build_opt_model_node(state, config)
+
     def solve_model_node_temp(self, state: State, config=None) -> dict:
         LogSolver.agent_steps(f"{self.schedule_title}: Solving Model for First Step")
+        if state["opt_model"] is not None:
+            return self.solve_first_step(state)
+
+        selection = solve_decomposed(self, state["parameters"], state["constraints"])
+        if selection is not None:
+            phase_components = state["parameters"]["phase_components"]
+            schedule = []
+            for phase_component_index, general_exercise_index in (entry for candidate in selection.values() for entry in candidate["entries"]):
+                phase_component = phase_components[phase_component_index]
+                schedule.append((
+                    len(schedule), 
+                    phase_component_index, 
+                    general_exercise_index,                                             # ID of the general exercise used.
+                    phase_component["component_id"],                                    # ID of the component for the phase component chosen.
+                    phase_component["subcomponent_id"],                                 # ID of the subcomponent for the phase component chosen.
+                    phase_component["bodypart_id"]
+                ))
+            schedule = self.sort_schedule(phase_components, schedule, 2, 3, 4)
+            state["logs"] += f"\nSolver status: {cp_model.FEASIBLE} (decomposed by bodypart)\n"
+            return {"solution": {"schedule": schedule, "status": cp_model.FEASIBLE}}
+
+        # Solve the full model instead, keeping it for any relaxation that follows.
+        built = super().build_opt_model_node(state, config)
+        state = {**state, **built}
+        return {**built, **self.solve_first_step(state)}
+
+    def solve_first_step(self, state: State) -> dict:
         """Solve model and record relaxation attempt results."""
         #return {"solution": "None"}
         # model, model_with_divided_strain, phase_component_vars, pc_count_vars, active_exercise_vars, seconds_per_exercise_vars, reps_vars, sets_vars, rest_vars, duration_vars, working_duration_vars = state["opt_model"]
@@ -90,23 +144,27 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
 
         phase_components = state["parameters"]["phase_components"]
 
-        solver = cp_model.CpSolver()
-        solver.parameters.num_search_workers = 24
-        solver.parameters.max_time_in_seconds = ortools_solver_time_in_seconds
-        # solver.parameters.log_search_progress = True
-        status = self._solve_and_time_solver(solver, model)
+        # Race the summed and divided strain models against each other.
+        if ortools_solver_portfolio:
+            status, solver, _ = self._solve_portfolio([model, model_with_divided_strain], state=state, publish_progress=False)
+        else:
+            solver = cp_model.CpSolver()
+            solver.parameters.num_search_workers = search_workers(24)
+            self._apply_time_budget(solver, model)
+            # solver.parameters.log_search_progress = True
+            status = self._solve_and_time_solver(solver, model, state, publish_progress=False)
 
-        # Extending time allowed for the agent to 10 seconds.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=10)
+            # Extending time allowed for the agent to 10 seconds.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=10, state=state, publish_progress=False)
 
-        # Using the divided strain.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=None, message_end="Solving with strain divided.")
+            # Using the divided strain.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=None, message_end="Solving with strain divided.", state=state, publish_progress=False)
 
-        # Using the divided strain with extended time to 10 seconds.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=10, message_end="Solving with strain divided.")
+            # Using the divided strain with extended time to 10 seconds.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=10, message_end="Solving with strain divided.", state=state, publish_progress=False)
 
         state["logs"] += f"\nSolver status: {status}\n"
         state["logs"] += f"Conflicts: {solver.NumConflicts()}, Branches: {solver.NumBranches()}\n"
@@ -149,7 +207,7 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         state["relaxation_attempts"].append(attempt)
         return {"solution": None}
 
-    def create_model_pc_vars(self, model, phase_components, workout_availability, phase_component_ids, max_exercises):
+    def create_model_pc_vars(self, model, phase_components, workout_availability, phase_component_ids, max_exercises, slot_bounds):
         LogSolver.agent_steps(f"{self.schedule_title}: Create the model phase component variables for the solver.")
 
         # Define variables =====================================
@@ -165,45 +223,34 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
 
         # Integer variable representing the intensity chosen at exercise i.
         pc_vars["intensity"] = [
-            model.NewIntVar(0, phase_components[pc_index]["intensity_max"], f'intensity_{i}')
-            for i, pc_index in enumerate(phase_component_ids)]
+            model.NewIntVar(0, bounds["intensity"]["max"], f'intensity_{i}')
+            for i, bounds in enumerate(slot_bounds)]
 
         return pc_vars
     
-    def create_model_exercise_vars(self, model, phase_component_ids, phase_components, pc_vars, pc_bounds, exercises, max_exercises, ex_bounds):
+    def create_model_exercise_vars(self, model, phase_component_ids, phase_components, pc_vars, pc_bounds, exercises, max_exercises, slot_bounds):
         LogSolver.agent_steps(f"{self.schedule_title}: Create the model exercise variables for the solver.")
 
         exercise_amount = len(exercises)
         weighted_exercise_indices = [i for i, exercise in enumerate(exercises[1:], start=1) if exercise["is_weighted"]]
 
         # Get the bounds for the phase components
-        volume_bounds, density_bounds, duration_bounds = pc_bounds["volume"], pc_bounds["density"], pc_bounds["duration"]
-
-        # Get the bounds for the exercises
-        base_strain_bounds = ex_bounds["base_strain"]
-        one_rep_max_bounds = ex_bounds["one_rep_max"]
-        training_weight_bounds = ex_bounds["training_weight"]
-        performance_bounds = ex_bounds["performance"]
+        volume_bounds, duration_bounds = pc_bounds["volume"], pc_bounds["duration"]
 
         # Define variables =====================================
         exercise_vars = {}
 
-        # Integer variable representing the exercise metrics chosen at exercise i.
-        exercise_vars["exercises"] = intvar_list_from_elements(model, max_exercises, "exercise", 1, (exercise_amount - 1))
-        exercise_vars["base_strain"] = intvar_list_from_elements(model, max_exercises, "base_strain", base_strain_bounds["min"], base_strain_bounds["max"])
-        exercise_vars["one_rep_max"] = intvar_list_from_elements(model, max_exercises, "one_rep_max", one_rep_max_bounds["min"], one_rep_max_bounds["max"])
-        exercise_vars["training_weight"] = intvar_list_from_elements(model, max_exercises, "training_weight", 0, training_weight_bounds["max"])
-        exercise_vars["training_weight_scaled"] = intvar_list_from_elements(model, max_exercises, "training_weight_scaled", 0, training_weight_bounds["max"] * 100)
-        exercise_vars["volume"] = intvar_list_from_elements(model, max_exercises, "volume", volume_bounds["min"], volume_bounds["max"])
-        exercise_vars["density"] = intvar_list_from_elements(model, max_exercises, "density", density_bounds["min"], density_bounds["max"])
-        exercise_vars["performance"] = intvar_list_from_elements(model, max_exercises, "performance", performance_bounds["min"], performance_bounds["max"])
+        # Integer variable representing the exercise metrics chosen at exercise i, within the bounds of the slot.
+        exercise_vars["exercises"] = intvar_list_from_values(model, [bounds["exercises"] for bounds in slot_bounds], "exercise")
+        for metric in ["base_strain", "one_rep_max", "training_weight", "training_weight_scaled", "volume", "density", "performance"]:
+            exercise_vars[metric] = intvar_list_from_bounds(model, [bounds[metric] for bounds in slot_bounds], metric)
 
         # Scale down the true training weight.
         for training_weight_var, training_weight_scaled_var in zip(exercise_vars["training_weight"], exercise_vars["training_weight_scaled"]):
             model.AddDivisionEquality(training_weight_var, training_weight_scaled_var, 100)
 
-        exercise_vars["base_effort"] = declare_effort_vars(model, max_exercises, ex_bounds, phase_component_ids, phase_components, pc_vars["seconds_per_exercise"], pc_vars["reps"], pc_vars["sets"], pc_vars["intensity"], exercise_vars["base_strain"], pc_vars["rest"], name="base_strained")
-        exercise_vars["working_effort"] = declare_effort_vars(model, max_exercises, ex_bounds, phase_component_ids, phase_components, pc_vars["seconds_per_exercise"], pc_vars["reps"], pc_vars["sets"], pc_vars["intensity"], exercise_vars["base_strain"], name="working_strained")
+        exercise_vars["base_effort"] = declare_effort_vars(model, max_exercises, slot_bounds, phase_component_ids, phase_components, pc_vars["seconds_per_exercise"], pc_vars["reps"], pc_vars["sets"], pc_vars["intensity"], exercise_vars["base_strain"], pc_vars["rest"], name="base_strained")
+        exercise_vars["working_effort"] = declare_effort_vars(model, max_exercises, slot_bounds, phase_component_ids, phase_components, pc_vars["seconds_per_exercise"], pc_vars["reps"], pc_vars["sets"], pc_vars["intensity"], exercise_vars["base_strain"], name="working_strained")
 
         # Boolean variable representing whether exercise i is weighted.
         exercise_vars["weighted_exercises"] = [
@@ -230,11 +277,12 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
                             items = exercises, 
                             entry_vars = exercise_vars["exercises"], 
                             number_of_entries = max_exercises, 
-                            used_vars = exercise_vars["used_exercises"])
+                            used_vars = exercise_vars["used_exercises"], 
+                            compact = self.compact_formulation)
         return exercise_vars
 
 
-    def apply_model_constraints_2(self, constraints, model, phase_component_ids, general_exercise_ids, phase_components, pc_vars, pc_bounds, exercises, exercise_vars, ex_bounds, max_exercises, workout_availability, projected_duration):
+    def apply_model_constraints_2(self, constraints, model, switches, phase_component_ids, general_exercise_ids, phase_components, pc_vars, pc_bounds, exercises, exercise_vars, ex_bounds, max_exercises, workout_availability, projected_duration):
         LogSolver.agent_steps(f"{self.schedule_title}: Apply model constraints for Second Step.")
 
         # Apply active constraints ======================================
@@ -245,27 +293,31 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         pc_vars["duration_difference_penalty"] = - (sum(pc_vars["duration"]) - projected_duration)
 
         # Constraint: The base strain of an exercise may only be equal to the base strain allowed for the exercise.
-        if constraints["base_strain_equals"]:
+        with switches.guard("base_strain_equals"):
             entries_equal(model = model, 
                           items = exercises, 
                           key="base_strain", 
                           number_of_entries = max_exercises, 
                           used_vars = exercise_vars["used_exercises"], 
-                          duration_vars = exercise_vars["base_strain"])
-            logs += "- Base strain equal to base strain allowed for exercise applied.\n"
+                          duration_vars = exercise_vars["base_strain"], 
+                          compact = self.compact_formulation)
+            if constraints["base_strain_equals"]:
+                logs += "- Base strain equal to base strain allowed for exercise applied.\n"
 
         # Constraint: The 1RM of an exercise may only be equal to the one rep max allowed for the exercise.
-        if constraints["one_rep_max_equals"]:
+        with switches.guard("one_rep_max_equals"):
             entries_equal(model = model, 
                           items = exercises, 
                           key="one_rep_max", 
                           number_of_entries = max_exercises, 
                           used_vars = exercise_vars["used_exercises"], 
-                          duration_vars = exercise_vars["one_rep_max"])
-            logs += "- One rep max equal to one rep max allowed for exercise applied.\n"
+                          duration_vars = exercise_vars["one_rep_max"], 
+                          compact = self.compact_formulation)
+            if constraints["one_rep_max_equals"]:
+                logs += "- One rep max equal to one rep max allowed for exercise applied.\n"
 
         # Constraint: Use only allowed exercises
-        if constraints["use_allowed_exercises"]:
+        with switches.guard("use_allowed_exercises"):
             for pc_index, ge_index, exercise_var in zip(phase_component_ids, general_exercise_ids, exercise_vars["exercises"]):
                 pc = phase_components[pc_index]
                 allowed_exercises = correct_allowed_exercises(
@@ -277,18 +329,20 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
                     model = model, 
                     required_items = allowed_exercises, 
                     entry_vars = [exercise_var])
-            logs += "- Only use allowed exercises applied.\n"
+            if constraints["use_allowed_exercises"]:
+                logs += "- Only use allowed exercises applied.\n"
 
         # Constraint: All components must have the same number of sets.
-        if constraints["vertical_loading"]:
+        with switches.guard("vertical_loading"):
             non_warmup_pc_indices = [i for i, pc in enumerate(phase_components) if not pc["is_warmup"]]
             non_warmup_exercise_indices = [i for i, pc in enumerate(phase_component_ids) if pc in non_warmup_pc_indices]
             non_warmup_sets = [pc_vars["sets"][i] for i in non_warmup_exercise_indices]
             ensure_all_vars_equal(model, non_warmup_sets)
-            logs += "- All non warm-up exercises have the same number of sets applied.\n"
+            if constraints["vertical_loading"]:
+                logs += "- All non warm-up exercises have the same number of sets applied.\n"
 
         # Constraint: The resistance components must have the same number of sets.
-        if constraints["resistances_have_equal_sets"]:
+        with switches.guard("resistances_have_equal_sets"):
             resistance_phase_components = {}
             for i, phase_component in enumerate(phase_components):
                 if phase_component["component_name"].lower() == "resistance":
@@ -296,30 +350,34 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
             for _, value in resistance_phase_components.items():
                 indices_to_be_equal = [i for i, val in enumerate(phase_component_ids) if val in value]
                 ensure_all_vars_equal(model, [pc_vars["sets"][i] for i in indices_to_be_equal])
-            logs += "- All resistance exercises have the same number of sets applied.\n"
+            if constraints["resistances_have_equal_sets"]:
+                logs += "- All resistance exercises have the same number of sets applied.\n"
 
         # Constraint: The resistance components must have the same number of exercises for each bodypart.
-        if constraints["resistances_have_equal_counts"]:
-            logs += "- All resistance exercises have the same number of exercises for each bodypart.\n"
+        with switches.guard("resistances_have_equal_counts"):
+            if constraints["resistances_have_equal_counts"]:
+                logs += "- All resistance exercises have the same number of exercises for each bodypart.\n"
 
         # Constraint: Ensure each exercise only appears once in the schedule
-        if constraints["no_duplicate_exercises"]:
+        with switches.guard("no_duplicate_exercises"):
             required_phase_components = list(range(1, len(exercises)))
             no_repeated_items(model = model, 
                               required_items = required_phase_components, 
                               used_vars = exercise_vars["used_exercises"])
-            logs += "- No duplicate exercises constraint applied.\n"
+            if constraints["no_duplicate_exercises"]:
+                logs += "- No duplicate exercises constraint applied.\n"
 
         # Constraint: The desired metric of an exercise must be an increase from the current metric.
         exercise_vars["performance_increase_penalty"] = None
         penalty = 100
-        if constraints["exercise_metric_increase"]:
+        with switches.guard("exercise_metric_increase"):
             performance_increase_conditions = encourage_increase_for_subcomponent(model, exercises, phase_component_ids, exercise_vars["used_exercises"], exercise_vars["performance"], ex_bounds["performance"]["max"])
             exercise_vars["performance_increase_penalty"] = [
                 penalty * i
                 for i in performance_increase_conditions
             ]
-            logs += "- Exercise metric increase constraint applied.\n"
+            if constraints["exercise_metric_increase"]:
+                logs += "- Exercise metric increase constraint applied.\n"
         return logs
 
     def effort_strain_as_sum(self, model, pc_vars, exercise_vars, exercise_bounds, max_exercises, workout_availability):
@@ -329,8 +387,8 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         max_strain_scaled = exercise_bounds["max_strain"]
 
         # SOLUTION 2
-        total_working_effort = model.NewIntVar(max_exercises * min_effort_scaled, max_exercises * max_effort_scaled, 'total_working_effort')
-        total_base_effort = model.NewIntVar(max_exercises * min_effort_scaled, max_exercises * max_effort_scaled, 'total_base_effort')
+        total_working_effort = model.NewIntVar(*total_effort_bounds(model, exercise_vars["working_effort"], max_exercises * min_effort_scaled, max_exercises * max_effort_scaled), 'total_working_effort')
+        total_base_effort = model.NewIntVar(*total_effort_bounds(model, exercise_vars["base_effort"], max_exercises * min_effort_scaled, max_exercises * max_effort_scaled), 'total_base_effort')
 
         model.Add(total_working_effort == sum(exercise_vars["working_effort"]))
         model.Add(total_base_effort == sum(exercise_vars["base_effort"]))
@@ -347,7 +405,8 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         model.Add(total_base_effort >= 1).OnlyEnforceIf(total_effort_is_0.Not())
 
         # Creates strain_time, which will hold the total strain over the workout.
-        strain_time = model.NewIntVar(0, 100 * max_exercises * workout_availability, 'strain_time')
+        # The working effort never exceeds the base effort, so the strain is at most 100.
+        strain_time = model.NewIntVar(0, min(100 * max_exercises * workout_availability, 100), 'strain_time')
         model.AddDivisionEquality(strain_time, 100 * total_working_effort, non_zero_total_effort)
         total_strain_to_minimize = strain_time
 
@@ -371,7 +430,7 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         strain_terms = []
 
         # Creates strain_time, which will hold the total strain over the workout.
-        strain_time = model.NewIntVar(0, 100 * max_exercises * max_strain_scaled, 'strain_time')
+        strain_time = model.NewIntVar(0, min(100 * max_exercises * max_strain_scaled, 100 * max_exercises), 'strain_time')
         for i, (base_effort_var, working_effort_var) in enumerate(zip(exercise_vars["base_effort"], exercise_vars["working_effort"])):
             # Create the entry for phase component's intensity
             # total_working_duration = (seconds_per_exercise*(1+.1*basestrain)* rep_count) * set_count
@@ -384,7 +443,7 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
             model.Add(base_effort_var == 0).OnlyEnforceIf(base_effort_is_0)
             model.Add(base_effort_var >= 1).OnlyEnforceIf(base_effort_is_0.Not())
 
-            strain = model.NewIntVar(0, 100 * max_strain_scaled, f'strain_{i}')
+            strain = model.NewIntVar(0, min(100 * max_strain_scaled, 100), f'strain_{i}')
             model.AddDivisionEquality(strain, 100 * working_effort_var, non_zero_base_effort_var)
 
             strain_terms.append(strain)
@@ -420,8 +479,9 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         """Build the optimization model with active constraints."""
         parameters = state["parameters"]
         constraints = state["constraints"]
-        model = cp_model.CpModel()
-        model_with_divided_strain = cp_model.CpModel()
+        model = new_model()
+        switches = ConstraintSwitches(model, solve_node="solve_2")
+        model_with_divided_strain = new_model()
 
         exercise_volume_improvement_percentage = parameters["exercise_volume_improvement_percentage"]
 
@@ -443,20 +503,44 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
 
         pc_bounds, exercise_bounds = get_bounds(phase_components[1:], exercises[1:])
 
-        pc_vars = self.create_model_pc_vars(model, phase_components, workout_availability, phase_component_ids, max_exercises)
-        exercise_vars = self.create_model_exercise_vars(model, phase_component_ids, phase_components, pc_vars, pc_bounds, exercises, max_exercises, exercise_bounds)
-
-        state["logs"] += self.apply_model_constraints_2(constraints, model, phase_component_ids, general_exercise_ids, phase_components, pc_vars, pc_bounds, exercises, exercise_vars, exercise_bounds, max_exercises, workout_availability, projected_duration)
-        model_with_divided_strain = model.clone()
+        # Each slot may only use the exercises allowed for it while the allowed exercises are enforced.
+        # The domains are then narrowed to those exercises, so relaxing the constraint requires the model to be rebuilt.
+        all_exercises = list(range(1, len(exercises)))
+        slot_exercises = [all_exercises] * max_exercises
+        if constraints["use_allowed_exercises"]:
+            slot_exercises = [
+                correct_allowed_exercises(exercises, phase_components[pc_index]["allowed_exercises"], ge_index) or all_exercises
+                for pc_index, ge_index in zip(phase_component_ids, general_exercise_ids)]
+            switches.build_depends_on("use_allowed_exercises")
+
+        # The base strain and one rep max are narrowed to those of the slot's exercises only while they must equal them.
+        for name in ["base_strain_equals", "one_rep_max_equals"]:
+            if constraints[name]:
+                switches.build_depends_on(name)
+        slot_bounds = get_slot_bounds(
+            phase_components, exercises, phase_component_ids, slot_exercises, pc_bounds, exercise_bounds, 
+            narrow_base_strain=constraints["base_strain_equals"], 
+            narrow_one_rep_max=constraints["one_rep_max_equals"])
+
+        pc_vars = self.create_model_pc_vars(model, phase_components, workout_availability, phase_component_ids, max_exercises, slot_bounds)
+        exercise_vars = self.create_model_exercise_vars(model, phase_component_ids, phase_components, pc_vars, pc_bounds, exercises, max_exercises, slot_bounds)
+
+        state["logs"] += self.apply_model_constraints_2(constraints, model, switches, phase_component_ids, general_exercise_ids, phase_components, pc_vars, pc_bounds, exercises, exercise_vars, exercise_bounds, max_exercises, workout_availability, projected_duration)
+        switches.apply(constraints)
+
+        # Warm start the solver with the exercises of the previous comparable workout. Hints are carried over by the clone.
+        if parameters["solution_hints"]:
+            hint_exercise_slots(model, exercise_vars, pc_vars, phase_component_ids, phase_components, exercises, parameters["solution_hints"])
+
+        model_with_divided_strain = switches.clone_model()
         state["logs"] += self.apply_model_objective_2(constraints, model, model_with_divided_strain, pc_vars, pc_bounds, exercise_vars, exercise_bounds, max_exercises, workout_availability)
 
-        return {"opt_model": (model, model_with_divided_strain, phase_component_ids, exercise_vars, pc_vars)}
-
-    def solve_model_node(self, state: State, config=None) -> dict:
-        LogSolver.agent_steps(f"{self.schedule_title}: Solving Model For Second Step")
+        return {"opt_model": (model, model_with_divided_strain, phase_component_ids, exercise_vars, pc_vars), "constraint_switches": switches}
 
-        """Solve model and record relaxation attempt results."""
-        model, model_with_divided_strain, phase_component_vars, ex_vars, pc_vars = state["opt_model"]
+    # Read the schedule from the values of the solver (or of a solution callback).
+    # The scale of the strain depends on which of the models (summed or divided strain) produced the values.
+    def extract_solution(self, solver, state: State, status, model_index=0):
+        _, _, phase_component_vars, ex_vars, pc_vars = state["opt_model"]
         exercise_vars, base_strain_vars, one_rep_max_vars, training_weight_vars, is_weighted_vars, volume_vars, density_vars, performance_vars = ex_vars["exercises"], ex_vars["base_strain"], ex_vars["one_rep_max"], ex_vars["training_weight"], ex_vars["weighted_exercises"], ex_vars["volume"], ex_vars["density"], ex_vars["performance"]
         seconds_per_exercise_vars, reps_vars, sets_vars, rest_vars, intensity_vars, duration_vars, working_duration_vars = pc_vars["seconds_per_exercise"], pc_vars["reps"], pc_vars["sets"], pc_vars["rest"], pc_vars["intensity"], pc_vars["duration"], pc_vars["working_duration"]
         base_effort_vars, working_effort_vars = ex_vars["base_effort"], ex_vars["working_effort"]
@@ -471,82 +555,100 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
         max_exercises = len(exercise_vars)
         workout_availability = parameters["availability"]
 
-        solver = cp_model.CpSolver()
-        solver.parameters.num_search_workers = 24
-        solver.parameters.max_time_in_seconds = ortools_solver_time_in_seconds
-        # solver.parameters.log_search_progress = True
-        status = self._solve_and_time_solver(solver, model)
-        max_strain_calc = 100 * max_exercises * workout_availability
+        if model_index == 0:
+            max_strain_calc = 100 * max_exercises * workout_availability
+        else:
+            max_strain_calc = max_exercises * max_strain_scaled
+
+        strain_ratio = duration = working_duration = base_effort = working_effort = 0
+        schedule = []
+        # Each day in the microcycle
+        for i in range(len(duration_vars)):
+            phase_component = phase_components[phase_component_vars[i]]
+
+            # Ensure that the phase component is active.
+            duration_vars_current = solver.Value(duration_vars[i])
+            working_duration_vars_current = solver.Value(working_duration_vars[i])
+            base_effort_vars_current = solver.Value(base_effort_vars[i])
+            working_effort_vars_current = solver.Value(working_effort_vars[i])
+
+            schedule.append((
+                i, 
+                solver.Value(exercise_vars[i]),                                     # Index of the exercise chosen.
+                phase_component_vars[i],                                            # Index of the phase component chosen.
+                phase_component["component_id"],                                    # ID of the component for the phase component chosen.
+                phase_component["subcomponent_id"],                                 # ID of the subcomponent for the phase component chosen.
+                phase_component["bodypart_id"],                                     # ID of the bodypart for the phase component chosen.
+                solver.Value(base_strain_vars[i]),                                  # Base strain of the exercise chosen.
+                solver.Value(seconds_per_exercise_vars[i]),                         # Seconds per exercise of the exercise chosen.
+                solver.Value(reps_vars[i]),                                         # Reps of the exercise chosen.
+                solver.Value(sets_vars[i]),                                         # Sets of the exercise chosen.
+                solver.Value(rest_vars[i]) * 5,                                     # Rest of the exercise chosen.
+                solver.Value(intensity_vars[i]),                                    # Intensity of the exercise chosen.
+                solver.Value(one_rep_max_vars[i]),                                  # 1RM of the exercise chosen. Scaled down due to scaling up of intensity.
+                solver.Value(training_weight_vars[i]),                              # Training weight of the exercise chosen. Scaled down due to scaling up of intensity AND training weight.
+                solver.Value(is_weighted_vars[i]),                                  # Whether the exercise chosen was weighted.
+                solver.Value(volume_vars[i]),                                       # Volume of the exercise chosen.
+                round(solver.Value(density_vars[i]) / 100, 2),                      # Density of the exercise chosen. Scaled down due to scaling up division.
+                round((solver.Value(performance_vars[i]) / 100), 2),                # Performance of the exercise chosen. Scaled down due to scaling up of intensity AND training weight.
+                duration_vars_current,                                              # Duration of the exercise chosen.
+                working_duration_vars_current,                                      # Working duration of the exercise chosen.
+            ))
+            duration += duration_vars_current
+            working_duration += working_duration_vars_current
+
+            base_effort += base_effort_vars_current
+            working_effort += working_effort_vars_current
+
+            strain_ratio += working_effort_vars_current/base_effort_vars_current
+        # schedule = sorted(schedule, key=lambda x: (x[3], x[5], x[4]))
+        return {
+            "schedule": schedule,
+            "duration": duration,
+            "working_duration": working_duration,
+            "base_effort": base_effort,
+            "working_effort": working_effort,
+            "strain_ratio": working_duration/duration,
+            "strain_calc": solver.Value(ex_vars["strain_time"]),
+            "max_strain_calc": max_strain_calc,
+            "status": status
+        }
 
-        # Extending time allowed for the agent to 10 seconds.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=10)
+    def solve_model_node(self, state: State, config=None) -> dict:
+        LogSolver.agent_steps(f"{self.schedule_title}: Solving Model For Second Step")
 
-        # Extending time allowed for the agent to 1 minute.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=60)
+        """Solve model and record relaxation attempt results."""
+        model, model_with_divided_strain, phase_component_vars, ex_vars, pc_vars = state["opt_model"]
 
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=(10 * 60), message_end="Solving with strain divided.")
-            max_strain_calc = max_exercises * max_strain_scaled
+        # Race the summed and divided strain models against each other.
+        if ortools_solver_portfolio:
+            status, solver, model_index = self._solve_portfolio([model, model_with_divided_strain], state=state)
+        else:
+            model_index = 0
+            solver = cp_model.CpSolver()
+            solver.parameters.num_search_workers = search_workers(24)
+            self._apply_time_budget(solver, model)
+            # solver.parameters.log_search_progress = True
+            status = self._solve_and_time_solver(solver, model, state)
+
+            # Extending time allowed for the agent to 10 seconds.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=10, state=state)
+
+            # Extending time allowed for the agent to 1 minute.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=60, state=state)
+
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=(10 * 60), message_end="Solving with strain divided.", state=state)
+                model_index = 1
 
         state["logs"] += f"\nSolver status: {status}\n"
         state["logs"] += f"Conflicts: {solver.NumConflicts()}, Branches: {solver.NumBranches()}\n"
 
         if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            strain_ratio = duration = working_duration = base_effort = working_effort = 0
-            schedule = []
-            # Each day in the microcycle
-            for i in range(len(duration_vars)):
-                phase_component = phase_components[phase_component_vars[i]]
-
-                # Ensure that the phase component is active.
-                duration_vars_current = solver.Value(duration_vars[i])
-                working_duration_vars_current = solver.Value(working_duration_vars[i])
-                base_effort_vars_current = solver.Value(base_effort_vars[i])
-                working_effort_vars_current = solver.Value(working_effort_vars[i])
-
-                schedule.append((
-                    i, 
-                    solver.Value(exercise_vars[i]),                                     # Index of the exercise chosen.
-                    phase_component_vars[i],                                            # Index of the phase component chosen.
-                    phase_component["component_id"],                                    # ID of the component for the phase component chosen.
-                    phase_component["subcomponent_id"],                                 # ID of the subcomponent for the phase component chosen.
-                    phase_component["bodypart_id"],                                     # ID of the bodypart for the phase component chosen.
-                    solver.Value(base_strain_vars[i]),                                  # Base strain of the exercise chosen.
-                    solver.Value(seconds_per_exercise_vars[i]),                         # Seconds per exercise of the exercise chosen.
-                    solver.Value(reps_vars[i]),                                         # Reps of the exercise chosen.
-                    solver.Value(sets_vars[i]),                                         # Sets of the exercise chosen.
-                    solver.Value(rest_vars[i]) * 5,                                     # Rest of the exercise chosen.
-                    solver.Value(intensity_vars[i]),                                    # Intensity of the exercise chosen.
-                    solver.Value(one_rep_max_vars[i]),                                  # 1RM of the exercise chosen. Scaled down due to scaling up of intensity.
-                    solver.Value(training_weight_vars[i]),                              # Training weight of the exercise chosen. Scaled down due to scaling up of intensity AND training weight.
-                    solver.Value(is_weighted_vars[i]),                                  # Whether the exercise chosen was weighted.
-                    solver.Value(volume_vars[i]),                                       # Volume of the exercise chosen.
-                    round(solver.Value(density_vars[i]) / 100, 2),                      # Density of the exercise chosen. Scaled down due to scaling up division.
-                    round((solver.Value(performance_vars[i]) / 100), 2),                # Performance of the exercise chosen. Scaled down due to scaling up of intensity AND training weight.
-                    duration_vars_current,                                              # Duration of the exercise chosen.
-                    working_duration_vars_current,                                      # Working duration of the exercise chosen.
-                ))
-                duration += duration_vars_current
-                working_duration += working_duration_vars_current
-
-                base_effort += base_effort_vars_current
-                working_effort += working_effort_vars_current
-
-                strain_ratio += working_effort_vars_current/base_effort_vars_current
-            # schedule = sorted(schedule, key=lambda x: (x[3], x[5], x[4]))
-            solution = {
-                "schedule": schedule,
-                "duration": duration,
-                "working_duration": working_duration,
-                "base_effort": base_effort,
-                "working_effort": working_effort,
-                "strain_ratio": working_duration/duration,
-                "strain_calc": solver.Value(ex_vars["strain_time"]),
-                "max_strain_calc": max_strain_calc,
-                "status": status
-            }
+            solution = self.extract_solution(solver, state, status, model_index)
+            duration, working_duration = solution["duration"], solution["working_duration"]
 
             # Record successful attempt
             attempt = RelaxationAttempt(
@@ -806,12 +908,22 @@ class ExerciseAgent(ExercisePhaseComponentAgent):
             }
         )
 
-        builder.add_edge("analyze", "build_1")
+        # Relaxations that only flip switches go straight back to solving the stage that failed.
+        builder.add_conditional_edges(
+            "analyze",
+            self.relaxation_router,
+            {
+                "solve": "solve_1",
+                "solve_2": "solve_2",
+                "build": "build_1"
+            }
+        )
 
         builder.add_edge("format", END)
 
         return builder.compile(checkpointer=False)
 
+@cached_solver("exercise")
 def Main(parameters=None, constraints=None):
     agent = ExerciseAgent(parameters, constraints)
     result = agent.run()
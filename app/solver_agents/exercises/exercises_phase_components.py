@@ -1,4 +1,4 @@
-from config import ortools_solver_time_in_seconds, SchedulerLoggingConfig
+from config import ortools_solver_portfolio, ortools_solver_assignment_tables, SchedulerLoggingConfig, CompactFormulationConfig
 from logging_config import LogSolver
 from collections import defaultdict
 from ortools.sat.python import cp_model
@@ -26,6 +26,10 @@ from app.solver_agents.exercises.exercise_model_specific_constraints import (
     retrieve_indication_of_increase)
 
 from app.solver_agents.exercises.exercise_model_specific_constraints import create_duration_var
+from app.solver_agents.constraint_switches import ConstraintSwitches
+from app.solver_agents.model_tags import new_model
+from app.solver_agents.solver_cache import cached_solver
+from app.solver_agents.solver_farm import search_workers
 
 from app.solver_agents.base_agent import BaseRelaxationAttempt, BaseAgent, BaseAgentState
 from app.utils.longest_string import longest_string_size_for_key
@@ -73,7 +77,8 @@ def declare_duration_vars(model, max_entries, max_duration, seconds_per_exercise
             reps=reps_vars[i], 
             sets=sets_vars[i], 
             rest=rest_vars[i] if rest_vars is not None else 0,
-            name=name)
+            name=name,
+            use_tables=ortools_solver_assignment_tables)
         for i in range(max_entries)]
 
 def encourage_increase_for_subcomponent(model, pcs, used_pc_vars, performance_vars, max_performance):
@@ -89,6 +94,9 @@ class ExercisePhaseComponentAgent(BaseAgent):
     schedule_title = "Exercise Phase Component Subagent"
     available_constraints = available_constraints
 
+    # Whether the entries are linked to the items with the compact formulation.
+    compact_formulation = CompactFormulationConfig.exercises
+
     def __init__(self, parameters={}, constraints={}):
         super().__init__()
         self.initial_state["parameter_input"]={
@@ -108,7 +116,8 @@ class ExercisePhaseComponentAgent(BaseAgent):
             "exercise_volume_improvement_percentage": 0,
             "phase_components": [],
             "possible_exercises": [],
-            "possible_general_exercises": []
+            "possible_general_exercises": [],
+            "solution_hints": []
         }
 
         # Define all constraints with their active status
@@ -229,7 +238,8 @@ class ExercisePhaseComponentAgent(BaseAgent):
                             items = phase_components, 
                             entry_vars = agent_vars["phase_components"], 
                             number_of_entries = max_exercises, 
-                            used_vars = agent_vars["used_pcs"])
+                            used_vars = agent_vars["used_pcs"], 
+                            compact = self.compact_formulation)
 
         # Links the general exercises variables and the general exercises via the used general exercises variables.
         for general_exercise_var, used_general_exercises_var in zip(agent_vars["general_exercises"], agent_vars["used_general_exercises"]):
@@ -250,7 +260,7 @@ class ExercisePhaseComponentAgent(BaseAgent):
                                       active_entry_vars = agent_vars["active_exercises"])
         return agent_vars
     
-    def apply_model_constraints(self, constraints, model, agent_vars, phase_components, general_exercise_amount, workout_availability, max_exercises, projected_duration):
+    def apply_model_constraints(self, constraints, model, switches, agent_vars, phase_components, general_exercise_amount, workout_availability, max_exercises, projected_duration):
         LogSolver.agent_steps(f"{self.schedule_title}: Apply model constraints.")
 
         # Apply active constraints ======================================
@@ -264,7 +274,7 @@ class ExercisePhaseComponentAgent(BaseAgent):
         pc_use_penalty_scale = 2
 
         # Constraint: Use all required phases at least once
-        if constraints["use_all_phase_components"]:
+        with switches.guard("use_all_phase_components"):
             required_phase_components = list(range(1, len(phase_components)))
 
             phase_component_use_conditionals = use_all_required_items(model = model, 
@@ -275,81 +285,94 @@ class ExercisePhaseComponentAgent(BaseAgent):
                 pc_use_penalty_scale * (1-i)
                 for i in phase_component_use_conditionals
             ]
-            logs += "- Use every required phase at least once applied.\n"
+            if constraints["use_all_phase_components"]:
+                logs += "- Use every required phase at least once applied.\n"
 
         # Constraint: Use only allowed exercises
-        if constraints["use_allowed_exercises"]:
+        with switches.guard("use_allowed_exercises"):
             for general_exercise_var, used_pcs_var in zip(agent_vars["general_exercises"], agent_vars["used_pcs"]):
                 for pc, used_pc_var in zip(phase_components[1:], used_pcs_var[1:]):
                     only_use_required_items(model = model, 
                                             required_items = pc["allowed_general_exercises"], 
                                             entry_vars = [general_exercise_var], 
                                             conditions = [used_pc_var])
-            logs += "- Only use allowed exercises applied.\n"
+            if constraints["use_allowed_exercises"]:
+                logs += "- Only use allowed exercises applied.\n"
 
         # Constraint: Ensure each exercise only appears once in the schedule
-        if constraints["no_duplicate_general_exercises"]:
+        with switches.guard("no_duplicate_general_exercises"):
             required_phase_components = list(range(1, general_exercise_amount+1))
             no_repeated_items(model = model, 
                               required_items = required_phase_components, 
                               used_vars = agent_vars["used_general_exercises"])
-            logs += "- No duplicate general exercises constraint applied.\n"
+            if constraints["no_duplicate_general_exercises"]:
+                logs += "- No duplicate general exercises constraint applied.\n"
 
         # Constraint: The seconds per exercise of a phase component may only be between the minimum and maximum seconds per exercise allowed.
-        if constraints["secs_equals"]:
+        with switches.guard("secs_equals"):
             entries_equal(model = model, 
                           items = phase_components, 
                           key="seconds_per_exercise", 
                           number_of_entries = max_exercises, 
                           used_vars = agent_vars["used_pcs"], 
-                          duration_vars = agent_vars["seconds_per_exercise"])
-            logs += "- Seconds per exercise count is equal to the seconds per exercise applied.\n"
+                          duration_vars = agent_vars["seconds_per_exercise"], 
+                          compact = self.compact_formulation)
+            if constraints["secs_equals"]:
+                logs += "- Seconds per exercise count is equal to the seconds per exercise applied.\n"
 
         # Constraint: The reps of a phase component may only be a number of reps between the minimum and maximum reps allowed.
-        if constraints["reps_within_min_max"]:
+        with switches.guard("reps_within_min_max"):
             entries_within_min_max(model = model, 
                                    items = phase_components, 
                                    minimum_key="reps_min", 
                                    maximum_key="reps_max",
                                    number_of_entries = max_exercises, 
                                    used_vars = agent_vars["used_pcs"], 
-                                   duration_vars = agent_vars["reps"])
-            logs += "- Reps count within min and max allowed reps applied.\n"
+                                   duration_vars = agent_vars["reps"], 
+                                   compact = self.compact_formulation)
+            if constraints["reps_within_min_max"]:
+                logs += "- Reps count within min and max allowed reps applied.\n"
 
         # Constraint: The sets of a phase component may only be a number of sets between the minimum and maximum sets allowed.
-        if constraints["sets_within_min_max"]:
+        with switches.guard("sets_within_min_max"):
             entries_within_min_max(model = model, 
                                    items = phase_components, 
                                    minimum_key="sets_min", 
                                    maximum_key="sets_max",
                                    number_of_entries = max_exercises, 
                                    used_vars = agent_vars["used_pcs"], 
-                                   duration_vars = agent_vars["sets"])
-            logs += "- Sets count within min and max allowed sets applied.\n"
+                                   duration_vars = agent_vars["sets"], 
+                                   compact = self.compact_formulation)
+            if constraints["sets_within_min_max"]:
+                logs += "- Sets count within min and max allowed sets applied.\n"
 
         # Constraint: The rest of a phase component may only be a number of rest between the minimum and maximum rest allowed.
-        if constraints["rest_within_min_max"]:
+        with switches.guard("rest_within_min_max"):
             entries_within_min_max(model = model, 
                                    items = phase_components, 
                                    minimum_key="rest_min", 
                                    maximum_key="rest_max",
                                    number_of_entries = max_exercises, 
                                    used_vars = agent_vars["used_pcs"], 
-                                   duration_vars = agent_vars["rest"])
-            logs += "- Rest count within min and max allowed rest applied.\n"
+                                   duration_vars = agent_vars["rest"], 
+                                   compact = self.compact_formulation)
+            if constraints["rest_within_min_max"]:
+                logs += "- Rest count within min and max allowed rest applied.\n"
 
         # Constraint: All non warmup components must have the same number of sets.
-        if constraints["vertical_loading"]:
+        with switches.guard("vertical_loading"):
             ensure_all_vars_equal(model, agent_vars["sets"], agent_vars["non_warmup"])
-            logs += "- All non-warmup exercises have the same number of sets applied.\n"
+            if constraints["vertical_loading"]:
+                logs += "- All non-warmup exercises have the same number of sets applied.\n"
 
         # Constraint: The resistance components must have the same number of sets.
-        if constraints["resistances_have_equal_sets"]:
+        with switches.guard("resistances_have_equal_sets"):
             resistances_of_same_bodypart_have_equal_sets(model, phase_components, agent_vars["used_pcs"], agent_vars["sets"])
-            logs += "- All resistance exercises have the same number of sets applied.\n"
+            if constraints["resistances_have_equal_sets"]:
+                logs += "- All resistance exercises have the same number of sets applied.\n"
 
         # Constraint: The resistance components must have the same number of exercises for each bodypart.
-        if constraints["resistances_have_equal_counts"]:
+        with switches.guard("resistances_have_equal_counts"):
             resistance_phase_components = {}
             for i, phase_component in enumerate(phase_components):
                 if phase_component["component_name"].lower() == "resistance":
@@ -357,18 +380,21 @@ class ExercisePhaseComponentAgent(BaseAgent):
             for _, value in resistance_phase_components.items():
                 ensure_all_vars_equal(model, [agent_vars["pc_count"][i] for i in value])
             # resistances_of_same_bodypart_have_equal_sets(model, phase_components, agent_vars["used_pcs"], agent_vars["pc_count"])
-            logs += "- All resistance exercises have the same number of exercises for each bodypart.\n"
+            if constraints["resistances_have_equal_counts"]:
+                logs += "- All resistance exercises have the same number of exercises for each bodypart.\n"
 
         # Constraint: The duration of a phase component may only be a number between the minimum and maximum duration allowed.
-        if constraints["duration_within_min_max"]:
+        with switches.guard("duration_within_min_max"):
             entries_within_min_max(model = model, 
                                    items = phase_components, 
                                    minimum_key="duration_min", 
                                    maximum_key="duration_max",
                                    number_of_entries = max_exercises, 
                                    used_vars = agent_vars["used_pcs"], 
-                                   duration_vars = agent_vars["duration"])
-            logs += "- Duration amount within min and max allowed rest applied.\n"
+                                   duration_vars = agent_vars["duration"], 
+                                   compact = self.compact_formulation)
+            if constraints["duration_within_min_max"]:
+                logs += "- Duration amount within min and max allowed rest applied.\n"
 
         # Add symmetry breaking and tight bounds before applying main constraints
         symmetry_breaking_constraints(model, agent_vars["phase_components"], agent_vars["active_exercises"])
@@ -381,7 +407,7 @@ class ExercisePhaseComponentAgent(BaseAgent):
                                                   name = "pc")
 
         # Constraint: The numer of exercises may only be a number of exercises between the minimum and maximum exercises per bodypart allowed.
-        if constraints["exercises_per_bodypart_within_min_max"]:
+        with switches.guard("exercises_per_bodypart_within_min_max"):
             required_phase_components = list(range(1, len(phase_components)))
             exercises_per_bodypart_within_min_max(model=model, 
                                                   required_items=required_phase_components, 
@@ -389,18 +415,20 @@ class ExercisePhaseComponentAgent(BaseAgent):
                                                   minimum_key="exercises_per_bodypart_workout_min", 
                                                   maximum_key="exercises_per_bodypart_workout_max", 
                                                   used_vars=agent_vars["used_pcs"])
-            logs += "- Exercises count within min and max allowed exercises applied (optimized).\n"
+            if constraints["exercises_per_bodypart_within_min_max"]:
+                logs += "- Exercises count within min and max allowed exercises applied (optimized).\n"
         
         # Constraint: The desired metric of an exercise must be an increase from the current metric.
         agent_vars["performance_increase_penalty"] = None
         penalty = 100
-        if constraints["exercise_metric_increase"]:
+        with switches.guard("exercise_metric_increase"):
             performance_increase_conditions = encourage_increase_for_subcomponent(model, phase_components, agent_vars["used_pcs"], agent_vars["performance"], max(pc["performance"] for pc in phase_components[1:]))
             agent_vars["performance_increase_penalty"] = [
                 penalty * i
                 for i in performance_increase_conditions
             ]
-            logs += "- Exercise metric increase constraint applied.\n"
+            if constraints["exercise_metric_increase"]:
+                logs += "- Exercise metric increase constraint applied.\n"
         return logs
     
     def duration_strain_as_sum(self, model, agent_vars, workout_availability, pc_bounds, min_exercises, max_exercises):
@@ -488,14 +516,10 @@ class ExercisePhaseComponentAgent(BaseAgent):
             logs += "- Minimizing the strain time used in workout.\n"
         return logs
 
-    def build_opt_model_node(self, state: State, config=None) -> dict:
-        LogSolver.agent_steps(f"{self.schedule_title}: Building Model For First Step")
-
-        """Build the optimization model with active constraints."""
-        parameters = state["parameters"]
-        constraints = state["constraints"]
-        model = cp_model.CpModel()
-        model_with_divided_strain = cp_model.CpModel()
+    # Build the summed and divided strain models of the first step for the parameters given.
+    def build_first_step_models(self, parameters, constraints):
+        model = new_model()
+        switches = ConstraintSwitches(model)
 
         phase_components = parameters["phase_components"]
         phase_component_amount = len(phase_components)
@@ -516,12 +540,21 @@ class ExercisePhaseComponentAgent(BaseAgent):
                                     "max": pc_bounds["volume"]["max"] * pc_bounds["density"]["max"]}
 
         agent_vars = self.create_model_vars(model, phase_components, workout_availability, phase_component_amount, general_exercise_amount, pc_bounds, min_exercises, max_exercises)
-        state["logs"] += self.apply_model_constraints(constraints, model, agent_vars, phase_components, general_exercise_amount, workout_availability, max_exercises, projected_duration)
+        logs = self.apply_model_constraints(constraints, model, switches, agent_vars, phase_components, general_exercise_amount, workout_availability, max_exercises, projected_duration)
+        switches.apply(constraints)
 
-        model_with_divided_strain = model.clone()
-        state["logs"] += self.app_model_objective(constraints, model, model_with_divided_strain, agent_vars, workout_availability, pc_bounds, min_exercises, max_exercises)
+        model_with_divided_strain = switches.clone_model()
+        logs += self.app_model_objective(constraints, model, model_with_divided_strain, agent_vars, workout_availability, pc_bounds, min_exercises, max_exercises)
+        return model, model_with_divided_strain, agent_vars, switches, logs
 
-        return {"opt_model": (model, model_with_divided_strain, agent_vars)}
+    def build_opt_model_node(self, state: State, config=None) -> dict:
+        LogSolver.agent_steps(f"{self.schedule_title}: Building Model For First Step")
+
+        """Build the optimization model with active constraints."""
+        model, model_with_divided_strain, agent_vars, switches, logs = self.build_first_step_models(state["parameters"], state["constraints"])
+        state["logs"] += logs
+
+        return {"opt_model": (model, model_with_divided_strain, agent_vars), "constraint_switches": switches}
 
     def sort_schedule(self, phase_components, schedule, component_i=1, subcomponent_i=2, bodypart_i=3):
         # Step 1: Create ordering for bodypart_id groups
@@ -546,12 +579,9 @@ class ExercisePhaseComponentAgent(BaseAgent):
 
         return sorted_schedule
 
-    def solve_model_node(self, state: State, config=None) -> dict:
-        LogSolver.agent_steps(f"{self.schedule_title}: Solving Model For First Step")
-
-        """Solve model and record relaxation attempt results."""
-        #return {"solution": "None"}
-        model, model_with_divided_strain, agent_vars = state["opt_model"]
+    # Read the schedule from the values of the solver (or of a solution callback).
+    def extract_solution(self, solver, state: State, status, model_index=0):
+        agent_vars = state["opt_model"][2]
         phase_component_vars, general_exercise_vars = agent_vars["phase_components"], agent_vars["general_exercises"]
         pc_count_vars, active_exercise_vars = agent_vars["pc_count"], agent_vars["active_exercises"]
         seconds_per_exercise_vars, reps_vars, sets_vars, rest_vars = agent_vars["seconds_per_exercise"], agent_vars["reps"], agent_vars["sets"], agent_vars["rest"]
@@ -562,73 +592,87 @@ class ExercisePhaseComponentAgent(BaseAgent):
         phase_components = state["parameters"]["phase_components"]
         general_exercises = state["parameters"]["possible_general_exercises"]
 
-        solver = cp_model.CpSolver()
-        solver.parameters.num_search_workers = 24
-        solver.parameters.max_time_in_seconds = ortools_solver_time_in_seconds
-        # solver.parameters.log_search_progress = True
-        status = self._solve_and_time_solver(solver, model)
+        strain_ratio = duration = working_duration = 0
+        schedule = []
+        # Each day in the microcycle
+        for i in range(len(duration_vars)):
+            # Ensure that the phase component is active.
+            if(solver.Value(active_exercise_vars[i])):
+                phase_component_var = solver.Value(phase_component_vars[i])
+                phase_component = phase_components[phase_component_var]
+                duration_vars_current = solver.Value(duration_vars[i])
+                working_duration_vars_current = solver.Value(working_duration_vars[i])
+                schedule.append((
+                    i, 
+                    phase_component_var, 
+                    solver.Value(general_exercise_vars[i]),                             # ID of the general exercise used.
+                    phase_component["component_id"],                                    # ID of the component for the phase component chosen.
+                    phase_component["subcomponent_id"],                                 # ID of the subcomponent for the phase component chosen.
+                    phase_component["bodypart_id"],                                     # ID of the bodypart for the phase component chosen.
+                    solver.Value(active_exercise_vars[i]), 
+                    solver.Value(seconds_per_exercise_vars[i]),                         # Seconds per exercise of the exercise chosen.
+                    solver.Value(reps_vars[i]),                                         # Reps of the exercise chosen.
+                    solver.Value(sets_vars[i]),                                         # Sets of the exercise chosen.
+                    solver.Value(rest_vars[i]) * 5,                                     # Rest of the exercise chosen.
+                    solver.Value(volume_vars[i]),                                       # Volume of the exercise chosen.
+                    round(solver.Value(density_vars[i]) / 100, 2),                      # Density of the exercise chosen. Scaled down due to scaling up division.
+                    round(solver.Value(performance_vars[i]) / 100, 2),                  # Performance of the exercise chosen. Scaled down due to scaling up of intensity AND training weight.
+                    not solver.Value(non_warmup_vars[i]),                               # Exercise chosen is a warmup.
+                    duration_vars_current,                                              # Duration of the exercise chosen.
+                    working_duration_vars_current,                                      # Working duration of the exercise chosen.
+                ))
+                duration += duration_vars_current
+                working_duration += working_duration_vars_current
+                strain_ratio += duration_vars_current/working_duration_vars_current
+        schedule = self.sort_schedule(phase_components, schedule, 2, 3, 4)
+        pc_count = [
+            solver.Value(pc_count_var)
+            for pc_count_var in pc_count_vars
+        ]
+        return {
+            "schedule": schedule,
+            "duration": duration,
+            "working_duration": working_duration,
+            "pc_count": pc_count,
+            "strain_ratio": strain_ratio,
+            "status": status
+        }
+
+    def solve_model_node(self, state: State, config=None) -> dict:
+        LogSolver.agent_steps(f"{self.schedule_title}: Solving Model For First Step")
+
+        """Solve model and record relaxation attempt results."""
+        #return {"solution": "None"}
+        model, model_with_divided_strain, agent_vars = state["opt_model"]
 
-        # Extending time allowed for the agent to 10 seconds.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=10)
+        # Race the summed and divided strain models against each other.
+        if ortools_solver_portfolio:
+            status, solver, _ = self._solve_portfolio([model, model_with_divided_strain], state=state)
+        else:
+            solver = cp_model.CpSolver()
+            solver.parameters.num_search_workers = search_workers(24)
+            self._apply_time_budget(solver, model)
+            # solver.parameters.log_search_progress = True
+            status = self._solve_and_time_solver(solver, model, state)
 
-        # Using the divided strain.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=None, message_end="Solving with strain divided.")
+            # Extending time allowed for the agent to 10 seconds.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model, new_max_time=10, state=state)
 
-        # Using the divided strain with extended time to 10 seconds.
-        if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=10, message_end="Solving with strain divided.")
+            # Using the divided strain.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=None, message_end="Solving with strain divided.", state=state)
+
+            # Using the divided strain with extended time to 10 seconds.
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                status = self._new_max_time_solve_and_time_solver(solver, model_with_divided_strain, new_max_time=10, message_end="Solving with strain divided.", state=state)
 
         state["logs"] += f"\nSolver status: {status}\n"
         state["logs"] += f"Conflicts: {solver.NumConflicts()}, Branches: {solver.NumBranches()}\n"
 
         if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            strain_ratio = duration = working_duration = 0
-            schedule = []
-            # Each day in the microcycle
-            for i in range(len(duration_vars)):
-                # Ensure that the phase component is active.
-                if(solver.Value(active_exercise_vars[i])):
-                    phase_component_var = solver.Value(phase_component_vars[i])
-                    phase_component = phase_components[phase_component_var]
-                    duration_vars_current = solver.Value(duration_vars[i])
-                    working_duration_vars_current = solver.Value(working_duration_vars[i])
-                    schedule.append((
-                        i, 
-                        phase_component_var, 
-                        solver.Value(general_exercise_vars[i]),                             # ID of the general exercise used.
-                        phase_component["component_id"],                                    # ID of the component for the phase component chosen.
-                        phase_component["subcomponent_id"],                                 # ID of the subcomponent for the phase component chosen.
-                        phase_component["bodypart_id"],                                     # ID of the bodypart for the phase component chosen.
-                        solver.Value(active_exercise_vars[i]), 
-                        solver.Value(seconds_per_exercise_vars[i]),                         # Seconds per exercise of the exercise chosen.
-                        solver.Value(reps_vars[i]),                                         # Reps of the exercise chosen.
-                        solver.Value(sets_vars[i]),                                         # Sets of the exercise chosen.
-                        solver.Value(rest_vars[i]) * 5,                                     # Rest of the exercise chosen.
-                        solver.Value(volume_vars[i]),                                       # Volume of the exercise chosen.
-                        round(solver.Value(density_vars[i]) / 100, 2),                      # Density of the exercise chosen. Scaled down due to scaling up division.
-                        round(solver.Value(performance_vars[i]) / 100, 2),                  # Performance of the exercise chosen. Scaled down due to scaling up of intensity AND training weight.
-                        not solver.Value(non_warmup_vars[i]),                               # Exercise chosen is a warmup.
-                        duration_vars_current,                                              # Duration of the exercise chosen.
-                        working_duration_vars_current,                                      # Working duration of the exercise chosen.
-                    ))
-                    duration += duration_vars_current
-                    working_duration += working_duration_vars_current
-                    strain_ratio += duration_vars_current/working_duration_vars_current
-            schedule = self.sort_schedule(phase_components, schedule, 2, 3, 4)
-            pc_count = [
-                solver.Value(pc_count_var)
-                for pc_count_var in pc_count_vars
-            ]
-            solution = {
-                "schedule": schedule,
-                "duration": duration,
-                "working_duration": working_duration,
-                "pc_count": pc_count,
-                "strain_ratio": strain_ratio,
-                "status": status
-            }
+            solution = self.extract_solution(solver, state, status)
+            strain_ratio, duration, working_duration = solution["strain_ratio"], solution["duration"], solution["working_duration"]
 
             # Record successful attempt
             attempt = RelaxationAttempt(
@@ -812,6 +856,7 @@ class ExercisePhaseComponentAgent(BaseAgent):
         result = graph.invoke(self.initial_state)
         return result
 
+@cached_solver("exercise_phase_component")
 def Main(parameters=None, constraints=None):
     agent = ExercisePhaseComponentAgent(parameters, constraints)
     result = agent.run()
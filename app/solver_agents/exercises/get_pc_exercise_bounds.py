@@ -1,3 +1,7 @@
+import numpy as np
+
+from app.utils.exercise_table import as_exercise_table
+
 def get_item_bounds(min_key, max_key, items):
     return {
             "min": min(item[min_key] for item in items),
@@ -16,13 +20,19 @@ def get_phase_component_bounds(phase_components):
         'working_duration': get_item_bounds("working_duration_min", "working_duration_max", phase_components)
     }
 
+# The bounds of a field of the exercises, from its column.
+def get_column_bounds(key, exercises):
+    min_value, max_value = _value_range(exercises.column(key))
+    return {"min": min_value, "max": max_value}
+
 def get_exercise_bounds(exercises):
+    exercises = as_exercise_table(exercises)
     return {
-        'base_strain': get_item_bounds("base_strain", "base_strain", exercises),
+        'base_strain': get_column_bounds("base_strain", exercises),
         'intensity': {"min": 1, "max": 100},
-        'one_rep_max': get_item_bounds("one_rep_max", "one_rep_max", exercises),
-        "duration": get_item_bounds("duration", "duration", exercises),
-        "working_duration": get_item_bounds("working_duration", "working_duration", exercises)
+        'one_rep_max': get_column_bounds("one_rep_max", exercises),
+        "duration": get_column_bounds("duration", exercises),
+        "working_duration": get_column_bounds("working_duration", exercises)
     }
 
 def get_bounds(phase_components, exercises):
@@ -67,3 +77,67 @@ def get_bounds(phase_components, exercises):
     exercise_bounds["max_strain"] = int(exercise_bounds["working_effort"]["max"] / exercise_bounds["effort"]["min"] * 100)
 
     return pc_bounds, exercise_bounds
+
+# The bounds narrowed to those implied for a single slot, keeping the original bounds if the two do not overlap.
+# Bounds that do not overlap mean the slot is infeasible, which is left for the constraints to prove so the relaxation can find the cause.
+def _narrow_bounds(bounds, min_value, max_value):
+    narrowed = {"min": max(bounds["min"], min_value), "max": min(bounds["max"], max_value)}
+    return narrowed if narrowed["min"] <= narrowed["max"] else dict(bounds)
+
+# The bounds of each slot of the exercise model, from the phase component of the slot and the exercises it may use.
+# Every bound is implied by the constraints that are always applied, so narrowing the domains to them removes no solutions.
+# The base strain and one rep max are only implied while they are constrained to equal those of the exercise, so they are only narrowed if asked.
+def get_slot_bounds(phase_components, exercises, phase_component_ids, slot_exercises, pc_bounds, exercise_bounds, narrow_base_strain=True, narrow_one_rep_max=True):
+    exercises = as_exercise_table(exercises)
+    is_weighted, base_strains, one_rep_maxes = exercises.column("is_weighted"), exercises.column("base_strain"), exercises.column("one_rep_max")
+    max_weights = exercises.max_weights()
+
+    slot_bounds = []
+    for pc_index, candidate_indices in zip(phase_component_ids, slot_exercises):
+        pc = phase_components[pc_index]
+        candidates = np.asarray(candidate_indices, dtype=np.int64)
+
+        # Intensity is only allowed if a weighted exercise is chosen.
+        max_intensity = min(pc["intensity_max"], exercise_bounds["intensity"]["max"]) if is_weighted[candidates].any() else 0
+        intensity = {"min": exercise_bounds["intensity"]["min"], "max": max_intensity}
+
+        base_strain = _narrow_bounds(exercise_bounds["base_strain"], *_value_range(base_strains[candidates])) if narrow_base_strain else dict(exercise_bounds["base_strain"])
+        one_rep_max = _narrow_bounds(exercise_bounds["one_rep_max"], *_value_range(one_rep_maxes[candidates])) if narrow_one_rep_max else dict(exercise_bounds["one_rep_max"])
+
+        # The training weight is the one rep max at the intensity chosen, and must be one of the weights available for the exercise.
+        max_training_weight_scaled = int((one_rep_maxes[candidates] * max_intensity).max())
+        max_training_weight = int(np.minimum(one_rep_maxes[candidates] * max_intensity // 100, max_weights[candidates]).max())
+        training_weight = _narrow_bounds({"min": 0, "max": exercise_bounds["training_weight"]["max"]}, 0, max_training_weight)
+        training_weight_scaled = _narrow_bounds({"min": 0, "max": exercise_bounds["training_weight"]["max"] * 100}, 0, max_training_weight_scaled)
+
+        # Volume is the reps and sets, multiplied by the training weight if one is used.
+        volume = _narrow_bounds(
+            pc_bounds["volume"],
+            pc["reps_min"] * pc["sets_min"],
+            pc["reps_max"] * pc["sets_max"] * max(training_weight["max"], 1))
+
+        # Density is the working duration over the duration, scaled up by 100.
+        min_density = 0 if pc["duration_min"] == 0 else 100 * pc["working_duration_min"] // pc["duration_max"]
+        max_density = 100 * pc["working_duration_max"] // max(pc["duration_min"], 1)
+        density = _narrow_bounds(pc_bounds["density"], min_density, max_density)
+
+        performance = _narrow_bounds(
+            exercise_bounds["performance"],
+            volume["min"] * density["min"],
+            volume["max"] * density["max"])
+
+        slot_bounds.append({
+            "exercises": list(candidate_indices),
+            "intensity": intensity,
+            "base_strain": base_strain,
+            "one_rep_max": one_rep_max,
+            "training_weight": training_weight,
+            "training_weight_scaled": training_weight_scaled,
+            "volume": volume,
+            "density": density,
+            "performance": performance
+        })
+    return slot_bounds
+
+def _value_range(values):
+    return int(values.min()), int(values.max())
@@ -0,0 +1,172 @@
+# Records the inputs and models of slow or infeasible solves so they can be replayed offline.
+# Replay a recording without the database with:
+#     python -m app.solver_agents.flight_recorder solver_recordings/<recording> [--repeat N] [--profile] [--models]
+from config import SolverFlightRecorderConfig
+from logging_config import LogSolver
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from importlib import import_module
+from threading import Lock
+from time import perf_counter
+import argparse
+import json
+import os
+import pickle
+
+from ortools.sat.python import cp_model
+
+# The recording that the solves started within the current context are added to.
+_flight_recording = ContextVar("solver_flight_recording", default=None)
+
+class FlightRecording:
+    """The inputs of a single solver job and the slow or infeasible models solved during it."""
+    def __init__(self, solver_main, parameters, constraints):
+        self.module_name = solver_main.__module__
+        self.function_name = solver_main.__name__
+
+        # The inputs are captured before the agent alters them, as the recording should replay the original call.
+        self.inputs = pickle.dumps({"parameters": parameters, "constraints": constraints})
+        self.directory = None
+        self.solves = []
+        self.lock = Lock()
+
+    def _create_directory(self):
+        solver_name = self.module_name.rsplit(".", 1)[-1]
+        self.directory = os.path.join(
+            SolverFlightRecorderConfig.directory,
+            f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{solver_name}")
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "inputs.pkl"), "wb") as f:
+            f.write(self.inputs)
+
+    def _write_meta(self):
+        meta = {
+            "module": self.module_name,
+            "function": self.function_name,
+            "recorded_at": datetime.now().isoformat(),
+            "solves": self.solves
+        }
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def add_solve(self, agent_name, model, solver, status):
+        with self.lock:
+            if self.directory is None:
+                self._create_directory()
+            model_file = f"model_{len(self.solves) + 1}.pb"
+            model.ExportToFile(os.path.join(self.directory, model_file))
+            self.solves.append({
+                "agent_name": agent_name,
+                "model_file": model_file,
+                "status": solver.StatusName(status),
+                "wall_time": solver.WallTime(),
+                "max_time_in_seconds": solver.parameters.max_time_in_seconds
+            })
+            self._write_meta()
+        LogSolver.verbose(f"Recorded the {solver.StatusName(status)} solve of {agent_name} to {self.directory}.")
+        return None
+
+# Solves of the solver started within this context are recorded if they are slow or infeasible.
+@contextmanager
+def flight_recording(solver_main, parameters, constraints):
+    if not SolverFlightRecorderConfig.enabled:
+        yield None
+        return
+    token = _flight_recording.set(FlightRecording(solver_main, parameters, constraints))
+    try:
+        yield _flight_recording.get()
+    finally:
+        _flight_recording.reset(token)
+
+# Whether a finished solve should be kept for replay.
+def _should_record(solver, status):
+    if SolverFlightRecorderConfig.record_infeasible and status in (cp_model.INFEASIBLE, cp_model.MODEL_INVALID):
+        return True
+    return solver.WallTime() > SolverFlightRecorderConfig.slow_solve_in_seconds
+
+# Add a finished solve to the recording of the current context if it is slow or infeasible.
+# A failure to record should never stop the solver.
+def record_flight(agent_name, model, solver, status):
+    recording = _flight_recording.get()
+    if recording is None or not _should_record(solver, status):
+        return None
+    try:
+        recording.add_solve(agent_name, model, solver, status)
+    except Exception as e:
+        LogSolver.verbose(f"Could not record the solve of {agent_name}: {e}")
+    return None
+
+# ----------------------------------------- Replay -----------------------------------------
+
+def load_recording(directory):
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    with open(os.path.join(directory, "inputs.pkl"), "rb") as f:
+        inputs = pickle.load(f)
+    return meta, inputs
+
+# The recorded solver, without the wrappers that would use the result cache and the database.
+def recorded_solver(meta):
+    solver_main = getattr(import_module(meta["module"]), meta["function"])
+    return getattr(solver_main, "__wrapped__", solver_main)
+
+# Run the recorded inputs through the solver again.
+def replay_recording(directory, profile=False):
+    meta, inputs = load_recording(directory)
+    solver_main = recorded_solver(meta)
+
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start_time = perf_counter()
+    result = solver_main(inputs["parameters"], inputs["constraints"])
+    duration = perf_counter() - start_time
+
+    if profiler is not None:
+        import pstats
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(30)
+    return result, duration
+
+# Solve each recorded model directly, skipping the construction of the model.
+def replay_recorded_models(directory):
+    meta, _ = load_recording(directory)
+    results = []
+    for recorded_solve in meta["solves"]:
+        model = cp_model.CpModel()
+        with open(os.path.join(directory, recorded_solve["model_file"]), "rb") as f:
+            model.Proto().ParseFromString(f.read())
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = recorded_solve["max_time_in_seconds"]
+        status = solver.Solve(model)
+        results.append((recorded_solve, solver.StatusName(status), solver.WallTime()))
+    return results
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Replay recorded solver inputs without the database.")
+    parser.add_argument("recordings", nargs="+", help="The recording directories to replay.")
+    parser.add_argument("--repeat", type=int, default=1, help="The number of times each recording is replayed.")
+    parser.add_argument("--profile", action="store_true", help="Profile the replay and print the slowest calls.")
+    parser.add_argument("--models", action="store_true", help="Solve the recorded models directly instead of rebuilding them.")
+    args = parser.parse_args(args)
+
+    for directory in args.recordings:
+        print(f"Recording: {directory}")
+        for i in range(args.repeat):
+            if args.models:
+                for recorded_solve, status, wall_time in replay_recorded_models(directory):
+                    print(f"\t{recorded_solve['model_file']} ({recorded_solve['agent_name']}): recorded {recorded_solve['status']} in {recorded_solve['wall_time']:.3f}s, replayed {status} in {wall_time:.3f}s")
+                continue
+            result, duration = replay_recording(directory, profile=args.profile)
+            if i == 0:
+                print(result["formatted"])
+            print(f"\tRun {i + 1}: {duration:.3f}s")
+    return None
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from config import tag_model_construction
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from ortools.sat.python import cp_model
+
+class TaggedCpModel(cp_model.CpModel):
+    """A model that attributes the variables, constraints and build time it gains to the constraint family and helper adding them."""
+    def __init__(self):
+        super().__init__()
+        self.family = None
+        self.helper = None
+        self.tag_stats = {}
+        self._mark = (0, 0, perf_counter())
+
+    def _size(self):
+        proto = self.Proto()
+        return len(proto.variables), len(proto.constraints)
+
+    def _stats(self, family, helper):
+        return self.tag_stats.setdefault((family, helper), {"variables": 0, "constraints": 0, "build_time": 0.0, "calls": 0})
+
+    # Attribute everything added since the last mark to the current family and helper.
+    def _flush(self):
+        variables, constraints = self._size()
+        mark_variables, mark_constraints, mark_time = self._mark
+        now = perf_counter()
+        stats = self._stats(self.family, self.helper)
+        stats["variables"] += variables - mark_variables
+        stats["constraints"] += constraints - mark_constraints
+
+        # Time outside of any tag may include more than building (such as solving), so only tagged time is kept.
+        if self.family is not None or self.helper is not None:
+            stats["build_time"] += now - mark_time
+        self._mark = (variables, constraints, now)
+
+    # Everything added within the block is attributed to the family and helper given.
+    # Helpers called by other helpers count towards the outermost one, so each helper called by an agent accounts for all it builds.
+    @contextmanager
+    def tagged(self, family=None, helper=None):
+        if helper is not None and self.helper is not None:
+            yield self
+            return
+        self._flush()
+        previous_tags = (self.family, self.helper)
+        self.family = family or self.family
+        self.helper = helper
+        if helper is not None:
+            self._stats(self.family, helper)["calls"] += 1
+        try:
+            yield self
+        finally:
+            self._flush()
+            self.family, self.helper = previous_tags
+
+    # The counts and build time of each family and helper, largest first.
+    def tag_summary(self):
+        self._flush()
+        summary = [
+            {"family": family, "helper": helper, **stats}
+            for (family, helper), stats in self.tag_stats.items()
+            if stats["variables"] or stats["constraints"]
+        ]
+        return sorted(summary, key=lambda tag: (tag["constraints"], tag["variables"]), reverse=True)
+
+    def tag_report(self, limit=15):
+        summary = self.tag_summary()
+        variables, constraints = self._size()
+        lines = [f"Model of {variables} variables and {constraints} constraints, by constraint family and helper:"]
+        for tag in summary[:limit]:
+            label = f"{tag['family'] or '-'} / {tag['helper'] or '-'}"
+            lines.append(f"\t{label:<70} {tag['variables']:>8} vars {tag['constraints']:>8} constraints {tag['build_time']:>8.3f}s ({tag['calls']} calls)")
+        return "\n".join(lines)
+
+# A new model for a solver agent, tagged if the construction of models is being attributed.
+def new_model():
+    return TaggedCpModel() if tag_model_construction else cp_model.CpModel()
+
+# Attribute what the helper adds to the model passed to it to the helper.
+def model_helper(function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        model = kwargs["model"] if "model" in kwargs else args[0] if args else None
+        if not isinstance(model, TaggedCpModel):
+            return function(*args, **kwargs)
+        with model.tagged(helper=function.__name__):
+            return function(*args, **kwargs)
+    return wrapper
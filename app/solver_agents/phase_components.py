@@ -1,4 +1,4 @@
-from config import ortools_solver_time_in_seconds, SchedulerLoggingConfig
+from config import SchedulerLoggingConfig
 from logging_config import LogSolver
 from ortools.sat.python import cp_model
 from typing import Set, Optional
@@ -12,6 +12,11 @@ from app.solver_agents.constraints import (
     ensure_all_vars_equal, 
     frequency_within_min_max, 
     consecutive_bodyparts_for_component)
+from app.solver_agents.solution_hints import hint_phase_component_days
+from app.solver_agents.constraint_switches import ConstraintSwitches
+from app.solver_agents.model_tags import new_model
+from app.solver_agents.solver_cache import cached_solver
+from app.solver_agents.solver_farm import search_workers
 
 from app.solver_agents.base_agent import BaseRelaxationAttempt, BaseAgent, BaseAgentState
 from app.utils.longest_string import longest_string_size_for_key
@@ -82,7 +87,8 @@ class PhaseComponentAgent(BaseAgent):
                 {"id": 6, "name": "Sunday", "availability": 0 * 60 * 60},
             ],
             "microcycle_weekdays": [0, 1, 2, 3, 4, 5, 6],
-            "phase_components": []
+            "phase_components": [],
+            "solution_hints": []
         }
 
         # Define all constraints with their active status
@@ -182,57 +188,62 @@ class PhaseComponentAgent(BaseAgent):
         return agent_vars
 
 
-    def apply_model_constraints(self, constraints, model, agent_vars, phase_components, workout_availability):
+    def apply_model_constraints(self, constraints, model, switches, agent_vars, phase_components, workout_availability):
         LogSolver.agent_steps(f"{self.schedule_title}: Apply model constraints.")
 
         # Apply active constraints ======================================
         logs = "\nBuilding model with constraints:\n"
 
         # Constraint: The duration of a day may only be a number of hours between the allowed time for that day.
-        if constraints["day_duration_within_availability"]:
+        with switches.guard("day_duration_within_availability"):
             day_duration_within_availability(model=model, 
                                              duration_vars=agent_vars["duration"], 
                                              availability=workout_availability)
-            logs += "- Sum of phase component duration within maximum allowed time for a day.\n"
+            if constraints["day_duration_within_availability"]:
+                logs += "- Sum of phase component duration within maximum allowed time for a day.\n"
 
         # Constraint: Force all phase components required in every workout to be included at least once.
-        if constraints["use_workout_required_components"]:
+        with switches.guard("use_workout_required_components"):
             # Retrieve the indexes of all components that are required in all workouts.
             required_phase_components = [i for i, phase_component in enumerate(phase_components) if phase_component["required_every_workout"]]
             use_workout_required_components(model=model, 
                                             required_items=required_phase_components, 
                                             used_vars=agent_vars["active_phase_components"], 
                                             active_entry_vars=agent_vars["active_workday"])
-            logs += "- All phase components required every workout will be included in every workout applied.\n"
+            if constraints["use_workout_required_components"]:
+                logs += "- All phase components required every workout will be included in every workout applied.\n"
 
         # Constraint: Only use required phase components
-        if constraints["only_use_required_components"]:
+        with switches.guard("only_use_required_components"):
             # Retrieves the index of all required phases.
             not_required_phase_components = [i for i, phase_component in enumerate(phase_components) if phase_component["required_within_microcycle"] != "always"]
             for item_index in not_required_phase_components:
                 conditions = [row[item_index].Not() for row in agent_vars["active_phase_components"]]
                 model.AddBoolAnd(conditions)
-            logs += "- Only use required phases components applied.\n"
+            if constraints["only_use_required_components"]:
+                logs += "- Only use required phases components applied.\n"
 
         # Constraint: Force all phase components required in every microcycle to be included at least once.
-        if constraints["use_microcycle_required_components"]:
+        with switches.guard("use_microcycle_required_components"):
             # Retrieve the indexes of all components that are required at least once in a microcycle.
             required_phase_components = [i for i, phase_component in enumerate(phase_components) if phase_component["required_within_microcycle"] == "always"]
             use_all_required_items(model=model, 
                                    required_items=required_phase_components, 
                                    used_vars=agent_vars["active_phase_components"])
-            logs += "- All phase components required every microcycle will be included in every microcycle applied.\n"
+            if constraints["use_microcycle_required_components"]:
+                logs += "- All phase components required every microcycle will be included in every microcycle applied.\n"
 
         # Constraint: Every bodypart division must be done consecutively for a phase component.
-        if constraints["consecutive_bodyparts_for_component"]:
+        with switches.guard("consecutive_bodyparts_for_component"):
             consecutive_bodyparts_for_component(model=model, 
                                                 phase_components=phase_components, 
                                                 active_phase_components=agent_vars["active_phase_components"])
-            logs += "- Bodypart division for components are done consecutively activated.\n"
+            if constraints["consecutive_bodyparts_for_component"]:
+                logs += "- Bodypart division for components are done consecutively activated.\n"
 
 
         # Constraint: All resistances of different subcomponents will have the same number.
-        if constraints["resistances_have_equal_counts"]:
+        with switches.guard("resistances_have_equal_counts"):
             resistance_phase_components = {}
             for i, phase_component in enumerate(phase_components):
                 if phase_component["component_name"].lower() == "resistance":
@@ -240,16 +251,18 @@ class PhaseComponentAgent(BaseAgent):
             for active_phase_components_for_day in agent_vars["active_phase_components"]:
                 for _, value in resistance_phase_components.items():
                     ensure_all_vars_equal(model, [active_phase_components_for_day[i] for i in value])
-            logs += "- All resistances of different subcomponents will have the same number activated.\n"
+            if constraints["resistances_have_equal_counts"]:
+                logs += "- All resistances of different subcomponents will have the same number activated.\n"
 
         # Constraint: # Force number of occurrences of a phase component within in a microcycle to be within number allowed.
-        if constraints["frequency_within_min_max"]:
+        with switches.guard("frequency_within_min_max"):
             frequency_within_min_max(model=model, 
                                      phase_components=phase_components, 
                                      active_phase_components=agent_vars["active_phase_components"],
                                      minimum_key="frequency_per_microcycle_min",
                                      maximum_key="frequency_per_microcycle_max")
-            logs += "- All phase components occuring within microcycle will occur the allowed number of times applied.\n"
+            if constraints["frequency_within_min_max"]:
+                logs += "- All phase components occuring within microcycle will occur the allowed number of times applied.\n"
 
         return logs
 
@@ -297,7 +310,8 @@ class PhaseComponentAgent(BaseAgent):
         """Build the optimization model with active constraints."""
         parameters = state["parameters"]
         constraints = state["constraints"]
-        model = cp_model.CpModel()
+        model = new_model()
+        switches = ConstraintSwitches(model)
 
         phase_components = parameters["phase_components"]
         weekday_availability = parameters["weekday_availability"]
@@ -306,64 +320,79 @@ class PhaseComponentAgent(BaseAgent):
         workout_availability = [weekday_availability[day]["availability"] for day in microcycle_weekdays]
 
         agent_vars = self.create_model_vars(model, phase_components, workout_availability, microcycle_weekdays)
-        state["logs"] += self.apply_model_constraints(constraints, model, agent_vars, phase_components, workout_availability)
+        state["logs"] += self.apply_model_constraints(constraints, model, switches, agent_vars, phase_components, workout_availability)
+        switches.apply(constraints)
+
+        # Warm start the solver with the schedule of the previous comparable microcycle.
+        if parameters["solution_hints"]:
+            hint_phase_component_days(model, agent_vars, phase_components, microcycle_weekdays, parameters["solution_hints"])
+
         logs, duration_spread_var, total_duration_to_maximize = self.apply_model_objective(constraints, model, agent_vars, workout_availability)
         state["logs"] += logs
 
-        return {"opt_model": (model, workout_availability, agent_vars, duration_spread_var, total_duration_to_maximize)}
+        return {"opt_model": (model, workout_availability, agent_vars, duration_spread_var, total_duration_to_maximize), "constraint_switches": switches}
+
+    # Read the schedule from the values of the solver (or of a solution callback).
+    def extract_solution(self, solver, state: State, status, model_index=0):
+        _, workout_availability, agent_vars, _, _ = state["opt_model"]
+        active_phase_components, exercises_per_bodypart_vars, partial_duration_vars, duration_vars = agent_vars["active_phase_components"], agent_vars["exercises_per_bodypart"], agent_vars["partial_duration"], agent_vars["duration"]
+
+        microcycle_duration = 0
+        schedule = []
+
+        # Each day in the microcycle
+        for index_for_day, values_for_day in enumerate(zip(workout_availability, active_phase_components, exercises_per_bodypart_vars, partial_duration_vars, duration_vars)):
+            workout_availability_for_day, active_phase_components_for_day, exercises_per_bodypart_vars_for_day, partial_duration_vars_for_day, duration_vars_for_day = values_for_day
+
+            # Each phase used in the day.
+            for index_for_phase_component, values_for_phase_component in enumerate(zip(active_phase_components_for_day, exercises_per_bodypart_vars_for_day, partial_duration_vars_for_day, duration_vars_for_day)):
+                active_phase_components_for_phase_component, exercises_per_bodypart_vars_for_phase_component, partial_duration_vars_for_phase_component, duration_vars_for_phase_component = values_for_phase_component
+
+                # Ensure that the phase component is active.
+                if(solver.Value(active_phase_components_for_phase_component)):
+                    duration_vars_current = solver.Value(duration_vars_for_phase_component)
+
+                    schedule.append((
+                        index_for_phase_component, index_for_day, 
+                        solver.Value(active_phase_components_for_phase_component), 
+                        solver.Value(exercises_per_bodypart_vars_for_phase_component), 
+                        solver.Value(partial_duration_vars_for_phase_component), 
+                        duration_vars_current
+                    ))
+                    microcycle_duration += duration_vars_current
+        return {
+            "schedule": schedule,
+            "microcycle_duration": microcycle_duration,
+            "status": status
+        }
 
     def solve_model_node(self, state: State, config=None) -> dict:
         LogSolver.agent_steps(f"{self.schedule_title}: Solving Model")
 
         """Solve model and record relaxation attempt results."""
         model, workout_availability, agent_vars, duration_spread_var, total_duration_to_maximize = state["opt_model"]
-        active_phase_components, exercises_per_bodypart_vars, partial_duration_vars, duration_vars = agent_vars["active_phase_components"], agent_vars["exercises_per_bodypart"], agent_vars["partial_duration"], agent_vars["duration"]
 
         solver = cp_model.CpSolver()
-        solver.parameters.num_search_workers = 12
-        solver.parameters.max_time_in_seconds = ortools_solver_time_in_seconds
+        solver.parameters.num_search_workers = search_workers(12)
+        self._apply_time_budget(solver, model)
 
         # solver.parameters.log_search_progress = True
-        status = self._solve_and_time_solver(solver, model)
+        status = self._solve_and_time_solver(solver, model, state)
 
         # If the duration spread should be minimized, then ensure the final duration is the same, with the new goal of minimizing the spread.
+        # This is done on a clone so that the model built can still be reused after a relaxation.
         if status in (cp_model.FEASIBLE, cp_model.OPTIMAL) and duration_spread_var != None:
-            model.Add((total_duration_to_maximize == solver.Value(total_duration_to_maximize)))
-            model.Minimize(duration_spread_var)
-            status = solver.Solve(model)
+            spread_model = model.clone()
+            spread_model.Add((total_duration_to_maximize == solver.Value(total_duration_to_maximize)))
+            spread_model.Minimize(duration_spread_var)
+            status = solver.Solve(spread_model)
 
         state["logs"] += f"\nSolver status: {status}\n"
         state["logs"] += f"Conflicts: {solver.NumConflicts()}, Branches: {solver.NumBranches()}\n"
 
         if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            microcycle_duration = 0
-            schedule = []
-
-            # Each day in the microcycle
-            for index_for_day, values_for_day in enumerate(zip(workout_availability, active_phase_components, exercises_per_bodypart_vars, partial_duration_vars, duration_vars)):
-                workout_availability_for_day, active_phase_components_for_day, exercises_per_bodypart_vars_for_day, partial_duration_vars_for_day, duration_vars_for_day = values_for_day
-
-                # Each phase used in the day.
-                for index_for_phase_component, values_for_phase_component in enumerate(zip(active_phase_components_for_day, exercises_per_bodypart_vars_for_day, partial_duration_vars_for_day, duration_vars_for_day)):
-                    active_phase_components_for_phase_component, exercises_per_bodypart_vars_for_phase_component, partial_duration_vars_for_phase_component, duration_vars_for_phase_component = values_for_phase_component
-
-                    # Ensure that the phase component is active.
-                    if(solver.Value(active_phase_components_for_phase_component)):
-                        duration_vars_current = solver.Value(duration_vars_for_phase_component)
-
-                        schedule.append((
-                            index_for_phase_component, index_for_day, 
-                            solver.Value(active_phase_components_for_phase_component), 
-                            solver.Value(exercises_per_bodypart_vars_for_phase_component), 
-                            solver.Value(partial_duration_vars_for_phase_component), 
-                            duration_vars_current
-                        ))
-                        microcycle_duration += duration_vars_current
-            solution = {
-                "schedule": schedule,
-                "microcycle_duration": microcycle_duration,
-                "status": status
-            }
+            solution = self.extract_solution(solver, state, status)
+            microcycle_duration = solution["microcycle_duration"]
 
             # Record successful attempt
             attempt = RelaxationAttempt(
@@ -530,6 +559,7 @@ class PhaseComponentAgent(BaseAgent):
         result = graph.invoke(self.initial_state)
         return result
 
+@cached_solver("phase_component")
 def Main(parameters=None, constraints=None):
     agent = PhaseComponentAgent(parameters, constraints)
     result = agent.run()
@@ -0,0 +1,114 @@
+from logging_config import LogSolver
+
+# Index of stabilization endurance and strength endurance in the list of phases.
+stab_end_index = 1
+str_end_index = 2
+
+# The number of phases allowed in a row without stabilization endurance.
+allowed_n_without_stab_end = 6
+
+# The dynamic program requires every phase to last at least a week, as the weeks used must increase with each mesocycle.
+# A relaxed phase duration allows empty mesocycles, so the CP-SAT model is used instead.
+def supports_dynamic_programming(phases, constraints):
+    return (
+        constraints["phase_within_min_max"]
+        and all(phase["element_minimum"] >= 1 for phase in phases[1:]))
+
+# The weight of each week spent in a phase, matching the objective of the CP-SAT model.
+# 1000 * goal_time + total_time when maximizing both, goal_time when only maximizing the goal phases.
+def _phase_weights(phases, constraints):
+    weights = []
+    for phase in phases:
+        weight = 0
+        if constraints["maximize_goal_phase"]:
+            if phase["is_goal_phase"]:
+                weight += 1000 if constraints["maximize_phases"] else 1
+            if constraints["maximize_phases"]:
+                weight += 1
+        weights.append(weight)
+    return weights
+
+# Finds the optimal sequence of phases and their durations with a dynamic program over the weeks used.
+# Each state is the last phase used, the number of phases since stabilization endurance, the required phases used, and the number of mesocycles (capped once no longer relevant).
+# Returns the schedule as a list of (phase index, duration) or None if no schedule is possible.
+def solve_phase_sequence(phases, macrocycle_allowed_weeks, constraints):
+    phase_amount = len(phases)
+    min_mesocycles = macrocycle_allowed_weeks // max(phase["element_maximum"] for phase in phases[1:])
+    weights = _phase_weights(phases, constraints)
+
+    # Phases that may be used at all.
+    allowed_phases = [
+        j for j in range(1, phase_amount)
+        if not constraints["only_use_required_phases"] or phases[j]["required_phase"]]
+
+    # Each required phase is given a bit in the mask of required phases used.
+    required_phases = [j for j, phase in enumerate(phases) if phase["required_phase"]] if constraints["use_all_required_phases"] else []
+    required_bits = {j: 1 << k for k, j in enumerate(required_phases)}
+    all_required_used = (1 << len(required_phases)) - 1
+
+    # Phases that are forced at a given mesocycle.
+    forced_phases = {}
+    if constraints["phase_1_is_stab_end"]:
+        forced_phases[0] = stab_end_index
+    if constraints["phase_2_is_str_end"]:
+        forced_phases[1] = str_end_index
+
+    # Beyond this many mesocycles, the exact count no longer affects which phases are allowed or whether the schedule is complete.
+    mesocycles_needed = max([min_mesocycles] + [i + 1 for i in forced_phases])
+
+    # layers[weeks] maps each state to its best value and the step taken to reach it.
+    layers = [{} for _ in range(macrocycle_allowed_weeks + 1)]
+    start_state = (0, 0, 0, 0)
+    layers[0][start_state] = (0, None)
+
+    best_value, best_end = None, None
+    for weeks_used, layer in enumerate(layers):
+        for state, (value, _) in layer.items():
+            last_phase, since_stab_end, required_used, mesocycle_count = state
+
+            # A schedule may end in this state if it has enough mesocycles and used every required phase.
+            if mesocycle_count >= mesocycles_needed and required_used == all_required_used:
+                if best_value is None or value > best_value:
+                    best_value, best_end = value, (weeks_used, state)
+
+            for phase_index in allowed_phases:
+                if mesocycle_count in forced_phases and phase_index != forced_phases[mesocycle_count]:
+                    continue
+                if constraints["no_consecutive_same_phase"] and phase_index == last_phase:
+                    continue
+
+                next_since_stab_end = 0 if phase_index == stab_end_index else since_stab_end + 1
+                if constraints["no_6_phases_without_stab_end"] and next_since_stab_end >= allowed_n_without_stab_end:
+                    continue
+
+                next_state = (
+                    phase_index,
+                    next_since_stab_end if constraints["no_6_phases_without_stab_end"] else 0,
+                    required_used | required_bits.get(phase_index, 0),
+                    min(mesocycle_count + 1, mesocycles_needed))
+
+                phase = phases[phase_index]
+                max_duration = min(phase["element_maximum"], macrocycle_allowed_weeks - weeks_used)
+                for duration in range(phase["element_minimum"], max_duration + 1):
+                    next_value = value + weights[phase_index] * duration
+                    next_layer = layers[weeks_used + duration]
+                    if next_state not in next_layer or next_layer[next_state][0] < next_value:
+                        next_layer[next_state] = (next_value, (weeks_used, state, phase_index, duration))
+
+    if best_end is None:
+        LogSolver.verbose("Dynamic program found no possible phase sequence.")
+        return None
+
+    # Walk back through the steps taken to reach the best end state.
+    schedule = []
+    weeks_used, state = best_end
+    while True:
+        _, step = layers[weeks_used][state]
+        if step is None:
+            break
+        weeks_used, state, phase_index, duration = step
+        schedule.append((phase_index, duration))
+    schedule.reverse()
+
+    LogSolver.verbose(f"Dynamic program found a phase sequence with an objective of {best_value}.")
+    return schedule
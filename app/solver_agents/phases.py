@@ -1,5 +1,6 @@
-from config import ortools_solver_time_in_seconds, SchedulerLoggingConfig
+from config import phase_solver_dynamic_programming, SchedulerLoggingConfig, CompactFormulationConfig
 from logging_config import LogSolver
+from time import perf_counter
 from ortools.sat.python import cp_model
 from typing import Set, Optional
 from dotenv import load_dotenv
@@ -12,6 +13,11 @@ from app.solver_agents.constraints import (
     no_n_items_without_desired_item, 
     only_use_required_items, 
     use_all_required_items)
+from app.solver_agents.constraint_switches import ConstraintSwitches
+from app.solver_agents.model_tags import new_model
+from app.solver_agents.solver_cache import cached_solver
+from app.solver_agents.solver_farm import search_workers
+from app.solver_agents.phase_sequencer import supports_dynamic_programming, solve_phase_sequence
 
 from app.solver_agents.base_agent import BaseRelaxationAttempt, BaseAgent, BaseAgentState
 from app.utils.longest_string import longest_string_size_for_key
@@ -49,6 +55,12 @@ class PhaseAgent(BaseAgent):
     schedule_title = "Phase Subagent"
     available_constraints = available_constraints
 
+    # Whether the entries are linked to the items with the compact formulation.
+    compact_formulation = CompactFormulationConfig.phases
+
+    # The goal time is weighted above the total time in the objective.
+    lexicographic_objective = True
+
     def __init__(self, parameters={}, constraints={}):
         super().__init__()
         self.initial_state["parameter_input"]={
@@ -147,39 +159,43 @@ class PhaseAgent(BaseAgent):
                             items = phases, 
                             entry_vars = agent_vars["mesocycles"], 
                             number_of_entries = max_mesocycles, 
-                            used_vars = agent_vars["used"])
+                            used_vars = agent_vars["used"], 
+                            compact = self.compact_formulation)
         return agent_vars
 
-    def apply_model_constraints(self, constraints, model, agent_vars, phases, macrocycle_allowed_weeks, max_mesocycles):
+    def apply_model_constraints(self, constraints, model, switches, agent_vars, phases, macrocycle_allowed_weeks, max_mesocycles):
         LogSolver.agent_steps(f"{self.schedule_title}: Apply model constraints.")
 
         # Apply active constraints ======================================
         logs = "\nBuilding model with constraints:\n"
 
         # Constraint: The duration of a phase may only be a number of weeks between the minimum and maximum weeks allowed.
-        if constraints["phase_within_min_max"]:
+        with switches.guard("phase_within_min_max"):
             entries_within_min_max(model = model, 
                                    items = phases, 
                                    minimum_key="element_minimum", 
                                    maximum_key="element_maximum",
                                    number_of_entries = max_mesocycles, 
                                    used_vars = agent_vars["used"], 
-                                   duration_vars = agent_vars["duration"])
-            logs += "- Phase duration within min and max allowed weeks applied.\n"
+                                   duration_vars = agent_vars["duration"], 
+                                   compact = self.compact_formulation)
+            if constraints["phase_within_min_max"]:
+                logs += "- Phase duration within min and max allowed weeks applied.\n"
 
         # Ensure total time does not exceed the macrocycle_allowed_weeks
         model.Add(agent_vars["num_mesocycles_used"] == sum(agent_vars["active_mesocycles"]))
         model.Add(sum(agent_vars["duration"]) <= macrocycle_allowed_weeks)
 
         # Constraint: No consecutive phases
-        if constraints["no_consecutive_same_phase"]:
+        with switches.guard("no_consecutive_same_phase"):
             no_consecutive_identical_items(model = model, 
                                            entry_vars = agent_vars["mesocycles"], 
                                            active_entry_vars = agent_vars["active_mesocycles"])
-            logs += "- No consecutive phase of the same type applied.\n"
+            if constraints["no_consecutive_same_phase"]:
+                logs += "- No consecutive phase of the same type applied.\n"
 
         # Constraint: No 6 phases without stabilization endurance
-        if constraints["no_6_phases_without_stab_end"]:
+        with switches.guard("no_6_phases_without_stab_end"):
             stab_end_index = 1
             no_n_items_without_desired_item(model = model, 
                                             allowed_n = 6, 
@@ -187,20 +203,23 @@ class PhaseAgent(BaseAgent):
                                             entry_vars = agent_vars["mesocycles"], 
                                             number_of_entries = max_mesocycles, 
                                             active_entry_vars = agent_vars["active_mesocycles"])
-            logs += "- No 6 phases without stabilization endurance applied.\n"
+            if constraints["no_6_phases_without_stab_end"]:
+                logs += "- No 6 phases without stabilization endurance applied.\n"
 
         # Constraint: First phase is stabilization endurance
-        if constraints["phase_1_is_stab_end"]:
+        with switches.guard("phase_1_is_stab_end"):
             model.Add(agent_vars["mesocycles"][0] == 1)
-            logs += "- First phase is stabilization endurance applied.\n"
+            if constraints["phase_1_is_stab_end"]:
+                logs += "- First phase is stabilization endurance applied.\n"
 
         # Constraint: First phase is strength endurance
-        if constraints["phase_2_is_str_end"]:
+        with switches.guard("phase_2_is_str_end"):
             model.Add(agent_vars["mesocycles"][1] == 2)
-            logs += "- Second phase is strength endurance applied.\n"
+            if constraints["phase_2_is_str_end"]:
+                logs += "- Second phase is strength endurance applied.\n"
 
         # Constraint: Only use required phases
-        if constraints["only_use_required_phases"]:
+        with switches.guard("only_use_required_phases"):
             # Retrieves the index of all required phases.
             required_phases = [i for i, phase in enumerate(phases) if phase["required_phase"]]
             required_phases.append(0) # Include the inactive state.
@@ -208,16 +227,18 @@ class PhaseAgent(BaseAgent):
             only_use_required_items(model = model, 
                                     required_items = required_phases, 
                                     entry_vars = agent_vars["mesocycles"])
-            logs += "- Only use required phases applied.\n"
+            if constraints["only_use_required_phases"]:
+                logs += "- Only use required phases applied.\n"
 
         # Constraint: Use all required phases at least once
-        if constraints["use_all_required_phases"]:
+        with switches.guard("use_all_required_phases"):
             required_phases = [i for i, phase in enumerate(phases) if phase["required_phase"]]
 
             use_all_required_items(model = model, 
                                    required_items = required_phases, 
                                    used_vars = agent_vars["used"])
-            logs += "- Use every required phase at least once applied.\n"
+            if constraints["use_all_required_phases"]:
+                logs += "- Use every required phase at least once applied.\n"
         return logs
 
     def apply_model_objective(self, constraints, model, agent_vars, phases, macrocycle_allowed_weeks, max_mesocycles):
@@ -260,13 +281,25 @@ class PhaseAgent(BaseAgent):
             logs += "- Maximizing time spent on the goal phases.\n"
         return logs
 
+    # Whether the schedule can be found with the dynamic program rather than the CP-SAT model.
+    def _use_dynamic_programming(self, state):
+        return phase_solver_dynamic_programming and supports_dynamic_programming(state["parameters"]["possible_phases"], state["constraints"])
+
     def build_opt_model_node(self, state: State, config=None) -> dict:
+        # The dynamic program needs no model, so one is only built if the search for a relaxation requires it.
+        if self._use_dynamic_programming(state):
+            LogSolver.agent_steps(f"{self.schedule_title}: Skipping the model build for the dynamic program.")
+            return {"opt_model": None, "constraint_switches": None}
+        return self.build_cp_sat_model(state)
+
+    def build_cp_sat_model(self, state: State) -> dict:
         LogSolver.agent_steps(f"{self.schedule_title}: Building Model")
 
         """Build the optimization model with active constraints."""
         parameters = state["parameters"]
         constraints = state["constraints"]
-        model = cp_model.CpModel()
+        model = new_model()
+        switches = ConstraintSwitches(model)
 
         macrocycle_allowed_weeks = parameters["macrocycle_allowed_weeks"]
         phases = parameters["possible_phases"]
@@ -279,72 +312,106 @@ class PhaseAgent(BaseAgent):
         max_mesocycles = macrocycle_allowed_weeks // min(phase["element_minimum"] for phase in phases[1:])
 
         agent_vars = self.create_model_vars(model, macrocycle_allowed_weeks, phases, phase_amount, min_mesocycles, max_mesocycles)
-        state["logs"] += self.apply_model_constraints(constraints, model, agent_vars, phases, macrocycle_allowed_weeks, max_mesocycles)
+        state["logs"] += self.apply_model_constraints(constraints, model, switches, agent_vars, phases, macrocycle_allowed_weeks, max_mesocycles)
+        switches.apply(constraints)
         state["logs"] += self.apply_model_objective(constraints, model, agent_vars, phases, macrocycle_allowed_weeks, max_mesocycles)
 
-        return {"opt_model": (model, agent_vars["mesocycles"], agent_vars["duration"], agent_vars["used"], agent_vars["active_mesocycles"])}
+        return {"opt_model": (model, agent_vars["mesocycles"], agent_vars["duration"], agent_vars["used"], agent_vars["active_mesocycles"]), "constraint_switches": switches}
+
+    def solution_from_schedule(self, state: State, schedule, status):
+        phases = state["parameters"]["possible_phases"]
+        total_weeks_goal = sum(phase_duration for phase_type, phase_duration in schedule if phases[phase_type]["is_goal_phase"])
+        total_weeks_time = sum(phase_duration for _, phase_duration in schedule)
+        return {
+            "schedule": schedule,
+            "total_weeks_goal": total_weeks_goal,
+            "total_weeks_time": total_weeks_time,
+            "status": status
+        }
+
+    # Read the schedule from the values of the solver (or of a solution callback).
+    def extract_solution(self, solver, state: State, status, model_index=0):
+        _, mesocycle_vars, duration_vars, _, active_mesocycle_vars = state["opt_model"]
+        schedule = []
+        for i in range(len(mesocycle_vars)):
+            # Ensure that the mesocycle is active
+            if solver.Value(active_mesocycle_vars[i]):
+                phase_type = solver.Value(mesocycle_vars[i])
+                phase_duration = solver.Value(duration_vars[i])
+                schedule.append((phase_type, phase_duration))
+        return self.solution_from_schedule(state, schedule, status)
+
+    def record_solution(self, state: State, solution):
+        # Record successful attempt
+        attempt = RelaxationAttempt(
+            state["current_attempt"]["constraints"],
+            True,
+            solution["total_weeks_goal"],
+            solution["total_weeks_time"],
+            state["current_attempt"]["reasoning"],
+            state["current_attempt"]["expected_impact"]
+        )
+        state["relaxation_attempts"].append(attempt)
+        return solution
+
+    def record_failure(self, state: State):
+        # Record unsuccessful attempt
+        attempt = RelaxationAttempt(
+            state["current_attempt"]["constraints"],
+            False,
+            None,
+            None,
+            state["current_attempt"]["reasoning"],
+            state["current_attempt"]["expected_impact"]
+        )
+        state["relaxation_attempts"].append(attempt)
+        return None
+
+    def solve_dynamic_program(self, state: State) -> dict:
+        LogSolver.agent_steps(f"{self.schedule_title}: Solving with Dynamic Programming")
+
+        parameters = state["parameters"]
+
+        start_time = perf_counter()
+        schedule = solve_phase_sequence(parameters["possible_phases"], parameters["macrocycle_allowed_weeks"], state["constraints"])
+        solver_duration = perf_counter() - start_time
+        LogSolver.agent_time(f"Time taken to solve the dynamic program: {int(solver_duration // 60)} minutes {round((solver_duration % 60), 3)} seconds")
+
+        # The dynamic program is exact, so any schedule found is optimal.
+        if schedule is not None:
+            state["logs"] += f"\nDynamic program status: {cp_model.OPTIMAL}\n"
+            return {"solution": self.record_solution(state, self.solution_from_schedule(state, schedule, cp_model.OPTIMAL))}
+
+        self.record_failure(state)
+
+        # The search for a relaxation requires the CP-SAT model.
+        if state["opt_model"] is None:
+            return {"solution": None, **self.build_cp_sat_model(state)}
+        return {"solution": None}
 
     def solve_model_node(self, state: State, config=None) -> dict:
+        if self._use_dynamic_programming(state):
+            return self.solve_dynamic_program(state)
+
         LogSolver.agent_steps(f"{self.schedule_title}: Solving Model")
 
         """Solve model and record relaxation attempt results."""
-        model, mesocycle_vars, duration_vars, used_vars, active_mesocycle_vars = state["opt_model"]
-
-        phases = state["parameters"]["possible_phases"]
+        model = state["opt_model"][0]
 
         solver = cp_model.CpSolver()
         # solver.parameters.log_search_progress = True
-        solver.parameters.max_time_in_seconds = ortools_solver_time_in_seconds
+        solver.parameters.num_search_workers = search_workers()
+        self._apply_time_budget(solver, model)
 
-        status = self._solve_and_time_solver(solver, model)
+        status = self._solve_and_time_solver(solver, model, state)
 
         state["logs"] += f"\nSolver status: {status}\n"
         state["logs"] += f"Conflicts: {solver.NumConflicts()}, Branches: {solver.NumBranches()}\n"
 
         if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
-            total_weeks_goal = total_weeks_time = 0
-            schedule = []
-            for i in range(len(mesocycle_vars)):
-                # Ensure that the mesocycle is active
-                if solver.Value(active_mesocycle_vars[i]):
-                    phase_type = solver.Value(mesocycle_vars[i])
-                    phase_duration = solver.Value(duration_vars[i])
-
-                    # Sum of all mesocycle_vars.
-                    total_weeks_time += phase_duration
-
-                    schedule.append((phase_type, phase_duration))
-                    if phases[phase_type]["is_goal_phase"]:
-                        total_weeks_goal += phase_duration
-            solution = {
-                "schedule": schedule,
-                "total_weeks_goal": total_weeks_goal,
-                "total_weeks_time": total_weeks_time,
-                "status": status
-            }
-
-            # Record successful attempt
-            attempt = RelaxationAttempt(
-                state["current_attempt"]["constraints"],
-                True,
-                total_weeks_goal,
-                total_weeks_time,
-                state["current_attempt"]["reasoning"],
-                state["current_attempt"]["expected_impact"]
-            )
-            state["relaxation_attempts"].append(attempt)
-            return {"solution": solution}
+            return {"solution": self.record_solution(state, self.extract_solution(solver, state, status))}
 
-        # Record unsuccessful attempt
-        attempt = RelaxationAttempt(
-            state["current_attempt"]["constraints"],
-            False,
-            None,
-            None,
-            state["current_attempt"]["reasoning"],
-            state["current_attempt"]["expected_impact"]
-        )
-        state["relaxation_attempts"].append(attempt)
+        self.record_failure(state)
         return {"solution": None}
 
     def get_relaxation_formatting_parameters(self, parameters):
@@ -423,6 +490,7 @@ class PhaseAgent(BaseAgent):
         result = graph.invoke(self.initial_state)
         return result
 
+@cached_solver("phase")
 def Main(parameters=None, constraints=None):
     agent = PhaseAgent(parameters, constraints)
     result = agent.run()
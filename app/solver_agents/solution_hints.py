@@ -0,0 +1,78 @@
+from logging_config import LogSolver
+
+# Clamp a hinted value into the bounds of the variable so that the hint remains usable.
+def clamp_hint(value, minimum, maximum):
+    return max(minimum, min(value, maximum))
+
+# Add a hint for each variable paired with a value, skipping any variables without a value.
+def add_hints(model, vars_to_hint, values):
+    hint_count = 0
+    for var, value in zip(vars_to_hint, values):
+        if value is None:
+            continue
+        model.AddHint(var, int(value))
+        hint_count += 1
+    return hint_count
+
+# Hint the phase components used on each day of the microcycle with those used on the same weekday of a previous microcycle.
+def hint_phase_component_days(model, agent_vars, phase_components, microcycle_weekdays, solution_hints):
+    hints_by_weekday = {day_hint["weekday_id"]: day_hint["components"] for day_hint in solution_hints}
+    hint_count = 0
+
+    for index_for_day, weekday in enumerate(microcycle_weekdays):
+        # Only hint days that existed in the previous microcycle.
+        if weekday not in hints_by_weekday:
+            continue
+        components_for_day = {
+            (component["phase_component_id"], component["bodypart_id"]): component["duration"]
+            for component in hints_by_weekday[weekday]}
+
+        active_values = []
+        duration_values = []
+        for phase_component in phase_components:
+            previous_duration = components_for_day.get((phase_component["phase_component_id"], phase_component["bodypart_id"]))
+            active_values.append(previous_duration is not None)
+            duration_values.append(previous_duration or 0)
+
+        hint_count += add_hints(model, agent_vars["active_phase_components"][index_for_day], active_values)
+        hint_count += add_hints(model, agent_vars["duration"][index_for_day], duration_values)
+
+    LogSolver.verbose(f"Added {hint_count} hints from the previous microcycle.")
+    return hint_count
+
+# Hint the exercise and its parameters for each slot with those used for the same phase component and bodypart in a previous workout.
+def hint_exercise_slots(model, exercise_vars, pc_vars, phase_component_ids, phase_components, exercises, solution_hints):
+    exercise_indices = {exercise["id"]: i for i, exercise in enumerate(exercises) if i > 0}
+
+    # Group the previous exercises by their phase component and bodypart, maintaining their order.
+    hints_by_phase_component = {}
+    for exercise_hint in solution_hints:
+        key = (exercise_hint["phase_component_id"], exercise_hint["bodypart_id"])
+        hints_by_phase_component.setdefault(key, []).append(exercise_hint)
+
+    exercise_values, reps_values, sets_values, rest_values = [], [], [], []
+    for phase_component_index in phase_component_ids:
+        phase_component = phase_components[phase_component_index]
+        remaining_hints = hints_by_phase_component.get((phase_component["phase_component_id"], phase_component["bodypart_id"]))
+
+        # No previous exercise remains for this slot.
+        if not remaining_hints:
+            exercise_values.append(None)
+            reps_values.append(None)
+            sets_values.append(None)
+            rest_values.append(None)
+            continue
+
+        exercise_hint = remaining_hints.pop(0)
+        exercise_values.append(exercise_indices.get(exercise_hint["exercise_id"]))
+        reps_values.append(clamp_hint(exercise_hint["reps"], phase_component["reps_min"], phase_component["reps_max"]))
+        sets_values.append(clamp_hint(exercise_hint["sets"], phase_component["sets_min"], phase_component["sets_max"]))
+        rest_values.append(clamp_hint(exercise_hint["rest"], phase_component["rest_min"], phase_component["rest_max"]))
+
+    hint_count = add_hints(model, exercise_vars["exercises"], exercise_values)
+    hint_count += add_hints(model, pc_vars["reps"], reps_values)
+    hint_count += add_hints(model, pc_vars["sets"], sets_values)
+    hint_count += add_hints(model, pc_vars["rest"], rest_values)
+
+    LogSolver.verbose(f"Added {hint_count} hints from the previous workout.")
+    return hint_count
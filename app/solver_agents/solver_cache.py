@@ -0,0 +1,126 @@
+from config import solver_cache_size, solver_cache_persistent
+from logging_config import LogSolver
+from .solver_farm import run_solver_job
+from .solver_telemetry import collect_solver_runs, save_solver_runs
+from app.utils.exercise_table import ExerciseTable
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import date, datetime, timedelta
+from functools import wraps
+from threading import Lock
+import hashlib
+import json
+
+# Convert values that JSON cannot represent into a stable form.
+def _canonical_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, ExerciseTable):
+        return value.to_dicts()
+    return repr(value)
+
+# Hash the solver name, parameters, and constraints into a key that is identical for identical inputs.
+# Dictionary keys are sorted, but lists keep their order, as the solutions refer to items by their index.
+def solver_cache_key(solver_name, parameters, constraints):
+    canonical_input = json.dumps(
+        {"solver": solver_name, "parameters": parameters, "constraints": constraints},
+        sort_keys=True,
+        default=_canonical_default)
+    return hashlib.sha256(canonical_input.encode("utf-8")).hexdigest()
+
+class SolverCache:
+    """Bounded LRU of solver results, optionally backed by a database table."""
+    def __init__(self, max_size=solver_cache_size, persistent=solver_cache_persistent):
+        self.max_size = max_size
+        self.persistent = persistent
+        self.results = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return deepcopy(self.results[key])
+        if self.persistent:
+            result = self._get_persistent(key)
+            if result is not None:
+                self._store(key, result)
+                return deepcopy(result)
+        return None
+
+    def set(self, solver_name, key, result):
+        self._store(key, deepcopy(result))
+        if self.persistent:
+            # The database only holds JSON, so tuples are read back as lists.
+            self._set_persistent(solver_name, key, json.loads(json.dumps(result, default=_canonical_default)))
+        return None
+
+    def clear(self, include_persistent=True):
+        with self.lock:
+            self.results.clear()
+        if self.persistent and include_persistent:
+            self._clear_persistent()
+        return None
+
+    def _store(self, key, result):
+        with self.lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_size:
+                self.results.popitem(last=False)
+
+    def _get_persistent(self, key):
+        from app import db
+        from app.models import Solver_Result_Cache
+        stored_result = db.session.get(Solver_Result_Cache, key)
+        return stored_result.result if stored_result else None
+
+    # The stored results are written through their own session, so that whatever the caller has pending is left uncommitted.
+    def _set_persistent(self, solver_name, key, result):
+        from app.db_session import session_scope
+        from app.models import Solver_Result_Cache
+        try:
+            with session_scope() as session:
+                session.merge(Solver_Result_Cache(key=key, solver_name=solver_name, result=result))
+        except Exception as e:
+            LogSolver.verbose(f"Could not store the {solver_name} solver result: {e}")
+
+    def _clear_persistent(self):
+        from app.db_session import session_scope
+        from app.models import Solver_Result_Cache
+        with session_scope() as session:
+            session.query(Solver_Result_Cache).delete()
+
+solver_cache = SolverCache()
+
+# Whether the result of a solver has a schedule, as only those are worth returning again for the same inputs.
+def _has_schedule(result):
+    return bool(result.get("solution") and result["solution"].get("schedule"))
+
+# Wraps the Main function of a solver, returning the stored result if the solver has already been run with the same inputs.
+def cached_solver(solver_name):
+    def decorator(solver_main):
+        @wraps(solver_main)
+        def wrapper(parameters=None, constraints=None):
+            key = solver_cache_key(solver_name, parameters, constraints)
+            result = solver_cache.get(key)
+            if result is not None:
+                LogSolver.verbose(f"Retrieved the {solver_name} solver result from the cache.")
+                return result
+
+            with collect_solver_runs() as solver_runs:
+                result = run_solver_job(solver_main, parameters, constraints)
+            save_solver_runs(solver_runs)
+
+            # Results without a schedule, such as solves that ran out of time, are solved again on the next request.
+            if _has_schedule(result):
+                solver_cache.set(solver_name, key, result)
+            else:
+                LogSolver.verbose(f"The {solver_name} solver found no schedule, so its result is not cached.")
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,146 @@
+from config import use_solver_farm, solver_farm_processes, solver_cpu_budget
+from logging_config import LogSolver
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from importlib import import_module
+from threading import Lock
+import atexit
+import multiprocessing
+
+from .solver_progress import progress_publisher, set_process_progress_sink
+from .solver_telemetry import collect_solver_runs, extend_solver_runs
+from .flight_recorder import flight_recording
+from .time_budget import solver_time_budget
+
+class SearchWorkerBudget:
+    """Divides a fixed number of CP-SAT search workers among the solver jobs in flight."""
+    def __init__(self, total=solver_cpu_budget):
+        self.total = max(1, total)
+        self.in_flight = 0
+        self.lock = Lock()
+
+        # Set within a farm process to the share given to the job it is running.
+        self.job_allowance = None
+
+    @contextmanager
+    def job(self):
+        with self.lock:
+            self.in_flight += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    # The number of search workers a job may use if it is started now.
+    # Jobs beyond the number that can run at once (such as those queued for a farm process) don't take a share.
+    def share(self, requested=None, max_running=None):
+        with self.lock:
+            running = min(self.in_flight, max_running) if max_running else self.in_flight
+            allowance = self.total // max(1, running)
+        if requested:
+            allowance = min(requested, allowance)
+        return max(1, allowance)
+
+search_worker_budget = SearchWorkerBudget()
+
+# The number of search workers a solver should use, never more than its share of the CPU budget.
+def search_workers(requested=None):
+    if search_worker_budget.job_allowance is not None:
+        allowance = search_worker_budget.job_allowance
+        return max(1, min(requested, allowance) if requested else allowance)
+    return search_worker_budget.share(requested)
+
+# Build and solve the model in the current process, recording the solve if it turns out slow or infeasible.
+def _solve_locally(solver_main, parameters, constraints):
+    with flight_recording(solver_main, parameters, constraints):
+        return solver_main(parameters, constraints)
+
+# Runs inside a farm process. The solver is looked up by name, as the decorated function in the module cannot be pickled.
+# The statistics of its solves are returned with the result, to be recorded by the process that started the job.
+# The time budgets are planned from the history of the process that started the job, which keeps the records the job adds.
+def _run_solver_job(module_name, function_name, parameters, constraints, allowed_workers, time_budget_history, progress_queue=None):
+    search_worker_budget.job_allowance = allowed_workers
+    set_process_progress_sink(progress_queue.put if progress_queue is not None else None)
+    solver_main = getattr(import_module(module_name), function_name)
+
+    # Skip the wrappers (such as the result cache), which already ran in the parent process.
+    solver_main = getattr(solver_main, "__wrapped__", solver_main)
+    with collect_solver_runs() as solver_runs, solver_time_budget.job(time_budget_history) as time_budget_records:
+        result = _solve_locally(solver_main, parameters, constraints)
+    return result, solver_runs, time_budget_records
+
+_solver_farm = None
+_progress_manager = None
+_solver_farm_lock = Lock()
+
+# The worker processes are started on first use and kept for the lifetime of the application.
+# They are spawned rather than forked, as forking a process with running solver threads is unsafe.
+def _get_solver_farm():
+    global _solver_farm
+    with _solver_farm_lock:
+        if _solver_farm is None:
+            LogSolver.verbose(f"Starting solver farm with {solver_farm_processes} processes and a budget of {search_worker_budget.total} search workers.")
+            _solver_farm = ProcessPoolExecutor(
+                max_workers=solver_farm_processes,
+                mp_context=multiprocessing.get_context("spawn"))
+        return _solver_farm
+
+# The improving solutions found in the farm are passed back through queues held by a manager process.
+def _get_progress_manager():
+    global _progress_manager
+    with _solver_farm_lock:
+        if _progress_manager is None:
+            _progress_manager = multiprocessing.get_context("spawn").Manager()
+        return _progress_manager
+
+def shutdown_solver_farm():
+    global _solver_farm, _progress_manager
+    with _solver_farm_lock:
+        if _solver_farm is not None:
+            _solver_farm.shutdown(wait=False, cancel_futures=True)
+            _solver_farm = None
+        if _progress_manager is not None:
+            _progress_manager.shutdown()
+            _progress_manager = None
+    return None
+
+atexit.register(shutdown_solver_farm)
+
+# Pass the updates from a farm process on to the subscribers until its job is done.
+def _forward_progress(future, progress_queue, publisher):
+    while True:
+        try:
+            publisher(progress_queue.get(timeout=0.2))
+        except Empty:
+            if future.done():
+                break
+    return None
+
+# Build and solve the model of a solver, in a farm process if enabled and otherwise in the current thread.
+# The job counts against the search worker budget for as long as it runs.
+def run_solver_job(solver_main, parameters, constraints):
+    with search_worker_budget.job():
+        if not use_solver_farm or solver_farm_processes < 1:
+            return _solve_locally(solver_main, parameters, constraints)
+
+        allowed_workers = search_worker_budget.share(max_running=solver_farm_processes)
+        publisher = progress_publisher()
+        progress_queue = _get_progress_manager().Queue() if publisher is not None else None
+        try:
+            future = _get_solver_farm().submit(
+                _run_solver_job,
+                solver_main.__module__, solver_main.__name__,
+                parameters, constraints, allowed_workers, solver_time_budget.snapshot(), progress_queue)
+            if progress_queue is not None:
+                _forward_progress(future, progress_queue, publisher)
+            result, solver_runs, time_budget_records = future.result()
+            extend_solver_runs(solver_runs)
+            solver_time_budget.extend(time_budget_records)
+            return result
+        except BrokenProcessPool:
+            LogSolver.verbose("Solver farm stopped unexpectedly. Restarting it and solving in the current process.")
+            shutdown_solver_farm()
+            return _solve_locally(solver_main, parameters, constraints)
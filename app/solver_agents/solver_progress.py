@@ -0,0 +1,103 @@
+from config import solver_progress_min_interval_in_seconds
+from logging_config import LogSolver
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from queue import Queue
+from threading import Lock
+
+from .time_budget import FirstSolutionTimer
+
+# The topic that the solvers started within the current context publish their improving solutions to.
+_progress_topic = ContextVar("solver_progress_topic", default=None)
+
+# Set within a farm process to send the updates back to the process that started the job.
+_process_progress_sink = None
+
+class SolverProgressChannel:
+    """Delivers the improving solutions of running solvers to every subscriber of a topic."""
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = Lock()
+
+    def subscribe(self, topic):
+        updates = Queue()
+        with self.lock:
+            self.subscribers.setdefault(topic, []).append(updates)
+        return updates
+
+    def unsubscribe(self, topic, updates):
+        with self.lock:
+            topic_subscribers = self.subscribers.get(topic, [])
+            if updates in topic_subscribers:
+                topic_subscribers.remove(updates)
+            if not topic_subscribers:
+                self.subscribers.pop(topic, None)
+        return None
+
+    def has_subscribers(self, topic):
+        with self.lock:
+            return bool(self.subscribers.get(topic))
+
+    def publish(self, topic, update):
+        with self.lock:
+            topic_subscribers = list(self.subscribers.get(topic, []))
+        for updates in topic_subscribers:
+            updates.put(update)
+        return None
+
+solver_progress = SolverProgressChannel()
+
+# Solvers started within this context publish their improving solutions to the topic.
+@contextmanager
+def publishing_progress(topic):
+    token = _progress_topic.set(topic)
+    try:
+        yield topic
+    finally:
+        _progress_topic.reset(token)
+
+def current_progress_topic():
+    return _progress_topic.get()
+
+def set_process_progress_sink(sink):
+    global _process_progress_sink
+    _process_progress_sink = sink
+    return None
+
+# The function that publishes updates from solvers started in the current context, or None if no one would receive them.
+# It is resolved before solving, as the solution callbacks run on the solver's own threads where the context is not set.
+def progress_publisher():
+    if _process_progress_sink is not None:
+        return _process_progress_sink
+    topic = current_progress_topic()
+    if topic is None or not solver_progress.has_subscribers(topic):
+        return None
+    return partial(solver_progress.publish, topic)
+
+# Records the first solution like the timer, and passes improving solutions to a handler at most once per interval.
+# The event given, if any, is set once the first solution is found.
+class SolutionProgressCallback(FirstSolutionTimer):
+    def __init__(self, on_solution=None, min_interval=solver_progress_min_interval_in_seconds, first_solution_event=None):
+        super().__init__()
+        self.on_solution = on_solution
+        self.min_interval = min_interval
+        self.last_published_time = None
+        self.first_solution_event = first_solution_event
+
+    def on_solution_callback(self):
+        super().on_solution_callback()
+        if self.first_solution_event is not None:
+            self.first_solution_event.set()
+        if self.on_solution is None:
+            return
+        wall_time = self.WallTime()
+        if self.last_published_time is not None and wall_time - self.last_published_time < self.min_interval:
+            return
+        self.last_published_time = wall_time
+
+        # A failure to publish should never stop the search.
+        try:
+            self.on_solution(self)
+        except Exception as e:
+            LogSolver.verbose(f"Could not publish the intermediate solution: {e}")
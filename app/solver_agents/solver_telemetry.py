@@ -0,0 +1,114 @@
+from config import record_solver_runs
+from logging_config import LogSolver
+from contextlib import contextmanager
+from contextvars import ContextVar
+from ortools.sat.python import cp_model
+
+from .time_budget import model_size
+from .model_tags import TaggedCpModel
+
+# The list that the solves started within the current context are collected into.
+_solver_runs = ContextVar("solver_runs", default=None)
+
+# Collect the statistics of every solve started within this context.
+# The solves are also passed on to any collection this one is nested in.
+@contextmanager
+def collect_solver_runs():
+    solver_runs = []
+    token = _solver_runs.set(solver_runs)
+    try:
+        yield solver_runs
+    finally:
+        _solver_runs.reset(token)
+        extend_solver_runs(solver_runs)
+
+# Add solves that were collected elsewhere (such as in a farm process) to the current collection.
+def extend_solver_runs(solver_runs):
+    current_runs = _solver_runs.get()
+    if current_runs is not None:
+        current_runs.extend(solver_runs)
+    return None
+
+# The statistics of a finished solve, added to the current collection if there is one.
+# A solve that found a solution is the winning model unless a race between models says otherwise.
+def record_solver_run(agent_name, model, solver, status, relaxation_attempt=None, model_index=None):
+    variables, constraints = model_size(model)
+    has_solution = status in (cp_model.FEASIBLE, cp_model.OPTIMAL)
+    solver_run = {
+        "agent_name": agent_name,
+        "variables": variables,
+        "constraints": constraints,
+        "status": solver.StatusName(status),
+        "wall_time": solver.WallTime(),
+        "user_time": solver.UserTime(),
+        "objective": solver.ObjectiveValue() if has_solution else None,
+        "best_bound": solver.BestObjectiveBound() if has_solution else None,
+        "conflicts": solver.NumConflicts(),
+        "branches": solver.NumBranches(),
+        "relaxation_attempt": relaxation_attempt,
+        "model_index": model_index,
+        "winning_model": has_solution,
+        "model_tags": model.tag_summary() if isinstance(model, TaggedCpModel) else None
+    }
+    extend_solver_runs([solver_run])
+    return solver_run
+
+# The user of the current request, if the solve happens during one.
+def _current_user_id():
+    from flask import has_request_context
+    from flask_login import current_user
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+# Write the collected solves to the solver runs table.
+def save_solver_runs(solver_runs):
+    if not record_solver_runs or not solver_runs:
+        return None
+    from flask import has_app_context
+    if not has_app_context():
+        return None
+
+    from app import db
+    from app.models import Solver_Runs
+    user_id = _current_user_id()
+    try:
+        db.session.add_all([Solver_Runs(user_id=user_id, **solver_run) for solver_run in solver_runs])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        LogSolver.verbose(f"Could not record the solver runs: {e}")
+    return None
+
+# The value below which the given percentage of the values fall, interpolated between the nearest values.
+def percentile(values, percentage):
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * percentage / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+# Summarize the solves of each agent, with the percentiles of their times and model sizes.
+def summarize_solver_runs(solver_runs, percentages=(50, 90, 99)):
+    runs_by_agent = {}
+    for solver_run in solver_runs:
+        runs_by_agent.setdefault(solver_run.agent_name, []).append(solver_run)
+
+    summary = {}
+    for agent_name, agent_runs in runs_by_agent.items():
+        status_counts = {}
+        for solver_run in agent_runs:
+            status_counts[solver_run.status] = status_counts.get(solver_run.status, 0) + 1
+
+        summary[agent_name] = {
+            "runs": len(agent_runs),
+            "statuses": status_counts,
+            "total_wall_time": sum(solver_run.wall_time for solver_run in agent_runs),
+            "max_wall_time": max(solver_run.wall_time for solver_run in agent_runs),
+        }
+        for field in ("wall_time", "user_time", "variables", "constraints", "conflicts", "branches"):
+            values = [getattr(solver_run, field) for solver_run in agent_runs]
+            summary[agent_name][field] = {f"p{percentage}": percentile(values, percentage) for percentage in percentages}
+    return summary
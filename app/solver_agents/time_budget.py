@@ -0,0 +1,121 @@
+from config import AdaptiveTimeBudgetConfig
+from logging_config import LogSolver
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from threading import Lock
+from ortools.sat.python import cp_model
+
+# The size of a model, used to scale the solve times of previous models to a new one.
+def model_size(model):
+    proto = model.Proto()
+    return len(proto.variables), len(proto.constraints)
+
+# Records the time at which the solver found its first solution.
+class FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first_solution_time = None
+
+    def on_solution_callback(self):
+        if self.first_solution_time is None:
+            self.first_solution_time = self.WallTime()
+
+# The value below which the given fraction of the values fall.
+def _quantile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+class SolverTimeBudget:
+    """Plans the time and gap given to each solver from the solve times of its previous models."""
+    def __init__(self, history_size=AdaptiveTimeBudgetConfig.history_size):
+        self.history = defaultdict(lambda: deque(maxlen=history_size))
+        self.lock = Lock()
+
+        # Set within a farm process to the records of the job it is running, which are passed back to the process that started it.
+        self.job_records = None
+
+    # Store the outcome of a solve.
+    # A solve has converged if it proved optimality or stopped at the gap limit before running out of time.
+    # Solves stopped early by someone else (such as the losers of a race) are neither counted as converged nor as timed out.
+    def record(self, solver_name, model, solver, status, first_solution_time, stopped_early=False):
+        variables, constraints = model_size(model)
+        wall_time = solver.WallTime()
+        out_of_time = wall_time >= 0.99 * solver.parameters.max_time_in_seconds
+        converged = status == cp_model.OPTIMAL or (status == cp_model.FEASIBLE and not out_of_time and not stopped_early)
+        self.extend([(solver_name, {
+            "size": max(1, variables + constraints),
+            "timed_out": status == cp_model.UNKNOWN and out_of_time and not stopped_early,
+            "first_solution_time": first_solution_time,
+            "converged_time": wall_time if converged else None})])
+        return None
+
+    # Add records of solves made elsewhere (such as in a farm process) to the history.
+    def extend(self, records):
+        with self.lock:
+            for solver_name, record in records:
+                self.history[solver_name].append(record)
+            if self.job_records is not None:
+                self.job_records.extend(records)
+        return None
+
+    # A copy of the history, to be planned from in a farm process.
+    def snapshot(self):
+        with self.lock:
+            return {solver_name: list(records) for solver_name, records in self.history.items()}
+
+    # Plan from the history given for the duration of a job, collecting the records the job adds.
+    @contextmanager
+    def job(self, history):
+        with self.lock:
+            self.history.clear()
+            for solver_name, records in history.items():
+                self.history[solver_name].extend(records)
+            self.job_records = []
+        try:
+            yield self.job_records
+        finally:
+            with self.lock:
+                self.job_records = None
+
+    # Predict the time and gap for a new model of the solver.
+    # Times are scaled linearly by model size, and the budget covers the slower of finding a first solution and converging.
+    # The default time and no gap are kept until enough solves have been seen to make a prediction.
+    # Objectives weighting a secondary goal under a primary one may ask for no gap, as a gap would cost them the secondary goal.
+    # The planned time is capped at the given maximum, by default the longest budget allowed for a single solve.
+    def plan(self, solver_name, model, default_time, allow_gap=True, max_time=AdaptiveTimeBudgetConfig.max_time_in_seconds):
+        if not AdaptiveTimeBudgetConfig.enabled:
+            return default_time, 0.0
+
+        with self.lock:
+            records = list(self.history[solver_name])
+        feasible_records = [record for record in records if record["first_solution_time"] is not None]
+        converged_records = [record for record in records if record["converged_time"] is not None]
+        if len(feasible_records) < AdaptiveTimeBudgetConfig.min_samples:
+            return default_time, 0.0
+
+        variables, constraints = model_size(model)
+        size = max(1, variables + constraints)
+        predicted_first_solution = size * _quantile([record["first_solution_time"] / record["size"] for record in feasible_records], 0.9)
+        gap = AdaptiveTimeBudgetConfig.relative_gap_limit
+
+        # If most solves run out of time before reaching the gap, the plan settles for a looser gap rather than more time.
+        if len(converged_records) < len(feasible_records) / 2:
+            gap = AdaptiveTimeBudgetConfig.relaxed_relative_gap_limit
+            predicted_time = max(predicted_first_solution, default_time / AdaptiveTimeBudgetConfig.margin)
+        else:
+            predicted_converged = size * _quantile([record["converged_time"] / record["size"] for record in converged_records], 0.9)
+            predicted_time = max(predicted_first_solution, predicted_converged)
+
+        # Solves that ran out of time without any solution mean the prediction is too optimistic, so the default is kept as a floor.
+        if any(record["timed_out"] for record in records):
+            predicted_time = max(predicted_time, default_time / AdaptiveTimeBudgetConfig.margin)
+
+        max_time = min(
+            max_time,
+            max(AdaptiveTimeBudgetConfig.min_time_in_seconds, AdaptiveTimeBudgetConfig.margin * predicted_time))
+        if not allow_gap:
+            gap = 0.0
+        LogSolver.verbose(f"Planned {round(max_time, 3)} seconds with a gap limit of {gap} for the {solver_name} model from {len(records)} previous solves.")
+        return max_time, gap
+
+solver_time_budget = SolverTimeBudget()
@@ -1,5 +1,4 @@
 from datetime import date
-from tqdm import tqdm
 from sqlalchemy.orm import joinedload, selectinload
 
 from app.models import (
@@ -11,6 +10,7 @@ from app.models import (
     User_Workout_Days, 
     User_Equipment, 
     User_Exercises, 
+    User_Exercise_Capabilities, 
     User_Weekday_Availability, 
     Exercise_Component_Phases, 
     Exercise_Library, 
@@ -30,6 +30,7 @@ from app.models import (
     Weekday_Library)
 
 from app import db
+from app.utils.user_exercise_capabilities import ensure_user_exercise_capabilities
 
 
 # Retrieve the latest, currently active workday for a user.
@@ -113,31 +114,51 @@ def check_for_all_equipment(ex):
 
 # Retrieve all exercises that the user is able to perform.
 def user_possible_exercises(user_id):
-    user_exercises = (
+    ensure_user_exercise_capabilities(user_id)
+    available_exercises = (
         db.session.query(User_Exercises)
-        .filter(User_Exercises.user_id == user_id)
+        .join(User_Exercise_Capabilities, 
+              (User_Exercise_Capabilities.user_id == User_Exercises.user_id) & 
+              (User_Exercise_Capabilities.exercise_id == User_Exercises.exercise_id))
+        .filter(
+            User_Exercises.user_id == user_id, 
+            User_Exercise_Capabilities.is_feasible)
         .order_by(User_Exercises.exercise_id.asc())
         .distinct()
         .all()
     )
-
-    available_exercises = []
-    for user_exercise in user_exercises:
-        if check_for_all_equipment(user_exercise):
-            available_exercises.append(user_exercise)
     return available_exercises
 
-# Retrieve all exercises that the user is able to perform with the necessary information about it.
+# Retrieve all exercises that the user is able to perform with the user's capabilities for it, in a single indexed query.
+def user_capable_exercises(user_id):
+    ensure_user_exercise_capabilities(user_id)
+    capable_exercises = (
+        db.session.query(User_Exercises, User_Exercise_Capabilities)
+        .join(User_Exercise_Capabilities, 
+              (User_Exercise_Capabilities.user_id == User_Exercises.user_id) & 
+              (User_Exercise_Capabilities.exercise_id == User_Exercises.exercise_id))
+        .filter(
+            User_Exercises.user_id == user_id, 
+            User_Exercise_Capabilities.is_feasible)
+        .order_by(User_Exercises.exercise_id.asc())
+        .all()
+    )
+    return capable_exercises
+
+# Retrieve all exercises that the user is able to perform with the necessary information about it, and the user's capabilities for it.
 def user_possible_exercises_with_user_exercise_info(user_id):
-    user_exercises = (
-        db.session.query(Exercise_Library, User_Exercises)
+    ensure_user_exercise_capabilities(user_id)
+    available_exercises = (
+        db.session.query(Exercise_Library, User_Exercises, User_Exercise_Capabilities)
         .join(User_Exercises, Exercise_Library.id == User_Exercises.exercise_id)
-        .filter(User_Exercises.user_id == user_id)
+        .join(User_Exercise_Capabilities, 
+              (User_Exercise_Capabilities.user_id == User_Exercises.user_id) & 
+              (User_Exercise_Capabilities.exercise_id == User_Exercises.exercise_id))
+        .filter(
+            User_Exercises.user_id == user_id, 
+            User_Exercise_Capabilities.is_feasible)
         .order_by(Exercise_Library.id.asc())
         .options(
-            # user -> their equipment
-            joinedload(User_Exercises.users).selectinload(Users.equipment),
-
             # exercise -> each equipment bucket
             joinedload(User_Exercises.exercises).selectinload(Exercise_Library.supportive_equipment),
             joinedload(User_Exercises.exercises).selectinload(Exercise_Library.assistive_equipment),
@@ -167,12 +188,6 @@ def user_possible_exercises_with_user_exercise_info(user_id):
         )
         .all()
     )
-
-    # Access each has_* once; or better, call your single combined checker if you added it.
-    available_exercises = []
-    for user_exercise in tqdm(user_exercises, total=len(user_exercises), desc="Creating available exercise information list"):
-        if check_for_all_equipment(user_exercise[1]):
-            available_exercises.append(user_exercise)
     return available_exercises
 
 #### These methods are more efficient, though I am still struggling to compare the count of the equipment ids to the quantity required. I will look more into this.
@@ -0,0 +1,138 @@
+import numpy as np
+
+from app import db
+from app.models import (
+    User_Equipment,
+    Exercise_Supportive_Equipment,
+    Exercise_Assistive_Equipment,
+    Exercise_Weighted_Equipment,
+    Exercise_Marking_Equipment,
+    Exercise_Other_Equipment)
+from app.models.signals import library_version
+
+# The kinds of equipment an exercise may require, in the order they are compiled.
+equipment_kinds = {
+    "supportive": Exercise_Supportive_Equipment,
+    "assistive": Exercise_Assistive_Equipment,
+    "weighted": Exercise_Weighted_Equipment,
+    "marking": Exercise_Marking_Equipment,
+    "other": Exercise_Other_Equipment,
+}
+kind_indices = {kind: i for i, kind in enumerate(equipment_kinds)}
+
+class EquipmentRequirements:
+    """The equipment requirements of every exercise, compiled into arrays with one entry per required piece of equipment."""
+    def __init__(self, requirements):
+        # Each requirement is (exercise_id, kind, equipment_id, quantity, relationship).
+        requirements = sorted(requirements, key=lambda requirement: (requirement[0], kind_indices[requirement[1]]))
+        self.exercise_ids = np.unique(np.array([requirement[0] for requirement in requirements], dtype=np.int64))
+        self.exercise_rows = {int(exercise_id): row for row, exercise_id in enumerate(self.exercise_ids)}
+
+        exercise_rows = np.array([self.exercise_rows[requirement[0]] for requirement in requirements], dtype=np.int64)
+        kinds = np.array([kind_indices[requirement[1]] for requirement in requirements], dtype=np.int64)
+
+        # The requirements of an exercise for one kind of equipment form a group, all of which are needed unless they are alternatives.
+        self.groups = exercise_rows * len(equipment_kinds) + kinds
+        self.equipment_ids = np.array([requirement[2] for requirement in requirements], dtype=np.int64)
+        self.quantities = np.array([requirement[3] or 1 for requirement in requirements], dtype=np.int64)
+        self.is_alternative = np.array([(requirement[4] or "").lower() == "or" for requirement in requirements], dtype=bool)
+        self.group_count = len(self.exercise_ids) * len(equipment_kinds)
+
+        # Where the requirements of each group start and end.
+        self.group_bounds = np.searchsorted(self.groups, np.arange(self.group_count + 1))
+
+    # The exercises that require any of the equipment given, whose feasibility may change with it.
+    def exercises_requiring(self, equipment_ids):
+        rows = np.unique(self.groups[np.isin(self.equipment_ids, list(equipment_ids))] // len(equipment_kinds))
+        return self.exercise_ids[rows].tolist()
+
+    # Evaluate every exercise against the equipment of a user at once.
+    def evaluate(self, user_equipment):
+        return EquipmentFeasibility(self, user_equipment)
+
+class EquipmentFeasibility:
+    """Which exercises the equipment of a user allows, and the measurements of the equipment usable for each."""
+    def __init__(self, requirements, user_equipment):
+        self.requirements = requirements
+
+        # The user's equipment as a multiset of (equipment_id, measurement), sorted by equipment.
+        pairs = np.array(list(user_equipment), dtype=np.int64).reshape(-1, 2)
+        pairs, counts = np.unique(pairs, axis=0, return_counts=True)
+        self.owned_equipment_ids = pairs[:, 0]
+        self.owned_measurements = pairs[:, 1]
+        self.owned_counts = counts
+
+        # The most of a single measurement the user has of each piece of equipment.
+        size = int(max(self.owned_equipment_ids.max(initial=0), requirements.equipment_ids.max(initial=0))) + 1
+        most_owned = np.zeros(size, dtype=np.int64)
+        np.maximum.at(most_owned, self.owned_equipment_ids, self.owned_counts)
+        self.requirement_met = most_owned[requirements.equipment_ids] >= requirements.quantities
+
+        # A group is met when all of its required equipment is, and at least one of its alternatives if it has any.
+        groups, is_alternative, met = requirements.groups, requirements.is_alternative, self.requirement_met
+        required_unmet = np.bincount(groups[~is_alternative & ~met], minlength=requirements.group_count)
+        alternatives = np.bincount(groups[is_alternative], minlength=requirements.group_count)
+        alternatives_met = np.bincount(groups[is_alternative & met], minlength=requirements.group_count)
+        self.group_met = (required_unmet == 0) & ((alternatives == 0) | (alternatives_met > 0))
+        self.kinds_met = self.group_met.reshape(-1, len(equipment_kinds))
+        self.exercise_met = self.kinds_met.all(axis=1)
+
+    # Whether the user has all of the equipment the exercise requires. Exercises without requirements need none.
+    def has_all_equipment(self, exercise_id):
+        row = self.requirements.exercise_rows.get(exercise_id)
+        return row is None or bool(self.exercise_met[row])
+
+    # The measurements of the user's equipment with enough of each for a requirement.
+    def _measurements(self, equipment_id, quantity):
+        start, end = np.searchsorted(self.owned_equipment_ids, [equipment_id, equipment_id + 1])
+        enough = self.owned_counts[start:end] >= quantity
+        return self.owned_measurements[start:end][enough].tolist()
+
+    # Whether the user has the equipment of a kind the exercise requires, and the valid measurements of each piece of it.
+    # Matches the result of User_Exercises.has_equipment.
+    def has_equipment(self, exercise_id, kind):
+        row = self.requirements.exercise_rows.get(exercise_id)
+        if row is None:
+            return True, {}
+        group = row * len(equipment_kinds) + kind_indices[kind]
+        if not self.group_met[group]:
+            return False, {}
+
+        valid_measurements = {}
+        start, end = self.requirements.group_bounds[group], self.requirements.group_bounds[group + 1]
+        for i in range(start, end):
+            if self.requirement_met[i]:
+                equipment_id = int(self.requirements.equipment_ids[i])
+                measurements = valid_measurements.setdefault(equipment_id, [])
+                measurements.extend(self._measurements(equipment_id, self.requirements.quantities[i]))
+        return True, {equipment_id: sorted(set(measurements)) for equipment_id, measurements in valid_measurements.items()}
+
+# The compiled requirements, kept until the exercise library changes.
+_compiled_requirements = (None, None)
+
+# Compile the equipment requirements of every exercise, reusing them while the exercise library is unchanged.
+def compiled_equipment_requirements():
+    global _compiled_requirements
+    version = library_version()
+    requirements_version, requirements = _compiled_requirements
+    if requirements is not None and requirements_version == version:
+        return requirements
+
+    rows = [
+        (exercise_id, kind, equipment_id, quantity, relationship)
+        for kind, table in equipment_kinds.items()
+        for exercise_id, equipment_id, quantity, relationship in (
+            db.session.query(table.exercise_id, table.equipment_id, table.quantity, table.equipment_relationship).all())
+    ]
+    requirements = EquipmentRequirements(rows)
+    _compiled_requirements = (version, requirements)
+    return requirements
+
+# Evaluate every exercise against the equipment of the user in a single pass.
+def user_equipment_feasibility(user_id):
+    user_equipment = (
+        db.session.query(User_Equipment.equipment_id, User_Equipment.measurement)
+        .filter(User_Equipment.user_id == user_id)
+        .all()
+    )
+    return compiled_equipment_requirements().evaluate(user_equipment)
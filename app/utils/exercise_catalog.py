@@ -0,0 +1,123 @@
+from threading import Lock
+from types import MappingProxyType
+from typing import NamedTuple
+
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models import (
+    Exercise_Library,
+    Exercise_Body_Regions,
+    Exercise_Bodyparts,
+    Exercise_Muscle_Groups,
+    Exercise_Muscles,
+    Exercise_Supportive_Equipment,
+    Exercise_Assistive_Equipment,
+    Exercise_Weighted_Equipment,
+    Exercise_Marking_Equipment,
+    Exercise_Other_Equipment,
+    Muscle_Library,
+    Muscle_Group_Library,
+    Bodypart_Library,
+    Body_Region_Library)
+from app.models.signals import library_version
+
+class CatalogExercise(NamedTuple):
+    """The library information of an exercise, with its anatomy and equipment precomputed."""
+    id: int
+    name: str
+    general_id: int
+    general_name: str
+    base_strain: int
+    technical_difficulty: int
+    is_weighted: bool
+    component_ids: tuple
+    subcomponent_ids: tuple
+    pc_ids: tuple
+    body_region_ids: tuple
+    bodypart_ids: tuple
+    muscle_group_ids: tuple
+    muscle_ids: tuple
+    supportive_equipment: tuple
+    assistive_equipment: tuple
+    weighted_equipment: tuple
+    marking_equipment: tuple
+    other_equipment: tuple
+
+# The equipment required of a kind, frozen so the catalog can be shared between requests.
+def _frozen_equipment(equipment):
+    return tuple(MappingProxyType(required_equipment.to_dict()) for required_equipment in equipment)
+
+def _catalog_exercise(exercise):
+    return CatalogExercise(
+        id=exercise.id,
+        name=exercise.name,
+        general_id=exercise.general_exercise_id,
+        general_name=exercise.general_exercises.name,
+        base_strain=exercise.base_strain,
+        technical_difficulty=exercise.technical_difficulty,
+        is_weighted=exercise.is_weighted,
+        component_ids=tuple(component_phase.component_id for component_phase in exercise.component_phases),
+        subcomponent_ids=tuple(component_phase.subcomponent_id for component_phase in exercise.component_phases),
+        pc_ids=tuple((component_phase.component_id, component_phase.subcomponent_id) for component_phase in exercise.component_phases),
+        body_region_ids=tuple(sorted(exercise.all_body_region_ids)),
+        bodypart_ids=tuple(sorted(exercise.all_bodypart_ids)),
+        muscle_group_ids=tuple(sorted(exercise.all_muscle_group_ids)),
+        muscle_ids=tuple(sorted(exercise.all_muscle_ids)),
+        supportive_equipment=_frozen_equipment(exercise.supportive_equipment),
+        assistive_equipment=_frozen_equipment(exercise.assistive_equipment),
+        weighted_equipment=_frozen_equipment(exercise.weighted_equipment),
+        marking_equipment=_frozen_equipment(exercise.marking_equipment),
+        other_equipment=_frozen_equipment(exercise.other_equipment),
+    )
+
+# Load every exercise with the relationships its anatomy and equipment are found from, and precompute them.
+def build_exercise_catalog():
+    exercises = (
+        db.session.query(Exercise_Library)
+        .options(
+            selectinload(Exercise_Library.general_exercises),
+            selectinload(Exercise_Library.component_phases),
+
+            selectinload(Exercise_Library.muscles)
+                .selectinload(Exercise_Muscles.muscles)
+                    .selectinload(Muscle_Library.categories),
+            selectinload(Exercise_Library.muscle_groups)
+                .selectinload(Exercise_Muscle_Groups.muscle_groups)
+                    .selectinload(Muscle_Group_Library.categories),
+            selectinload(Exercise_Library.bodyparts)
+                .selectinload(Exercise_Bodyparts.bodyparts)
+                    .selectinload(Bodypart_Library.categories),
+            selectinload(Exercise_Library.body_regions)
+                .selectinload(Exercise_Body_Regions.body_regions)
+                    .selectinload(Body_Region_Library.categories),
+
+            selectinload(Exercise_Library.supportive_equipment).selectinload(Exercise_Supportive_Equipment.equipment),
+            selectinload(Exercise_Library.assistive_equipment).selectinload(Exercise_Assistive_Equipment.equipment),
+            selectinload(Exercise_Library.weighted_equipment).selectinload(Exercise_Weighted_Equipment.equipment),
+            selectinload(Exercise_Library.marking_equipment).selectinload(Exercise_Marking_Equipment.equipment),
+            selectinload(Exercise_Library.other_equipment).selectinload(Exercise_Other_Equipment.equipment),
+        )
+        .all()
+    )
+    return MappingProxyType({exercise.id: _catalog_exercise(exercise) for exercise in exercises})
+
+# The catalog shared by every request, with the library version it was built from.
+_catalog = (None, None)
+_catalog_lock = Lock()
+
+# The catalog of every exercise in the library, rebuilt only when the library version changes.
+def exercise_catalog():
+    global _catalog
+    version = library_version()
+    catalog_version, catalog = _catalog
+    if catalog is not None and catalog_version == version:
+        return catalog
+
+    with _catalog_lock:
+        catalog_version, catalog = _catalog
+        if catalog is not None and catalog_version == version:
+            return catalog
+        catalog = build_exercise_catalog()
+        _catalog = (version, catalog)
+    return catalog
@@ -0,0 +1,205 @@
+from collections.abc import Mapping, Sequence
+from operator import index
+
+import numpy as np
+
+# The fields stored as integer arrays, and those stored as boolean arrays. Fields with a missing value are kept as objects instead.
+integer_keys = (
+    "id", "general_id", "base_strain", "technical_difficulty",
+    "one_rep_max", "one_rep_load", "volume", "density", "intensity", "performance",
+    "duration", "working_duration")
+boolean_keys = ("is_weighted",)
+
+# The fields stored as packed bitsets of membership, and the field stored as a flat array of measurements per exercise.
+membership_keys = ("bodypart_ids", "pc_ids")
+weights_key = "weighted_equipment_measurements"
+
+def _is_integer(value):
+    return isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+# The column of a field, as an integer or boolean array when every value allows it.
+def _column(values, key):
+    if key in integer_keys and all(_is_integer(value) for value in values):
+        return _read_only(np.array(values, dtype=np.int64))
+    if key in boolean_keys and all(isinstance(value, (bool, np.bool_)) for value in values):
+        return _read_only(np.array(values, dtype=bool))
+    column = np.empty(len(values), dtype=object)
+    for row, value in enumerate(values):
+        column[row] = value
+    return _read_only(column)
+
+# The membership of each row in a set of members, packed eight members to a byte.
+# Members are numbered in sorted order, which is the order they are read back in.
+# Rows without a list, such as the inactive exercise, keep their value as a placeholder.
+# Returns the packed bits, the members, whether each row had a list, and the placeholder of each row.
+def _membership(values, member_key=lambda member: member):
+    listed = np.array([isinstance(value, (list, tuple)) for value in values], dtype=bool)
+    placeholders = np.empty(len(values), dtype=object)
+    for row in np.flatnonzero(~listed):
+        placeholders[row] = values[row]
+
+    members = sorted({member_key(member) for value, is_listed in zip(values, listed) if is_listed for member in value})
+    bits = {member: bit for bit, member in enumerate(members)}
+    membership = np.zeros((len(values), max(len(members), 1)), dtype=bool)
+    for row in np.flatnonzero(listed):
+        membership[row, [bits[member_key(member)] for member in values[row]]] = True
+    return _read_only(np.packbits(membership, axis=1)), members, _read_only(listed), _read_only(placeholders)
+
+class ExerciseTable(Sequence):
+    """The exercises available to a user, stored as one array per field, with a read-only view of each exercise as a row."""
+    def __init__(self, keys, columns, memberships, weights, weight_rows, weight_bounds):
+        self.keys = keys
+        self._columns = columns
+        self._memberships = memberships
+        self._weights = weights
+        self._weight_rows = weight_rows
+        self._weight_bounds = weight_bounds
+        self._member_bits = {key: {member: bit for bit, member in enumerate(members)} for key, (_, members, _, _) in memberships.items()}
+
+    # Build the table from exercises shaped like those of construct_available_exercises_list, with the fields of the first.
+    @classmethod
+    def from_dicts(cls, exercises):
+        exercises = list(exercises)
+        keys = tuple(exercises[0]) if exercises else ()
+        columns = {
+            key: _column([exercise[key] for exercise in exercises], key)
+            for key in keys if key not in membership_keys and key != weights_key}
+        memberships = {
+            key: _membership([exercise[key] for exercise in exercises], tuple if key == "pc_ids" else lambda member: member)
+            for key in keys if key in membership_keys}
+
+        # The measurements of every exercise one after the other, with where those of each exercise start and end.
+        weights, weight_rows, weight_bounds = [], [], [0]
+        for row, exercise in enumerate(exercises):
+            measurements = exercise.get(weights_key) or []
+            weights.extend(measurements)
+            weight_rows.extend([row] * len(measurements))
+            weight_bounds.append(len(weights))
+        return cls(
+            keys, columns, memberships,
+            _read_only(np.array(weights, dtype=np.int64)),
+            _read_only(np.array(weight_rows, dtype=np.int64)),
+            _read_only(np.array(weight_bounds, dtype=np.int64)))
+
+    def to_dicts(self):
+        return [dict(row) for row in self]
+
+    def __len__(self):
+        return len(self._weight_bounds) - 1
+
+    # A single exercise as a row, or a range of exercises as a table sharing the arrays of this one.
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                raise ValueError("Exercise tables may only be sliced with a step of 1.")
+            stop = max(start, stop)
+            weight_start, weight_stop = self._weight_bounds[start], self._weight_bounds[stop]
+            return ExerciseTable(
+                self.keys,
+                {key: column[start:stop] for key, column in self._columns.items()},
+                {
+                    key: (bits[start:stop], members, listed[start:stop], placeholders[start:stop])
+                    for key, (bits, members, listed, placeholders) in self._memberships.items()},
+                self._weights[weight_start:weight_stop],
+                _read_only(self._weight_rows[weight_start:weight_stop] - start),
+                _read_only(self._weight_bounds[start:stop + 1] - weight_start))
+
+        row = index(item)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("Exercise index out of range.")
+        return ExerciseRow(self, row)
+
+    # The table cannot be altered, so copies of it may share it.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"ExerciseTable({len(self)} exercises)"
+
+    # The values of a field for every exercise. Membership fields and the weighted measurements are only available through the methods below.
+    def column(self, key):
+        return self._columns[key]
+
+    # Whether each exercise is a member of the given bodypart or phase component.
+    def _is_member(self, key, member):
+        bits, _, _, _ = self._memberships[key]
+        bit = self._member_bits[key].get(member)
+        if bit is None:
+            return np.zeros(len(self), dtype=bool)
+        return (bits[:, bit >> 3] >> (7 - (bit & 7))) & 1 == 1
+
+    # Whether each exercise works the bodypart.
+    def has_bodypart(self, bodypart_id):
+        return self._is_member("bodypart_ids", bodypart_id)
+
+    # Whether each exercise is allowed for the phase component, given as its component and subcomponent ids.
+    def allows_pc(self, pc_ids):
+        return self._is_member("pc_ids", tuple(pc_ids))
+
+    # The heaviest of the weighted measurements available for each exercise, or 0 if it has none.
+    def max_weights(self):
+        max_weights = np.zeros(len(self), dtype=np.int64)
+        np.maximum.at(max_weights, self._weight_rows, self._weights)
+        return max_weights
+
+    # Whether each exercise is unweighted or has a weighted measurement matching the training weight at an intensity in the range.
+    # The training weight at an intensity is intensity * one_rep_max // 100, so a measurement matches the intensities from
+    # ceil(100 * measurement / one_rep_max) up to ceil(100 * (measurement + 1) / one_rep_max) - 1.
+    def has_valid_weights(self, intensity_min, intensity_max):
+        intensity_min = intensity_min or 1
+        one_rep_max = self.column("one_rep_max")[self._weight_rows]
+        has_one_rep_max = one_rep_max > 0
+        divisor = np.where(has_one_rep_max, one_rep_max, 1)
+        lowest = np.maximum(intensity_min, -(-100 * self._weights // divisor))
+        highest = np.minimum(intensity_max, -(-100 * (self._weights + 1) // divisor) - 1)
+        matches = np.where(has_one_rep_max, lowest <= highest, (self._weights == 0) & (intensity_min <= intensity_max))
+        has_match = np.bincount(self._weight_rows[matches], minlength=len(self)) > 0
+        return ~self.column("is_weighted").astype(bool) | has_match
+
+    # The value of a field for a single exercise, as the plain Python value it was built from.
+    def _value(self, row, key):
+        if key in self._columns:
+            return self._columns[key][row].item() if self._columns[key].dtype != object else self._columns[key][row]
+        if key in self._memberships:
+            bits, members, listed, placeholders = self._memberships[key]
+            if not listed[row]:
+                return placeholders[row]
+            member_bits = np.flatnonzero(np.unpackbits(bits[row], count=len(members)))
+            return [list(members[bit]) if key == "pc_ids" else members[bit] for bit in member_bits]
+        if key == weights_key:
+            return self._weights[self._weight_bounds[row]:self._weight_bounds[row + 1]].tolist()
+        raise KeyError(key)
+
+class ExerciseRow(Mapping):
+    """A read-only view of a single exercise of an exercise table, used as the exercise dictionaries were."""
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, key):
+        return self.table._value(self.row, key)
+
+    def __iter__(self):
+        return iter(self.table.keys)
+
+    def __len__(self):
+        return len(self.table.keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+# The exercises as a table, leaving those already in one as they are.
+def as_exercise_table(exercises):
+    return exercises if isinstance(exercises, ExerciseTable) else ExerciseTable.from_dicts(exercises)
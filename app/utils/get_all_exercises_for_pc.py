@@ -1,24 +1,45 @@
-import copy
+import numpy as np
 from logging_config import LogSolverPreProcessing
 from config import BackupExerciseRetrieval as BackupRetrieval
-
-def get_exercises_for_pc_conditions(exercises, phase_component, conditions=[]):
-    return [i for i, exercise in enumerate(exercises, start=1) 
-            if all(f(exercise, phase_component) for f in conditions)]
-
-# Loop through the found exercises and determine which ones are true exercises.
+from app.utils.exercise_table import as_exercise_table
+
+# The mask of a condition for every phase component, evaluated once for each distinct value the condition depends on.
+def _masks_by(exercises, phase_components, key, mask_for):
+    masks = {}
+    pc_masks = np.zeros((len(phase_components), len(exercises)), dtype=bool)
+    for i, phase_component in enumerate(phase_components):
+        value = key(phase_component)
+        if value not in masks:
+            masks[value] = mask_for(value)
+        pc_masks[i] = masks[value]
+    return pc_masks
+
+# The exercises found by each tier of retrieval for every phase component, as rows of masks over the exercises.
+# The tiers only differ in which of the phase component, bodypart and weight conditions they combine, so each condition is evaluated once.
+def exercise_masks_for_pcs(exercises, phase_components):
+    exercises = as_exercise_table(exercises)
+    allowed_for_phase_component = _masks_by(exercises, phase_components, lambda pc: tuple(pc["pc_ids"]), exercises.allows_pc)
+    of_desired_bodypart = _masks_by(exercises, phase_components, lambda pc: pc["bodypart_id"], exercises.has_bodypart)
+    has_valid_weights = _masks_by(
+        exercises, phase_components, lambda pc: (pc["intensity_min"], pc["intensity_max"]),
+        lambda intensity_range: exercises.has_valid_weights(*intensity_range))
+    return {
+        "true_exercises": allowed_for_phase_component & of_desired_bodypart & has_valid_weights,
+        "phase_component": allowed_for_phase_component & has_valid_weights,
+        "bodypart": of_desired_bodypart & has_valid_weights,
+        "all": has_valid_weights,
+    }
+
+# Indicate which of the found exercises are true exercises, and why the others are there.
 def indicate_if_exercise_is_true(true_exercises, found_exercises, flag_if_not_true="No reason."):
-    true_exercises_indicator = {}
-    for found_exercise in found_exercises:
-        # If the exercise is a true exercise, indicate this.
-        if found_exercise in true_exercises:
-            true_exercises_indicator[found_exercise] = "True Exercise"
-        # If the exercise isn't a true exercise, indicate why it is there.
-        else:
-            true_exercises_indicator[found_exercise] = flag_if_not_true
-    return true_exercises_indicator
-
-def get_exercises_for_pc(exercises, phase_component):
+    return {
+        int(i) + 1: "True Exercise" if true_exercises[i] else flag_if_not_true
+        for i in np.flatnonzero(found_exercises)
+    }
+
+# The exercises for a phase component, falling back to wider tiers of exercises while there are too few.
+# The masks of the phase component may be given, as found by exercise_masks_for_pcs, to avoid evaluating them again.
+def get_exercises_for_pc(exercises, phase_component, masks=None):
     action_messages=[
         "INCLUDE ALL EXERCISES FOR PHASE COMPONENT SINCE TOTAL BODY:",
         "INCLUDE ALL EXERCISES FOR BODYPART:",
@@ -30,87 +51,55 @@ def get_exercises_for_pc(exercises, phase_component):
         ]
     action_messages_max_length = len(max(action_messages, key=len))
 
-    # Retrieve range of intensities possible.
-    pc_intensity = list(range(phase_component["intensity_min"] or 1, phase_component["intensity_max"] + 1))
-
-    exercise_is_allowed_for_phase_component = lambda exercise, phase_component: phase_component["pc_ids"] in exercise["pc_ids"]
-    exercise_is_of_desired_bodypart = lambda exercise, phase_component: phase_component["bodypart_id"] in exercise["bodypart_ids"]
-    exercise_is_of_desired_bodypart_or_total_body = lambda exercise, phase_component: (1 in exercise["bodypart_ids"]) or (phase_component["bodypart_id"] in exercise["bodypart_ids"])
-
-    exercise_has_valid_weights = lambda exercise, _: (
-        not exercise["is_weighted"] or  # Allow all unweighted
-        bool(set((intensity * exercise["one_rep_max"] // 100) for intensity in pc_intensity) & set(exercise["weighted_equipment_measurements"]))
-    )
+    if masks is None:
+        masks = {tier: tier_masks[0] for tier, tier_masks in exercise_masks_for_pcs(exercises, [phase_component]).items()}
 
     # True Exercises for the PC at the bodypart.
-    exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, 
-                                                       conditions=[
-                                                           exercise_is_allowed_for_phase_component,
-                                                           exercise_is_of_desired_bodypart,
-                                                           exercise_has_valid_weights
-                                                       ])
-    
-    true_exercises_for_pc = copy.deepcopy(exercises_for_pc)
+    exercises_for_pc = masks["true_exercises"]
+    true_exercises_for_pc = masks["true_exercises"]
+    exercise_count = lambda: np.count_nonzero(exercises_for_pc)
 
     message = None
     pc_name = f"'{phase_component['component_name'].upper()}' '{phase_component['subcomponent_name'].upper()}'"
     true_exercises_message = f"{phase_component['pc_name']} doesn't have enough exercises for bodypart '{phase_component['bodypart_name'].upper()}'."
 
     # Adds all exercises for the phase component if the body part is full body.
-    if BackupRetrieval.for_desired_full_body and ((len(exercises_for_pc) < phase_component['exercises_per_bodypart_workout_min'])) and (phase_component["bodypart_id"] == 1):
+    if BackupRetrieval.for_desired_full_body and ((exercise_count() < phase_component['exercises_per_bodypart_workout_min'])) and (phase_component["bodypart_id"] == 1):
         action_message = action_messages[0]
         message = f"Bodypart is total body, so all exercises for component {pc_name} will be included."
         LogSolverPreProcessing.exercises_for_pc_steps(f"{action_message} {true_exercises_message} {message}")
-        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, 
-                                                           conditions=[
-                                                               exercise_is_allowed_for_phase_component,
-                                                               exercise_has_valid_weights
-                                                           ])
+        exercises_for_pc = masks["phase_component"]
 
     # Adds all exercises of a bodypart if there are still no exercises.
-    if BackupRetrieval.for_desired_bodypart and (len(exercises_for_pc) < phase_component['exercises_per_bodypart_workout_min']):
+    if BackupRetrieval.for_desired_bodypart and (exercise_count() < phase_component['exercises_per_bodypart_workout_min']):
         action_message = action_messages[1]
         message = f"Including all exercises for bodypart '{phase_component['bodypart_name'].upper()}'."
         LogSolverPreProcessing.exercises_for_pc_steps(f"{action_message} {true_exercises_message} {message}")
-        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, 
-                                                           conditions=[
-                                                               exercise_is_of_desired_bodypart,
-                                                               exercise_has_valid_weights
-                                                           ])
+        exercises_for_pc = masks["bodypart"]
 
 
     # Adds all exercises for a phase component if there are still no exercises.
-    if BackupRetrieval.for_desired_phase_component and (len(exercises_for_pc) < phase_component['exercises_per_bodypart_workout_min']):
+    if BackupRetrieval.for_desired_phase_component and (exercise_count() < phase_component['exercises_per_bodypart_workout_min']):
         action_message = action_messages[2]
         message = f"Including all exercises for component {pc_name}."
         LogSolverPreProcessing.exercises_for_pc_steps(f"{action_message} {true_exercises_message} {message}")
-        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, 
-                                                           conditions=[
-                                                               exercise_is_allowed_for_phase_component,
-                                                               exercise_has_valid_weights
-                                                           ])
+        exercises_for_pc = masks["phase_component"]
 
     # Adds all exercises if the body part is full body.
-    if BackupRetrieval.for_desired_full_body and BackupRetrieval.for_desired_bodypart and ((len(exercises_for_pc) < phase_component['exercises_per_bodypart_workout_min'])) and (phase_component["bodypart_id"] == 1):
+    if BackupRetrieval.for_desired_full_body and BackupRetrieval.for_desired_bodypart and ((exercise_count() < phase_component['exercises_per_bodypart_workout_min'])) and (phase_component["bodypart_id"] == 1):
         action_message = action_messages[3]
         message = f"Bodypart is total body, so all exercises for component {pc_name} will be included."
         LogSolverPreProcessing.exercises_for_pc_steps(f"{action_message} {true_exercises_message} {message}")
-        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, 
-                                                           conditions=[
-                                                               exercise_has_valid_weights
-                                                           ])
+        exercises_for_pc = masks["all"]
 
     # Adds all exercises if there are still no exercises.
-    if BackupRetrieval.all_exercises and (len(exercises_for_pc) < phase_component['exercises_per_bodypart_workout_min']):
+    if BackupRetrieval.all_exercises and (exercise_count() < phase_component['exercises_per_bodypart_workout_min']):
         action_message = action_messages[-3]
         message = f"Including all exercises."
         LogSolverPreProcessing.exercises_for_pc_steps(f"{action_message} {true_exercises_message} {message}")
-        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, 
-                                                           conditions=[
-                                                               exercise_has_valid_weights
-                                                           ])
+        exercises_for_pc = masks["all"]
 
-    if len(exercises_for_pc) < phase_component['exercises_per_bodypart_workout_min']:
+    if exercise_count() < phase_component['exercises_per_bodypart_workout_min']:
         action_message = action_messages[-2]
         LogSolverPreProcessing.exercises_for_pc_steps(f"{action_message:<{action_messages_max_length}} {true_exercises_message} {message}")
         message = f"No solution found."
@@ -121,47 +110,42 @@ def get_exercises_for_pc(exercises, phase_component):
         LogSolverPreProcessing.exercises_for_pc_steps("")
 
     # Log whether no exercises were found yet none were needed.
-    elif phase_component['exercises_per_bodypart_workout_min'] == 0 and len(exercises_for_pc) == 0:
+    elif phase_component['exercises_per_bodypart_workout_min'] == 0 and exercise_count() == 0:
         action_message = action_messages[-1]
         true_exercises_message = f"{phase_component['pc_name']} had and needs NO exercises for bodypart '{phase_component['bodypart_name'].upper()}'."
         message = "None were required so no action was taken."
         LogSolverPreProcessing.verbose(f"{action_message:<{action_messages_max_length}} {true_exercises_message} {message}")
 
     true_exercise_indicators_for_pc = indicate_if_exercise_is_true(true_exercises_for_pc, exercises_for_pc, message)
-    return exercises_for_pc, true_exercise_indicators_for_pc
+    return (np.flatnonzero(exercises_for_pc) + 1).tolist(), true_exercise_indicators_for_pc
 
 # A method for retrieving the possible exercises for all phase components.
 # This method removes exercises specific for a phase commponent from those that are allowed for a phase component without any true exercises.
 def get_exercises_for_all_pcs(exercises, phase_components):
-    number_of_possible_exercises = len(exercises)
-
-    exercise_and_indicators_for_pcs = [
-        get_exercises_for_pc(exercises, phase_component)
-        for phase_component in phase_components
-    ]
+    exercises = as_exercise_table(exercises)
+    masks = exercise_masks_for_pcs(exercises, phase_components)
 
     exercises_for_pcs=[]
     true_exercise_indicators_for_pcs=[]
-    for exercises_for_pc, true_exercise_indicators_for_pc in exercise_and_indicators_for_pcs:
+    for i, phase_component in enumerate(phase_components):
+        exercises_for_pc, true_exercise_indicators_for_pc = get_exercises_for_pc(
+            exercises, phase_component, {tier: tier_masks[i] for tier, tier_masks in masks.items()})
         exercises_for_pcs.append(exercises_for_pc)
         true_exercise_indicators_for_pcs.append(true_exercise_indicators_for_pc)
 
+    # The exercises found for each phase component, as a row of a mask over the exercises.
+    found = np.zeros((len(phase_components), len(exercises)), dtype=bool)
+    for i, exercises_for_pc in enumerate(exercises_for_pcs):
+        found[i, np.asarray(exercises_for_pc, dtype=np.int64) - 1] = True
+
     # All phase components that have every possible exercise applied to them.
-    pc_indices_without_true_exercises = [
-        i
-        for i in range(len(exercises_for_pcs))
-        if len(exercises_for_pcs[i]) == number_of_possible_exercises
-    ]
-
-    # Remove the exercises from the phase components without true exercises for minimum searching.
-    for i in pc_indices_without_true_exercises:
-        exercises_for_pc = exercises_for_pcs[i]
-        # Compare to every other list of exercises that have true exercises.
-        for j in range(len(exercises_for_pcs)):
-            if j in pc_indices_without_true_exercises:
-                continue
-            exercises_for_pc = list(set(exercises_for_pc) - set(exercises_for_pcs[j]))
-        if exercises_for_pc:
-            exercises_for_pcs[i] = exercises_for_pc
+    without_true_exercises = found.all(axis=1)
+
+    # Remove the exercises of every phase component with true exercises from the phase components without true exercises for minimum searching.
+    found_with_true_exercises = found[~without_true_exercises].any(axis=0)
+    for i in np.flatnonzero(without_true_exercises):
+        exercises_for_pc = np.flatnonzero(found[i] & ~found_with_true_exercises) + 1
+        if exercises_for_pc.size:
+            exercises_for_pcs[i] = exercises_for_pc.tolist()
 
     return exercises_for_pcs, true_exercise_indicators_for_pcs
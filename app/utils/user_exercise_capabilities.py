@@ -0,0 +1,63 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Exercise_Library, User_Exercise_Capabilities, Users
+from app.utils.equipment_feasibility import equipment_kinds, compiled_equipment_requirements, user_equipment_feasibility
+
+# The stored capabilities of a user for each exercise, from their equipment evaluated for every exercise at once.
+def _capability_rows(user_id, equipment_feasibility, exercise_ids):
+    rows = []
+    for exercise_id in exercise_ids:
+        row = {"user_id": user_id, "exercise_id": exercise_id, "is_feasible": equipment_feasibility.has_all_equipment(exercise_id)}
+        for kind in equipment_kinds:
+            _, measurements = equipment_feasibility.has_equipment(exercise_id, kind)
+            row[f"{kind}_measurements"] = {str(equipment_id): values for equipment_id, values in measurements.items()}
+        rows.append(row)
+    return rows
+
+# Recompute the capabilities of a user for the exercises given, or for every exercise.
+def refresh_user_exercise_capabilities(user_id, exercise_ids=None, commit=True):
+    if exercise_ids is None:
+        exercise_ids = [exercise_id for exercise_id, in db.session.query(Exercise_Library.id).all()]
+    exercise_ids = list(exercise_ids)
+
+    capabilities = User_Exercise_Capabilities.query.filter(User_Exercise_Capabilities.user_id == user_id)
+    if exercise_ids:
+        capabilities.filter(User_Exercise_Capabilities.exercise_id.in_(exercise_ids)).delete(synchronize_session=False)
+        db.session.execute(insert(User_Exercise_Capabilities), _capability_rows(user_id, user_equipment_feasibility(user_id), exercise_ids))
+    if commit:
+        db.session.commit()
+    return len(exercise_ids)
+
+# Recompute the capabilities of a user after the equipment given was added or removed.
+# Only the exercises requiring that equipment can change.
+def refresh_user_exercise_capabilities_for_equipment(user_id, equipment_ids, commit=True):
+    if not user_has_exercise_capabilities(user_id):
+        return refresh_user_exercise_capabilities(user_id, commit=commit)
+    exercise_ids = compiled_equipment_requirements().exercises_requiring(equipment_ids)
+    return refresh_user_exercise_capabilities(user_id, exercise_ids, commit=commit)
+
+# Recompute the capabilities of every user, such as after the exercise library is reloaded.
+def refresh_all_user_exercise_capabilities():
+    User_Exercise_Capabilities.query.delete(synchronize_session=False)
+    for user_id, in db.session.query(Users.id).all():
+        refresh_user_exercise_capabilities(user_id, commit=False)
+    db.session.commit()
+    return None
+
+def user_has_exercise_capabilities(user_id):
+    return db.session.query(User_Exercise_Capabilities.query.filter(User_Exercise_Capabilities.user_id == user_id).exists()).scalar()
+
+# Make sure the capabilities of a user exist, as users added before the table existed have none until they are first needed.
+# Concurrent first requests may both fill them in, in which case the one that loses keeps the rows of the other.
+def ensure_user_exercise_capabilities(user_id):
+    if user_has_exercise_capabilities(user_id):
+        return None
+    try:
+        with db.session.begin_nested():
+            refresh_user_exercise_capabilities(user_id, commit=False)
+    except IntegrityError:
+        return None
+    db.session.commit()
+    return None
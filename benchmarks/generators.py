@@ -0,0 +1,264 @@
+from random import Random
+from copy import deepcopy
+
+from app.main_agent.utils import verify_pc_information, construct_available_general_exercises_list, retrieve_total_time_needed
+from app.main_agent.utils.construct_lists_from_sql.exercises import dummy_exercise
+from app.main_agent.utils.construct_lists_from_sql.user_workout_components import dummy_phase_component
+from app.main_agent.utils.construct_lists_from_sql.phases import dummy_phase
+from app.utils.exercise_table import ExerciseTable
+
+# ----------------------------------------- Synthetic Libraries -----------------------------------------
+
+bodyparts = {1: "total_body", 2: "chest", 3: "back", 4: "shoulders", 5: "arms", 6: "legs", 7: "core"}
+subcomponents = {1: "stabilization", 2: "strength", 3: "power"}
+weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# The components that phase components are made from, with ranges resembling the OPT model.
+# Rest is given in seconds and divided by 5 when the phase component is constructed, as it is in the database lists.
+components = {
+    1: {"name": "flexibility", "is_warmup": True, "required_every_workout": True, "required_within_microcycle": "always",
+        "reps": (1, 1), "sets": (1, 2), "seconds_per_exercise": 30, "rest": (0, 0), "intensity": (None, None),
+        "exercises": (1, 3), "frequency": (1, 7)},
+    2: {"name": "core", "is_warmup": False, "required_every_workout": False, "required_within_microcycle": "always",
+        "reps": (12, 20), "sets": (1, 3), "seconds_per_exercise": 4, "rest": (0, 60), "intensity": (None, None),
+        "exercises": (1, 2), "frequency": (1, 3)},
+    3: {"name": "balance", "is_warmup": False, "required_every_workout": False, "required_within_microcycle": "optional",
+        "reps": (12, 20), "sets": (1, 3), "seconds_per_exercise": 4, "rest": (0, 60), "intensity": (None, None),
+        "exercises": (1, 2), "frequency": (1, 3)},
+    4: {"name": "plyometric", "is_warmup": False, "required_every_workout": False, "required_within_microcycle": "optional",
+        "reps": (5, 10), "sets": (1, 3), "seconds_per_exercise": 2, "rest": (0, 90), "intensity": (None, None),
+        "exercises": (1, 2), "frequency": (1, 2)},
+    5: {"name": "saq", "is_warmup": False, "required_every_workout": False, "required_within_microcycle": "optional",
+        "reps": (2, 4), "sets": (1, 3), "seconds_per_exercise": 10, "rest": (0, 90), "intensity": (None, None),
+        "exercises": (1, 2), "frequency": (1, 2)},
+    6: {"name": "resistance", "is_warmup": False, "required_every_workout": False, "required_within_microcycle": "always",
+        "reps": (8, 12), "sets": (2, 4), "seconds_per_exercise": 4, "rest": (60, 90), "intensity": (60, 80),
+        "exercises": (1, 2), "frequency": (1, 3)},
+}
+
+# The order that phase components are added in, so that small instances still mix resistance with the other components.
+component_bodypart_order = [(1, 1), (6, 2), (2, 1), (6, 3), (3, 1), (6, 4), (4, 1), (6, 5), (5, 1), (6, 6), (6, 7)]
+
+# The durations of a single exercise of the component, in seconds.
+def _component_durations(component):
+    working_duration_min = component["seconds_per_exercise"] * component["reps"][0] * component["sets"][0]
+    working_duration_max = component["seconds_per_exercise"] * component["reps"][1] * component["sets"][1]
+    duration_min = working_duration_min + component["rest"][0] * component["sets"][0]
+    duration_max = working_duration_max + component["rest"][1] * component["sets"][1]
+    return working_duration_min, working_duration_max, duration_min, duration_max
+
+# The component, subcomponent and bodypart of each of the phase components.
+def _phase_component_keys(phase_component_count):
+    return [
+        (component_id, (i // len(component_bodypart_order)) % len(subcomponents) + 1, bodypart_id)
+        for i, (component_id, bodypart_id) in (
+            (i, component_bodypart_order[i % len(component_bodypart_order)])
+            for i in range(phase_component_count))
+    ]
+
+# The fields shared by the phase components used by the microcycle and workout solvers.
+def _phase_component_base(component_id, subcomponent_id, bodypart_id, phase_id=1):
+    component = components[component_id]
+    pc_id = (subcomponent_id - 1) * len(components) + component_id
+    pc_name = f"'PHASE {phase_id}' '{component['name'].upper()}' '{subcomponents[subcomponent_id].upper()}'"
+    return {
+        "phase_component_id": pc_id,
+        "name": f"{component['name']} {subcomponents[subcomponent_id]}",
+        "pc_name": pc_name,
+        "pc_name_for_bodypart": f"{pc_name} for bodypart '{bodyparts[bodypart_id].upper()}'",
+        "phase_id": phase_id,
+        "phase_name": f"phase {phase_id}",
+        "component_id": component_id,
+        "component_name": component["name"],
+        "subcomponent_id": subcomponent_id,
+        "subcomponent_name": subcomponents[subcomponent_id],
+        "pc_ids": [component_id, subcomponent_id],
+        "required_every_workout": component["required_every_workout"],
+        "required_within_microcycle": component["required_within_microcycle"],
+        "intensity_min": component["intensity"][0],
+        "intensity_max": component["intensity"][1] or 100,
+        "exercises_per_bodypart_workout_min": component["exercises"][0],
+        "exercises_per_bodypart_workout_max": component["exercises"][1],
+        "bodypart_id": bodypart_id,
+        "bodypart_name": bodyparts[bodypart_id],
+    }
+
+# Phase components shaped like those built for the microcycle solver by construct_phase_component_list.
+def synthetic_phase_components(phase_component_count):
+    phase_components = []
+    for component_id, subcomponent_id, bodypart_id in _phase_component_keys(phase_component_count):
+        component = components[component_id]
+        _, _, duration_min, duration_max = _component_durations(component)
+        pc = _phase_component_base(component_id, subcomponent_id, bodypart_id)
+        pc.update({
+            "id": pc["phase_component_id"],
+            "frequency_per_microcycle_min": component["frequency"][0],
+            "frequency_per_microcycle_max": component["frequency"][1],
+            "duration_min": duration_min,
+            "duration_max": duration_max,
+            "duration_min_for_day": duration_min * component["exercises"][0],
+            "duration_max_for_day": duration_max * component["exercises"][1],
+            "duration_min_desired": duration_min,
+            "duration_min_max": duration_min,
+            "bodypart": bodyparts[bodypart_id],
+        })
+        phase_components.append(pc)
+    return phase_components
+
+# Workout components shaped like those built for the workout solvers by construct_user_workout_components_list.
+def synthetic_workout_components(phase_component_count):
+    workout_components = [deepcopy(dummy_phase_component)]
+    for i, (component_id, subcomponent_id, bodypart_id) in enumerate(_phase_component_keys(phase_component_count), start=1):
+        component = components[component_id]
+        working_duration_min, working_duration_max, duration_min, duration_max = _component_durations(component)
+        pc = _phase_component_base(component_id, subcomponent_id, bodypart_id)
+        pc.update({
+            "workout_component_id": i,
+            "workout_day_id": 1,
+            "duration": duration_max * component["exercises"][0],
+            "is_warmup": component["is_warmup"],
+            "density_priority": 1,
+            "volume_priority": 1,
+            "load_priority": 1,
+            "reps_min": component["reps"][0],
+            "reps_max": component["reps"][1],
+            "sets_min": component["sets"][0],
+            "sets_max": component["sets"][1],
+            "tempo": "1/1/1",
+            "seconds_per_exercise": component["seconds_per_exercise"],
+            "rest_min": component["rest"][0] // 5,
+            "rest_max": component["rest"][1] // 5,
+            "duration_min": duration_min,
+            "duration_min_desired": duration_min,
+            "duration_min_max": duration_min,
+            "duration_max": duration_max,
+            "working_duration_min": working_duration_min,
+            "working_duration_max": working_duration_max,
+            "volume_min": component["reps"][0] * component["sets"][0],
+            "volume_max": component["reps"][1] * component["sets"][1],
+            "density_min": 0,
+            "density_max": 100,
+            "exercise_selection_note": None,
+        })
+        workout_components.append(pc)
+    return workout_components
+
+# Exercises shaped like those built by construct_available_exercises_list, spread over the components and bodyparts.
+# Every few exercises share a general exercise, as variations of the same movement do.
+def synthetic_exercises(exercise_count, seed=0, exercises_per_general_exercise=3):
+    rng = Random(seed)
+    pc_ids = [[component_id, subcomponent_id] for subcomponent_id in subcomponents for component_id in components]
+    exercises = [deepcopy(dummy_exercise)]
+    for i in range(1, exercise_count + 1):
+        general_id = (i - 1) // exercises_per_general_exercise + 1
+        is_weighted = rng.random() < 0.5
+        one_rep_max = rng.randrange(20, 200, 5) if is_weighted else 0
+        bodypart_ids = [1] if rng.random() < 0.2 else sorted(rng.sample(range(2, len(bodyparts) + 1), rng.randint(1, 2)))
+        exercise_pc_ids = rng.sample(pc_ids, rng.randint(1, 3))
+        volume = rng.randint(10, 60)
+        density = rng.randint(20, 80)
+        exercises.append({
+            "id": i,
+            "name": f"exercise {i}",
+            "general_id": general_id,
+            "general_name": f"general exercise {general_id}",
+            "base_strain": rng.randint(0, 5),
+            "technical_difficulty": rng.randint(1, 5),
+            "component_ids": [component_id for component_id, _ in exercise_pc_ids],
+            "subcomponent_ids": [subcomponent_id for _, subcomponent_id in exercise_pc_ids],
+            "pc_ids": exercise_pc_ids,
+            "body_region_ids": [],
+            "bodypart_ids": bodypart_ids,
+            "muscle_group_ids": [],
+            "muscle_ids": [],
+            "supportive_equipment_ids": [],
+            "supportive_equipment_measurements": {},
+            "assistive_equipment_ids": [],
+            "assistive_equipment_measurements": {},
+            "weighted_equipment_ids": [1] if is_weighted else [],
+            "weighted_equipment_measurements": [0] + list(range(5, 2 * one_rep_max + 1, 5)) if is_weighted else [0],
+            "is_weighted": is_weighted,
+            "marking_equipment_ids": [],
+            "marking_equipment_measurements": {},
+            "other_equipment_ids": [],
+            "other_equipment_measurements": {},
+            "one_rep_max": one_rep_max,
+            "one_rep_load": one_rep_max,
+            "volume": volume,
+            "density": density,
+            "intensity": rng.randint(0, 80) if is_weighted else 0,
+            "performance": volume * density,
+            "duration": rng.randint(30, 300),
+            "working_duration": rng.randint(20, 200),
+        })
+    return exercises
+
+# The availability of each weekday, with the given number of days available.
+def synthetic_weekday_availability(available_days, seconds_per_day=3600):
+    return [
+        {"id": i, "name": name, "availability": seconds_per_day if i < available_days else 0}
+        for i, name in enumerate(weekdays)
+    ]
+
+# Phases shaped like those built by construct_phases_list.
+def synthetic_phases():
+    return [
+        deepcopy(dummy_phase),
+        {"id": 1, "name": "stabilization endurance", "element_minimum": 4, "element_maximum": 6, "required_phase": True, "is_goal_phase": False},
+        {"id": 2, "name": "strength endurance", "element_minimum": 4, "element_maximum": 6, "required_phase": False, "is_goal_phase": False},
+        {"id": 3, "name": "hypertrophy", "element_minimum": 4, "element_maximum": 6, "required_phase": False, "is_goal_phase": True},
+        {"id": 4, "name": "maximal strength", "element_minimum": 4, "element_maximum": 6, "required_phase": False, "is_goal_phase": False},
+        {"id": 5, "name": "power", "element_minimum": 4, "element_maximum": 6, "required_phase": False, "is_goal_phase": False},
+    ]
+
+# ----------------------------------------- Solver Parameters -----------------------------------------
+
+# The parameters of the macrocycle solver.
+def phase_parameters(macrocycle_allowed_weeks):
+    return {"macrocycle_allowed_weeks": macrocycle_allowed_weeks, "possible_phases": synthetic_phases()}
+
+# The parameters of the microcycle solver, verified the same way as in the workout day agent.
+def phase_component_parameters(exercise_count, phase_component_count, available_days, seed=0):
+    weekday_availability = synthetic_weekday_availability(available_days)
+    parameters = {
+        "valid": True,
+        "status": None,
+        "microcycle_weekdays": list(range(len(weekdays))),
+        "weekday_availability": weekday_availability,
+        "phase_components": synthetic_phase_components(phase_component_count),
+        "possible_exercises": ExerciseTable.from_dicts(synthetic_exercises(exercise_count, seed)),
+        "solution_hints": []}
+    parameters["possible_general_exercises"] = construct_available_general_exercises_list(parameters["possible_exercises"])
+
+    total_availability = sum(day["availability"] for day in weekday_availability)
+    pcs, _ = verify_pc_information(
+        parameters, parameters["phase_components"], parameters["possible_exercises"][1:], total_availability,
+        "duration_min_for_day", "frequency_per_microcycle_min", check_globally=False, default_count_if_none=available_days)
+    parameters["phase_components"] = pcs
+    return parameters
+
+# The parameters of the workout solvers, verified the same way as in the workout exercise agent.
+# Without an availability given, the day allows a little more than the durations given to its workout components.
+def workout_parameters(exercise_count, phase_component_count, availability=None, seed=0):
+    workout_components = synthetic_workout_components(phase_component_count)
+    if availability is None:
+        availability = int(sum(pc["duration"] for pc in workout_components) * 1.1)
+    parameters = {
+        "valid": True,
+        "status": None,
+        "one_rep_max_improvement_percentage": 25,
+        "availability": availability,
+        "phase_components": workout_components,
+        "possible_exercises": ExerciseTable.from_dicts(synthetic_exercises(exercise_count, seed)),
+        "solution_hints": []}
+    parameters["possible_general_exercises"] = construct_available_general_exercises_list(parameters["possible_exercises"])
+
+    pcs, _ = verify_pc_information(
+        parameters, parameters["phase_components"][1:], parameters["possible_exercises"][1:], availability,
+        "duration_min", "exercises_per_bodypart_workout_min", check_globally=True)
+    parameters["phase_components"][1:] = [pc for pc in pcs if pc.get("allowed_exercises")]
+
+    projected_duration = sum(pc["duration"] for pc in parameters["phase_components"][1:])
+    max_time_possible = retrieve_total_time_needed(parameters["phase_components"][1:], "duration_max", "exercises_per_bodypart_workout_max")
+    parameters["projected_duration"] = min(max_time_possible, projected_duration)
+    return parameters
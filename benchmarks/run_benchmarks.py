@@ -0,0 +1,220 @@
+# Times the model build, presolve and solve of the solver agents on synthetic instances, without the database.
+# Run from the repository root with:
+#     python -m benchmarks.run_benchmarks [--scales small medium] [--agents ExerciseAgent] [--output benchmarks/baselines/new.json]
+#     python -m benchmarks.run_benchmarks --compare benchmarks/baselines/baseline.json
+import argparse
+import json
+import os
+import platform
+import statistics
+from datetime import datetime
+from time import perf_counter
+
+from config import AdaptiveTimeBudgetConfig, ExerciseDecompositionConfig
+from ortools import __version__ as ortools_version
+from ortools.sat.python import cp_model
+from werkzeug.exceptions import HTTPException
+
+import app.solver_agents.agent_helpers as agent_helpers
+import app.solver_agents.phases as phases
+from app.solver_agents.phases import PhaseAgent
+from app.solver_agents.phase_components import PhaseComponentAgent
+from app.solver_agents.exercises.exercises_phase_components import ExercisePhaseComponentAgent
+from app.solver_agents.exercises.exercises import ExerciseAgent
+from app.solver_agents.solver_telemetry import collect_solver_runs
+
+from .generators import phase_parameters, phase_component_parameters, workout_parameters
+
+# The sizes of the synthetic instances. Weeks are used by the macrocycle solver, the rest by the others.
+scales = {
+    "small": {"exercises": 50, "phase_components": 3, "days": 1, "weeks": 12},
+    "medium": {"exercises": 500, "phase_components": 10, "days": 4, "weeks": 26},
+    "large": {"exercises": 5000, "phase_components": 30, "days": 7, "weeks": 52},
+}
+
+# The agent benchmarked in each case, and how its parameters are generated from a scale.
+agent_cases = {
+    "PhaseAgent": (PhaseAgent, lambda scale, seed: phase_parameters(scale["weeks"])),
+    "PhaseComponentAgent": (PhaseComponentAgent, lambda scale, seed: phase_component_parameters(scale["exercises"], scale["phase_components"], scale["days"], seed)),
+    "ExercisePhaseComponentAgent": (ExercisePhaseComponentAgent, lambda scale, seed: workout_parameters(scale["exercises"], scale["phase_components"], seed=seed)),
+    "ExerciseAgent": (ExerciseAgent, lambda scale, seed: workout_parameters(scale["exercises"], scale["phase_components"], seed=seed)),
+}
+
+# A subclass of the agent that times each of its model builds and solves, and keeps the models built.
+# The solve time is that of the whole node, as models raced against each other are solved at the same time.
+def timed_agent(agent_class):
+    class TimedAgent(agent_class):
+        def __init__(self, *args, **kwargs):
+            self.build_times = []
+            self.solve_times = []
+            self.models = []
+            super().__init__(*args, **kwargs)
+
+        def _timed_build(self, build_node, state, config):
+            start_time = perf_counter()
+            result = build_node(state, config)
+            self.build_times.append(perf_counter() - start_time)
+            self.models.extend(item for item in (result.get("opt_model") or ()) if isinstance(item, cp_model.CpModel))
+            return result
+
+        def _timed_solve(self, solve_node, state, config):
+            start_time = perf_counter()
+            result = solve_node(state, config)
+            self.solve_times.append(perf_counter() - start_time)
+            return result
+
+        def build_opt_model_node(self, state, config=None):
+            return self._timed_build(super().build_opt_model_node, state, config)
+
+        def solve_model_node(self, state, config=None):
+            return self._timed_solve(super().solve_model_node, state, config)
+
+        if hasattr(agent_class, "build_opt_model_node_2"):
+            def build_opt_model_node_2(self, state, config=None):
+                return self._timed_build(super().build_opt_model_node_2, state, config)
+
+        if hasattr(agent_class, "solve_model_node_temp"):
+            def solve_model_node_temp(self, state, config=None):
+                return self._timed_solve(super().solve_model_node_temp, state, config)
+
+    TimedAgent.__name__ = agent_class.__name__
+    return TimedAgent
+
+# The time the solver spends presolving the model, measured by stopping the solver once presolve is done.
+def presolve_time(model):
+    solver = cp_model.CpSolver()
+    solver.parameters.stop_after_presolve = True
+    solver.Solve(model)
+    return solver.WallTime()
+
+# Run the agent once on the parameters, timing each of its stages.
+def run_case(agent_class, parameters):
+    agent = timed_agent(agent_class)(parameters, {})
+    start_time = perf_counter()
+    with collect_solver_runs() as solver_runs:
+        result = agent.run()
+    total_time = perf_counter() - start_time
+
+    return {
+        "build_time": sum(agent.build_times),
+        "presolve_time": sum(presolve_time(model) for model in agent.models),
+        "solve_time": sum(agent.solve_times),
+        "solver_wall_time": sum(solver_run["wall_time"] for solver_run in solver_runs),
+        "total_time": total_time,
+        "builds": len(agent.build_times),
+        "solves": len(solver_runs),
+        "variables": max((solver_run["variables"] for solver_run in solver_runs), default=0),
+        "constraints": max((solver_run["constraints"] for solver_run in solver_runs), default=0),
+        "statuses": [solver_run["status"] for solver_run in solver_runs],
+        "relaxation_attempts": len(result.get("relaxation_attempts") or []),
+    }
+
+# Run a case several times, keeping the median of each timing.
+def benchmark_case(agent_name, scale_name, repeat=3, seed=0):
+    agent_class, build_parameters = agent_cases[agent_name]
+    scale = scales[scale_name]
+    try:
+        parameters = build_parameters(scale, seed)
+    except HTTPException as e:
+        return {"agent": agent_name, "scale": scale_name, "error": f"Instance rejected: {e.description}"}
+
+    # Instances that can only be relaxed with the language model, or that fail otherwise, are reported rather than stopping the suite.
+    try:
+        runs = [run_case(agent_class, parameters) for _ in range(repeat)]
+    except Exception as e:
+        return {"agent": agent_name, "scale": scale_name, "error": f"{type(e).__name__}: {e}"}
+    case = {"agent": agent_name, "scale": scale_name, "inputs": scale, "repeat": repeat}
+    for key in ("build_time", "presolve_time", "solve_time", "solver_wall_time", "total_time"):
+        case[key] = statistics.median(run[key] for run in runs)
+    for key in ("builds", "solves", "variables", "constraints", "statuses", "relaxation_attempts"):
+        case[key] = runs[-1][key]
+    return case
+
+# Compare each timing to the baseline, returning the cases that became slower than the threshold allows.
+def compare_to_baseline(results, baseline, threshold=1.25):
+    regressions = []
+    for case_name, case in results["cases"].items():
+        baseline_case = baseline["cases"].get(case_name)
+        if not baseline_case or "error" in case or "error" in baseline_case:
+            continue
+        for key in ("build_time", "presolve_time", "solve_time", "total_time"):
+            before, after = baseline_case[key], case[key]
+            ratio = after / before if before else None
+            print(f"{case_name:<40} {key:<14} {before:>9.3f}s -> {after:>9.3f}s" + (f" ({ratio:.2f}x)" if ratio else ""))
+            if ratio and ratio > threshold:
+                regressions.append((case_name, key, ratio))
+    return regressions
+
+def print_case(case_name, case):
+    if "error" in case:
+        print(f"{case_name}: {case['error']}")
+    else:
+        print(f"{case_name}: build {case['build_time']:.3f}s, presolve {case['presolve_time']:.3f}s, solve {case['solve_time']:.3f}s, total {case['total_time']:.3f}s ({case['solves']} solves)")
+    return None
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver agents on synthetic instances.")
+    parser.add_argument("--agents", nargs="+", choices=list(agent_cases), default=list(agent_cases))
+    parser.add_argument("--scales", nargs="+", choices=list(scales), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=3, help="The number of runs of each case, of which the median is kept.")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the synthetic instances.")
+    parser.add_argument("--output", help="The file the results are written to.")
+    parser.add_argument("--compare", help="A baseline file to compare the results to.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="The slowdown compared to the baseline reported as a regression.")
+    args = parser.parse_args(args)
+
+    # Keep the runs repeatable: no language model explanations and no budgets planned from earlier runs.
+    agent_helpers.explain_relaxations_with_llm = False
+    AdaptiveTimeBudgetConfig.enabled = False
+
+    results = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "ortools": ortools_version,
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "cases": {},
+    }
+    for agent_name in args.agents:
+        for scale_name in args.scales:
+            case = benchmark_case(agent_name, scale_name, args.repeat, args.seed)
+            results["cases"][f"{agent_name}/{scale_name}"] = case
+            print_case(f"{agent_name}/{scale_name}", case)
+
+    # The dynamic program of the macrocycle solver skips the model, so it is timed with CP-SAT as well.
+    if "PhaseAgent" in args.agents:
+        phases.phase_solver_dynamic_programming = False
+        for scale_name in args.scales:
+            case = benchmark_case("PhaseAgent", scale_name, args.repeat, args.seed)
+            case["agent"] = "PhaseAgent[cp_sat]"
+            results["cases"][f"PhaseAgent[cp_sat]/{scale_name}"] = case
+            print_case(f"PhaseAgent[cp_sat]/{scale_name}", case)
+        phases.phase_solver_dynamic_programming = True
+
+    # The first step of the exercise solver may be decomposed by bodypart, so it is timed that way as well.
+    if "ExerciseAgent" in args.agents:
+        decomposition_enabled = ExerciseDecompositionConfig.enabled
+        ExerciseDecompositionConfig.enabled = True
+        for scale_name in args.scales:
+            case = benchmark_case("ExerciseAgent", scale_name, args.repeat, args.seed)
+            case["agent"] = "ExerciseAgent[decomposed]"
+            results["cases"][f"ExerciseAgent[decomposed]/{scale_name}"] = case
+            print_case(f"ExerciseAgent[decomposed]/{scale_name}", case)
+        ExerciseDecompositionConfig.enabled = decomposition_enabled
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for case_name, key, ratio in regressions:
+            print(f"REGRESSION: {case_name} {key} is {ratio:.2f}x the baseline.")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
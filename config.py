@@ -21,6 +21,63 @@ user_equipment_population_default = 2
 # The maximum number of seconds that the solver is allowed to take on default.
 ortools_solver_time_in_seconds = 5
 
+# Whether the exercise solvers race their fallback models in parallel rather than extending the time allowed one after another.
+ortools_solver_portfolio = True
+
+# The maximum number of seconds that the models raced in parallel are allowed to take together.
+ortools_solver_portfolio_time_in_seconds = 60
+
+# The number of seconds the raced models are given to improve on the first solution found by any of them.
+ortools_solver_portfolio_improvement_time_in_seconds = 10
+
+# Whether the relaxations found by the solver are explained by the LLM.
+explain_relaxations_with_llm = True
+
+# Whether the solvers are warm started with hints from the user's most recent comparable schedule.
+ortools_solver_hints = True
+
+# Whether the exercise solvers constrain the products of reps, sets and rest with precomputed tables rather than multiplications.
+ortools_solver_assignment_tables = True
+
+# Whether the phase solver finds the macrocycle with a dynamic program when the active constraints allow for it, rather than CP-SAT.
+phase_solver_dynamic_programming = True
+
+# The number of weeks allowed for a macrocycle when scheduling its mesocycles.
+macrocycle_allowed_weeks = 26
+
+# Whether the phase plans for every goal are solved and stored when the database is created, rather than on first use.
+precompute_phase_plans_on_init = True
+
+# The number of solver results kept in memory, reused when a solver is run again with identical parameters and constraints.
+solver_cache_size = 256
+
+# Whether the solver results are also stored in the database, keeping them across restarts and processes.
+solver_cache_persistent = False
+
+# Whether the exercises for every workout day of a microcycle are generated as soon as its phase component schedule is written.
+batch_generate_workout_exercises = True
+
+# Maximum number of workout days of a microcycle whose exercises are solved at the same time.
+batch_workout_exercise_workers = 4
+
+# Whether solver models are built and solved in separate worker processes rather than in the request threads.
+use_solver_farm = True
+
+# Number of worker processes that build and solve models.
+solver_farm_processes = 2
+
+# Total number of CP-SAT search workers shared among every solver running at the same time.
+solver_cpu_budget = os.cpu_count() or 8
+
+# The minimum number of seconds between the intermediate solutions streamed to the client while a solver keeps improving.
+solver_progress_min_interval_in_seconds = 1.0
+
+# Whether the statistics of every solve are stored in the solver runs table.
+record_solver_runs = True
+
+# Whether the variables, constraints and build time of each model are attributed to the constraint family and helper that added them.
+tag_model_construction = True
+
 # Whether the workout schedule will use vertical loading.
 vertical_loading = True
 
@@ -36,6 +93,70 @@ confirm_valid_schedule = True
 # Whether the editor agent should request user confirmation before applying edits that would result in an invalid schedule.
 confirm_invalid_schedule = True
 
+# Configurations for which formulation each solver uses to link entries with items and constrain their values.
+# The compact formulation uses one constraint per entry rather than one per entry and item, allowing the two to be benchmarked.
+class CompactFormulationConfig:
+    # Whether the phase solver uses the compact formulation.
+    phases = True
+
+    # Whether the exercise solvers use the compact formulation.
+    exercises = True
+
+# Configurations for solving the first step of the exercise solver as one model per bodypart, with a master model reconciling them.
+class ExerciseDecompositionConfig:
+    # Whether the first step of the exercise solver is decomposed by bodypart.
+    enabled = False
+
+    # The fewest bodyparts for which the first step is decomposed.
+    min_blocks = 2
+
+    # The time allowed for each bodypart model, the first of which are solved in parallel.
+    block_time_in_seconds = 10
+
+    # The time allowed for the master model choosing a solution for each bodypart.
+    master_time_in_seconds = 5
+
+    # The number of times the conflicting bodyparts are re-solved before the full model is solved instead.
+    max_rounds = 3
+
+# Configurations for the time and optimality gap each solver is given, planned from the solve times of previous models of similar size.
+class AdaptiveTimeBudgetConfig:
+    # Whether the time allowed is planned from previous solves rather than always using the default.
+    enabled = True
+
+    # The number of previous solves remembered for each solver.
+    history_size = 50
+
+    # The number of previous solves needed before the plan replaces the default.
+    min_samples = 5
+
+    # How much longer than the predicted time the solver is allowed.
+    margin = 1.5
+
+    # The smallest and largest number of seconds a planned budget may be.
+    min_time_in_seconds = 1
+    max_time_in_seconds = 20
+
+    # The relative gap between the objective and its bound at which the search stops.
+    relative_gap_limit = 0.01
+
+    # The gap used instead when most previous solves of the solver could not reach the gap in time.
+    relaxed_relative_gap_limit = 0.05
+
+# Configurations for recording the inputs and models of slow or infeasible solves so they can be replayed offline.
+class SolverFlightRecorderConfig:
+    # Whether slow or infeasible solves are recorded.
+    enabled = False
+
+    # The directory that the recordings are written to.
+    directory = "solver_recordings"
+
+    # Solves taking longer than this number of seconds are recorded.
+    slow_solve_in_seconds = 10
+
+    # Whether solves that prove the model infeasible are recorded.
+    record_infeasible = True
+
 # Configurations for displayed information for logged schedules.
 class ScheduleDisplayConfig:
     # Whether the logged schedule should include the reason that an exercise has been included.
@@ -0,0 +1,4 @@
+import os
+
+# The helpers tested here don't connect to the database, but the config reads its password on import.
+os.environ.setdefault("SUPABASE_PASSWORD", "")
@@ -0,0 +1,71 @@
+import unittest
+
+from ortools.sat.python import cp_model
+
+from app.solver_agents.constraint_index import ConstraintIndex, constraint_variables, variable_of_reference
+
+class TestConstraintIndex(unittest.TestCase):
+    def setUp(self):
+        model = cp_model.CpModel()
+        self.x = model.NewIntVar(0, 10, "x")
+        self.y = model.NewIntVar(0, 10, "y")
+        self.z = model.NewIntVar(0, 10, "z")
+        self.a = model.NewBoolVar("a")
+        self.b = model.NewBoolVar("b")
+        self.unused = model.NewIntVar(0, 10, "unused")
+
+        # 0: linear, enforced by a negated literal.
+        model.Add(self.x + self.y <= 10).OnlyEnforceIf(self.a.Not())
+        # 1: bool_or.
+        model.AddBoolOr([self.a, self.b.Not()])
+        # 2: int_div.
+        model.AddDivisionEquality(self.z, self.x, 3)
+        # 3: lin_max.
+        model.AddMaxEquality(self.z, [self.x, self.y])
+        # 4: interval, 5: no_overlap on it.
+        interval = model.NewIntervalVar(self.x, 2, self.y, "interval")
+        model.AddNoOverlap([interval])
+        # 6: table.
+        model.AddAllowedAssignments([self.y, self.z], [(1, 2), (3, 4)])
+        self.model = model
+        self.index = ConstraintIndex(model)
+
+    def test_variable_of_reference(self):
+        self.assertEqual(variable_of_reference(3), 3)
+        self.assertEqual(variable_of_reference(-4), 3)
+
+    def test_constraint_variables_include_enforcement_literals(self):
+        model_proto = self.model.Proto()
+        self.assertEqual(
+            constraint_variables(model_proto, model_proto.constraints[0]),
+            sorted([self.x.Index(), self.y.Index(), self.a.Index()]))
+
+    def test_constraints_on_each_variable(self):
+        self.assertEqual(self.index.constraints_on(self.x), [0, 2, 3, 4, 5])
+        self.assertEqual(self.index.constraints_on(self.y), [0, 3, 4, 5, 6])
+        self.assertEqual(self.index.constraints_on(self.z), [2, 3, 6])
+        self.assertEqual(self.index.constraints_on(self.a), [0, 1])
+        self.assertEqual(self.index.constraints_on(self.unused), [])
+
+    def test_variables_may_be_given_as_literals_or_indices(self):
+        self.assertEqual(self.index.constraints_on(self.b.Not()), [1])
+        self.assertEqual(self.index.constraints_on(self.b.Index()), [1])
+
+    def test_every_constraint_on_a_variable_refers_to_it(self):
+        for constraint_index in range(len(self.model.Proto().constraints)):
+            for variable in self.index.variables_of(constraint_index):
+                self.assertIn(constraint_index, self.index.constraints_on(variable))
+
+    def test_neighbours(self):
+        self.assertEqual(self.index.neighbours(self.a), sorted([self.x.Index(), self.y.Index(), self.b.Index()]))
+
+    def test_shared_variables(self):
+        self.assertEqual(self.index.shared_variables([[0], [6]]), [self.y.Index()])
+        self.assertEqual(self.index.shared_variables([[0], [2, 3]], excluded=[self.x]), [self.y.Index()])
+        self.assertEqual(self.index.shared_variables([]), [])
+
+    def test_variable_name(self):
+        self.assertEqual(self.index.variable_name(self.z), "z")
+
+if __name__ == "__main__":
+    unittest.main()
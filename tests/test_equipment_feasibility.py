@@ -0,0 +1,64 @@
+import random
+import unittest
+from collections import defaultdict
+from types import SimpleNamespace
+
+from app.models import User_Exercises
+from app.utils.equipment_feasibility import EquipmentRequirements, equipment_kinds
+
+# Random requirements of each kind for the exercises, as (exercise_id, kind, equipment_id, quantity, relationship).
+def random_requirements(rng, exercise_ids):
+    return [
+        (exercise_id, kind, rng.randint(1, 4), rng.choice([None, 1, 2, 3]), relationship)
+        for exercise_id in exercise_ids
+        for kind in equipment_kinds
+        for relationship in [rng.choice(["And", "Or", None])]
+        for _ in range(rng.randint(0, 3))]
+
+# Random equipment of a user, as (equipment_id, measurement), with some pieces owned more than once.
+def random_user_equipment(rng):
+    return [(rng.randint(1, 4), rng.choice([0, 5, 10, 20])) for _ in range(rng.randint(0, 8))]
+
+# The result of User_Exercises.has_equipment, which the feasibility must match, for the requirements of an exercise of a kind.
+def has_equipment_by_exercise(requirements, user_equipment, exercise_id, kind):
+    required_equipment = [
+        SimpleNamespace(equipment_id=equipment_id, quantity=quantity, equipment_relationship=relationship)
+        for requirement_exercise_id, requirement_kind, equipment_id, quantity, relationship in requirements
+        if requirement_exercise_id == exercise_id and requirement_kind == kind]
+    user_map = defaultdict(list)
+    for equipment_id, measurement in user_equipment:
+        user_map[equipment_id].append(measurement)
+    return User_Exercises().has_equipment(required_equipment, user_map)
+
+class TestEquipmentFeasibility(unittest.TestCase):
+    def test_matches_has_equipment_for_every_exercise_and_kind(self):
+        rng = random.Random(0)
+        exercise_ids = list(range(1, 41))
+        for _ in range(25):
+            requirements = random_requirements(rng, exercise_ids)
+            user_equipment = random_user_equipment(rng)
+            feasibility = EquipmentRequirements(requirements).evaluate(user_equipment)
+            for exercise_id in exercise_ids:
+                expected_kinds = {kind: has_equipment_by_exercise(requirements, user_equipment, exercise_id, kind) for kind in equipment_kinds}
+                for kind, expected in expected_kinds.items():
+                    self.assertEqual(feasibility.has_equipment(exercise_id, kind), expected, (requirements, user_equipment, exercise_id, kind))
+                self.assertEqual(feasibility.has_all_equipment(exercise_id), all(has for has, _ in expected_kinds.values()))
+
+    def test_exercises_without_requirements_need_nothing(self):
+        feasibility = EquipmentRequirements([(1, "weighted", 1, 2, "And")]).evaluate([])
+        self.assertTrue(feasibility.has_all_equipment(2))
+        self.assertEqual(feasibility.has_equipment(2, "weighted"), (True, {}))
+        self.assertFalse(feasibility.has_all_equipment(1))
+
+    def test_quantity_is_needed_of_a_single_measurement(self):
+        requirements = EquipmentRequirements([(1, "weighted", 1, 2, "And")])
+        self.assertFalse(requirements.evaluate([(1, 10), (1, 20)]).has_all_equipment(1))
+        self.assertEqual(requirements.evaluate([(1, 10), (1, 10), (1, 20)]).has_equipment(1, "weighted"), (True, {1: [10]}))
+
+    def test_exercises_requiring(self):
+        requirements = EquipmentRequirements([(1, "weighted", 1, 1, "And"), (2, "other", 2, 1, "Or"), (3, "marking", 1, 1, None)])
+        self.assertEqual(requirements.exercises_requiring([1]), [1, 3])
+        self.assertEqual(requirements.exercises_requiring([2, 3]), [2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import copy
+import pickle
+import unittest
+from random import Random
+
+from benchmarks.generators import synthetic_exercises
+from app.utils.exercise_table import ExerciseTable, as_exercise_table
+
+# Exercises shaped like those of construct_available_exercises_list, with few weights so that not every intensity range has one.
+def sparse_weight_exercises(exercise_count, seed=0):
+    rng = Random(seed)
+    exercises = synthetic_exercises(exercise_count, seed=seed)
+    for exercise in exercises[1:]:
+        if exercise["is_weighted"]:
+            exercise["weighted_equipment_measurements"] = sorted(rng.sample(range(0, 2 * exercise["one_rep_max"] + 1, 5), rng.randint(1, 3)))
+    return exercises
+
+# The weight check of each exercise as it was made before the exercise table, one intensity at a time.
+def has_valid_weights_by_exercise(exercise, intensity_min, intensity_max):
+    intensities = range(intensity_min or 1, intensity_max + 1)
+    return (
+        not exercise["is_weighted"] or
+        bool(set(intensity * exercise["one_rep_max"] // 100 for intensity in intensities) & set(exercise["weighted_equipment_measurements"])))
+
+class TestExerciseTable(unittest.TestCase):
+    def setUp(self):
+        self.exercises = sparse_weight_exercises(120, seed=3)
+        self.table = ExerciseTable.from_dicts(self.exercises)
+
+        # The exercises without the inactive exercise, as the solvers use them.
+        self.active_exercises = self.exercises[1:]
+        self.active_table = self.table[1:]
+
+    def test_rows_match_the_exercises(self):
+        self.assertEqual(len(self.table), len(self.exercises))
+        for exercise, row in zip(self.exercises, self.table):
+            self.assertEqual(set(row), set(exercise))
+            for key, value in exercise.items():
+                if key == "pc_ids" and isinstance(value, list):
+                    self.assertEqual(sorted(row[key]), sorted(value))
+                else:
+                    self.assertEqual(row[key], value, key)
+                    self.assertIs(type(row[key]), type(value), key)
+
+    def test_slices_share_the_table(self):
+        self.assertEqual(len(self.active_table), len(self.active_exercises))
+        self.assertEqual(self.active_table[0]["id"], self.active_exercises[0]["id"])
+        self.assertEqual(self.active_table[-1]["weighted_equipment_measurements"], self.active_exercises[-1]["weighted_equipment_measurements"])
+        with self.assertRaises(ValueError):
+            self.table[::2]
+        with self.assertRaises(IndexError):
+            self.table[len(self.table)]
+
+    def test_has_valid_weights_matches_the_check_by_exercise(self):
+        rng = Random(1)
+        intensity_ranges = [(None, 100), (1, 1), (50, 49)] + [
+            (intensity_min, rng.randint(intensity_min or 1, 100))
+            for intensity_min in (rng.choice([None, 0, 1, 20, 50, 75]) for _ in range(100))]
+        for intensity_min, intensity_max in intensity_ranges:
+            expected = [has_valid_weights_by_exercise(exercise, intensity_min, intensity_max) for exercise in self.active_exercises]
+            self.assertEqual(self.active_table.has_valid_weights(intensity_min, intensity_max).tolist(), expected, (intensity_min, intensity_max))
+
+    def test_membership(self):
+        for bodypart_id in range(1, 10):
+            self.assertEqual(
+                self.active_table.has_bodypart(bodypart_id).tolist(),
+                [bodypart_id in exercise["bodypart_ids"] for exercise in self.active_exercises])
+        for pc_ids in ([1, 1], [2, 3], [99, 99]):
+            self.assertEqual(
+                self.active_table.allows_pc(pc_ids).tolist(),
+                [pc_ids in exercise["pc_ids"] for exercise in self.active_exercises])
+
+    def test_max_weights(self):
+        self.assertEqual(
+            self.active_table.max_weights().tolist(),
+            [max(exercise["weighted_equipment_measurements"], default=0) for exercise in self.active_exercises])
+
+    def test_copies_and_pickles(self):
+        self.assertIs(copy.deepcopy(self.table), self.table)
+        self.assertIs(as_exercise_table(self.table), self.table)
+        self.assertEqual(pickle.loads(pickle.dumps(self.table)).to_dicts(), self.table.to_dicts())
+
+    def test_columns_are_read_only(self):
+        with self.assertRaises(ValueError):
+            self.table.column("id")[0] = 5
+
+if __name__ == "__main__":
+    unittest.main()
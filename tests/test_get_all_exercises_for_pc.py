@@ -0,0 +1,158 @@
+import itertools
+import unittest
+from random import Random
+from unittest.mock import patch
+
+from config import BackupExerciseRetrieval as BackupRetrieval
+from benchmarks.generators import synthetic_exercises, synthetic_phase_components
+from app.utils.get_all_exercises_for_pc import exercise_masks_for_pcs, get_exercises_for_all_pcs
+
+# ----------------------------------------- Retrieval by Condition -----------------------------------------
+# The retrieval as it was before the masks, checking each condition for one exercise at a time. The logging is left out.
+
+def get_exercises_for_pc_conditions(exercises, phase_component, conditions=[]):
+    return [i for i, exercise in enumerate(exercises, start=1)
+            if all(f(exercise, phase_component) for f in conditions)]
+
+def indicate_if_exercise_is_true(true_exercises, found_exercises, flag_if_not_true="No reason."):
+    return {
+        found_exercise: "True Exercise" if found_exercise in true_exercises else flag_if_not_true
+        for found_exercise in found_exercises
+    }
+
+def get_exercises_for_pc_by_condition(exercises, phase_component):
+    pc_intensity = list(range(phase_component["intensity_min"] or 1, phase_component["intensity_max"] + 1))
+
+    exercise_is_allowed_for_phase_component = lambda exercise, phase_component: phase_component["pc_ids"] in exercise["pc_ids"]
+    exercise_is_of_desired_bodypart = lambda exercise, phase_component: phase_component["bodypart_id"] in exercise["bodypart_ids"]
+    exercise_has_valid_weights = lambda exercise, _: (
+        not exercise["is_weighted"] or
+        bool(set((intensity * exercise["one_rep_max"] // 100) for intensity in pc_intensity) & set(exercise["weighted_equipment_measurements"]))
+    )
+
+    exercises_for_pc = get_exercises_for_pc_conditions(
+        exercises, phase_component, conditions=[exercise_is_allowed_for_phase_component, exercise_is_of_desired_bodypart, exercise_has_valid_weights])
+    true_exercises_for_pc = list(exercises_for_pc)
+    exercises_min = phase_component['exercises_per_bodypart_workout_min']
+
+    message = None
+    pc_name = f"'{phase_component['component_name'].upper()}' '{phase_component['subcomponent_name'].upper()}'"
+
+    if BackupRetrieval.for_desired_full_body and len(exercises_for_pc) < exercises_min and phase_component["bodypart_id"] == 1:
+        message = f"Bodypart is total body, so all exercises for component {pc_name} will be included."
+        exercises_for_pc = get_exercises_for_pc_conditions(
+            exercises, phase_component, conditions=[exercise_is_allowed_for_phase_component, exercise_has_valid_weights])
+
+    if BackupRetrieval.for_desired_bodypart and len(exercises_for_pc) < exercises_min:
+        message = f"Including all exercises for bodypart '{phase_component['bodypart_name'].upper()}'."
+        exercises_for_pc = get_exercises_for_pc_conditions(
+            exercises, phase_component, conditions=[exercise_is_of_desired_bodypart, exercise_has_valid_weights])
+
+    if BackupRetrieval.for_desired_phase_component and len(exercises_for_pc) < exercises_min:
+        message = f"Including all exercises for component {pc_name}."
+        exercises_for_pc = get_exercises_for_pc_conditions(
+            exercises, phase_component, conditions=[exercise_is_allowed_for_phase_component, exercise_has_valid_weights])
+
+    if BackupRetrieval.for_desired_full_body and BackupRetrieval.for_desired_bodypart and len(exercises_for_pc) < exercises_min and phase_component["bodypart_id"] == 1:
+        message = f"Bodypart is total body, so all exercises for component {pc_name} will be included."
+        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, conditions=[exercise_has_valid_weights])
+
+    if BackupRetrieval.all_exercises and len(exercises_for_pc) < exercises_min:
+        message = "Including all exercises."
+        exercises_for_pc = get_exercises_for_pc_conditions(exercises, phase_component, conditions=[exercise_has_valid_weights])
+
+    if len(exercises_for_pc) < exercises_min:
+        message = "No solution found."
+
+    return exercises_for_pc, indicate_if_exercise_is_true(true_exercises_for_pc, exercises_for_pc, message)
+
+def get_exercises_for_all_pcs_by_condition(exercises, phase_components):
+    exercises_for_pcs, true_exercise_indicators_for_pcs = map(list, zip(*[
+        get_exercises_for_pc_by_condition(exercises, phase_component)
+        for phase_component in phase_components
+    ]))
+
+    pc_indices_without_true_exercises = [i for i in range(len(exercises_for_pcs)) if len(exercises_for_pcs[i]) == len(exercises)]
+    for i in pc_indices_without_true_exercises:
+        exercises_for_pc = exercises_for_pcs[i]
+        for j in range(len(exercises_for_pcs)):
+            if j in pc_indices_without_true_exercises:
+                continue
+            exercises_for_pc = list(set(exercises_for_pc) - set(exercises_for_pcs[j]))
+        if exercises_for_pc:
+            exercises_for_pcs[i] = exercises_for_pc
+    return exercises_for_pcs, true_exercise_indicators_for_pcs
+
+# ----------------------------------------- Fixtures -----------------------------------------
+
+# Active exercises, as the pre-processing receives them, with few weights so that the weight condition removes some of them.
+def small_exercises(exercise_count, seed):
+    rng = Random(seed)
+    exercises = synthetic_exercises(exercise_count, seed=seed)[1:]
+    for exercise in exercises:
+        if exercise["is_weighted"]:
+            exercise["weighted_equipment_measurements"] = sorted(rng.sample(range(0, 2 * exercise["one_rep_max"] + 1, 5), rng.randint(1, 3)))
+    return exercises
+
+# Phase components needing a random number of exercises, so that each tier of retrieval is reached.
+def small_phase_components(phase_component_count, exercise_count, seed):
+    rng = Random(seed)
+    phase_components = synthetic_phase_components(phase_component_count)
+    for phase_component in phase_components:
+        phase_component["exercises_per_bodypart_workout_min"] = rng.choice([0, 1, 3, 6, exercise_count // 2, exercise_count + 1])
+    return phase_components
+
+class TestGetExercisesForAllPcs(unittest.TestCase):
+    def assert_matches_retrieval_by_condition(self, exercises, phase_components):
+        exercises_for_pcs, true_exercise_indicators_for_pcs = get_exercises_for_all_pcs(exercises, phase_components)
+        expected_exercises_for_pcs, expected_true_exercise_indicators_for_pcs = get_exercises_for_all_pcs_by_condition(exercises, phase_components)
+        self.assertEqual([sorted(exercises_for_pc) for exercises_for_pc in exercises_for_pcs], [sorted(exercises_for_pc) for exercises_for_pc in expected_exercises_for_pcs])
+        self.assertEqual(true_exercise_indicators_for_pcs, expected_true_exercise_indicators_for_pcs)
+
+    def test_matches_retrieval_by_condition(self):
+        for seed in range(10):
+            exercises = small_exercises(24, seed)
+            self.assert_matches_retrieval_by_condition(exercises, small_phase_components(12, len(exercises), seed))
+
+    def test_matches_retrieval_by_condition_for_every_backup(self):
+        exercises = small_exercises(24, seed=5)
+        phase_components = small_phase_components(12, len(exercises), seed=5)
+        backups = ["for_desired_full_body", "for_desired_bodypart", "for_desired_phase_component", "all_exercises"]
+        for flags in itertools.product([False, True], repeat=len(backups)):
+            with patch.multiple(BackupRetrieval, **dict(zip(backups, flags))):
+                with self.subTest(**dict(zip(backups, flags))):
+                    self.assert_matches_retrieval_by_condition(exercises, phase_components)
+
+    def test_phase_components_with_every_exercise_keep_those_of_no_other(self):
+        exercises = small_exercises(24, seed=2)
+        for exercise in exercises:
+            exercise["is_weighted"] = False
+        phase_components = small_phase_components(3, len(exercises), seed=2)
+        phase_components[0]["exercises_per_bodypart_workout_min"] = len(exercises) + 1
+        phase_components[1]["exercises_per_bodypart_workout_min"] = 0
+        phase_components[2]["exercises_per_bodypart_workout_min"] = 0
+        with patch.object(BackupRetrieval, "all_exercises", True):
+            exercises_for_pcs, _ = get_exercises_for_all_pcs(exercises, phase_components)
+            self.assert_matches_retrieval_by_condition(exercises, phase_components)
+        self.assertTrue(set(exercises_for_pcs[0]).isdisjoint(exercises_for_pcs[1] + exercises_for_pcs[2]))
+
+    def test_exercise_masks_for_pcs(self):
+        exercises = small_exercises(24, seed=4)
+        phase_components = small_phase_components(12, len(exercises), seed=4)
+        masks = exercise_masks_for_pcs(exercises, phase_components)
+        for i, phase_component in enumerate(phase_components):
+            def found(*conditions):
+                return [all(condition(exercise) for condition in conditions) for exercise in exercises]
+            allowed_for_phase_component = lambda exercise: phase_component["pc_ids"] in exercise["pc_ids"]
+            of_desired_bodypart = lambda exercise: phase_component["bodypart_id"] in exercise["bodypart_ids"]
+            has_valid_weights = lambda exercise: (
+                not exercise["is_weighted"] or
+                bool({intensity * exercise["one_rep_max"] // 100 for intensity in range(phase_component["intensity_min"] or 1, phase_component["intensity_max"] + 1)}
+                     & set(exercise["weighted_equipment_measurements"])))
+            self.assertEqual(masks["true_exercises"][i].tolist(), found(allowed_for_phase_component, of_desired_bodypart, has_valid_weights))
+            self.assertEqual(masks["phase_component"][i].tolist(), found(allowed_for_phase_component, has_valid_weights))
+            self.assertEqual(masks["bodypart"][i].tolist(), found(of_desired_bodypart, has_valid_weights))
+            self.assertEqual(masks["all"][i].tolist(), found(has_valid_weights))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import patch
+
+from ortools.sat.python import cp_model
+
+from config import AdaptiveTimeBudgetConfig
+from app.solver_agents.time_budget import SolverTimeBudget, model_size
+
+# A model with the given number of variables and no constraints.
+def model_with_variables(count):
+    model = cp_model.CpModel()
+    for i in range(count):
+        model.NewIntVar(0, 10, f"x_{i}")
+    return model
+
+# A finished solve, as far as the budget reads it.
+class FinishedSolve:
+    def __init__(self, wall_time, max_time):
+        self.wall_time = wall_time
+        self.parameters = type("Parameters", (), {"max_time_in_seconds": max_time})()
+
+    def WallTime(self):
+        return self.wall_time
+
+class TestSolverTimeBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = SolverTimeBudget()
+        self.model = model_with_variables(10)
+
+    def record_solves(self, count, status=cp_model.OPTIMAL, wall_time=1.0, max_time=30, first_solution_time=0.5, stopped_early=False):
+        for _ in range(count):
+            self.budget.record("Agent", self.model, FinishedSolve(wall_time, max_time), status, first_solution_time, stopped_early=stopped_early)
+
+    def test_default_time_and_no_gap_until_enough_solves(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples - 1)
+        self.assertEqual(self.budget.plan("Agent", self.model, 30), (30, 0.0))
+
+    def test_default_time_and_no_gap_when_disabled(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples)
+        with patch.object(AdaptiveTimeBudgetConfig, "enabled", False):
+            self.assertEqual(self.budget.plan("Agent", self.model, 30), (30, 0.0))
+
+    def test_plan_scales_with_model_size(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples, wall_time=2.0)
+        max_time, gap = self.budget.plan("Agent", self.model, 30)
+        self.assertAlmostEqual(max_time, AdaptiveTimeBudgetConfig.margin * 2.0)
+        self.assertEqual(gap, AdaptiveTimeBudgetConfig.relative_gap_limit)
+
+        # A model twice the size is predicted to take twice as long.
+        max_time, _ = self.budget.plan("Agent", model_with_variables(20), 30)
+        self.assertAlmostEqual(max_time, AdaptiveTimeBudgetConfig.margin * 4.0)
+
+    def test_plan_is_capped(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples, wall_time=100.0)
+        self.assertEqual(self.budget.plan("Agent", self.model, 30)[0], AdaptiveTimeBudgetConfig.max_time_in_seconds)
+        self.assertEqual(self.budget.plan("Agent", self.model, 60, max_time=60)[0], 60)
+
+    def test_no_gap_for_lexicographic_objectives(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples)
+        self.assertEqual(self.budget.plan("Agent", self.model, 30, allow_gap=False)[1], 0.0)
+
+    def test_relaxed_gap_when_most_solves_run_out_of_time(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples, status=cp_model.FEASIBLE, wall_time=30)
+        self.assertEqual(self.budget.plan("Agent", self.model, 30)[1], AdaptiveTimeBudgetConfig.relaxed_relative_gap_limit)
+
+    def test_solves_stopped_early_have_not_converged(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples, status=cp_model.FEASIBLE, wall_time=1.0, stopped_early=True)
+        records = self.budget.history["Agent"]
+        self.assertTrue(all(record["converged_time"] is None and not record["timed_out"] for record in records))
+
+        # A feasible solve that stopped on its own before its time ran out reached the gap.
+        self.record_solves(1, status=cp_model.FEASIBLE, wall_time=1.0)
+        self.assertEqual(records[-1]["converged_time"], 1.0)
+
+    def test_job_plans_from_the_history_given_and_collects_its_records(self):
+        self.record_solves(AdaptiveTimeBudgetConfig.min_samples)
+        snapshot = self.budget.snapshot()
+
+        job_budget = SolverTimeBudget()
+        with job_budget.job(snapshot) as job_records:
+            self.assertEqual(len(job_budget.history["Agent"]), AdaptiveTimeBudgetConfig.min_samples)
+            job_budget.record("Agent", self.model, FinishedSolve(1.0, 30), cp_model.OPTIMAL, 0.5)
+        self.assertEqual(len(job_records), 1)
+
+        self.budget.extend(job_records)
+        self.assertEqual(len(self.budget.history["Agent"]), AdaptiveTimeBudgetConfig.min_samples + 1)
+
+    def test_model_size(self):
+        self.assertEqual(model_size(self.model), (10, 0))
+
+if __name__ == "__main__":
+    unittest.main()